@@ -0,0 +1,205 @@
+"""
+Throughput and latency of the dashboard and list pages served by the two gunicorn profiles
+(see gunicorn.conf.py): sync workers running the sync views (SERVER_PROFILE=wsgi) and uvicorn workers
+running the async views (SERVER_PROFILE=asgi, see LIBRARY_ASYNC_VIEWS).
+
+Usage:
+    python benchmarks/asgi_load.py --clients 200 --duration 20 --workers 2
+
+A throwaway SQLite database is created and filled, then each profile is started with gunicorn on a
+local port and `--clients` concurrent clients, logged in as the same librarian, request the pages
+below in a loop for `--duration` seconds. Each request opens its own connection (sync workers do not
+keep connections alive). Pass --database-url to run against a scratch PostgreSQL database instead;
+its tables are created and filled by the benchmark.
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PAGES = ["/", "/books/", "/members/", "/lent-books/", "/payments/", "/overdue-books/", "/books/?query=garden"]
+
+WORDS = "python django history science garden ocean river empire machine vision winter summer".split()
+
+
+def server_environment(args, database):
+    environment = {**os.environ, "DJANGO_SETTINGS_MODULE": "core.settings", "DEBUG": "False"}
+    if args.database_url:
+        environment["DATABASE_URL"] = args.database_url
+    else:
+        environment.pop("DATABASE_URL", None)
+        environment["DATABASE_NAME"] = database
+    return environment
+
+
+def prepare(args, database):
+    """
+    Creates and fills the database, and returns the session cookie of the benchmark librarian.
+    """
+    os.environ.update(server_environment(args, database))
+    if not args.database_url:
+        os.environ.pop("DATABASE_URL", None)
+    sys.path.insert(0, str(ROOT))
+
+    import logging
+
+    import django
+
+    django.setup()
+    logging.disable(logging.CRITICAL)
+
+    from datetime import timedelta
+
+    from django.conf import settings
+    from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+    from django.contrib.sessions.backends.db import SessionStore
+    from django.core.management import call_command
+    from django.utils import timezone
+
+    from library.models import Book, BorrowedBook, Member
+    from library.signals import bulk_created
+    from users.models import Librarian
+
+    call_command("migrate", verbosity=0)
+    rng = random.Random(0)
+    admin = Librarian.objects.create_user(email="load@example.com", password="password", first_name="Load")
+    books = Book.objects.bulk_create(
+        [
+            Book(title=f"{rng.choice(WORDS)} {rng.choice(WORDS)} {index}", author="Author", quantity=5, admin=admin)
+            for index in range(args.books)
+        ]
+    )
+    bulk_created.send(sender=Book, instances=books)
+    members = Member.objects.bulk_create(
+        [Member(name=f"Member {index}", email=f"member{index}@example.com", admin=admin) for index in range(args.books // 4)]
+    )
+    bulk_created.send(sender=Member, instances=members)
+    today = timezone.now().date()
+    loans = BorrowedBook.objects.bulk_create(
+        [
+            BorrowedBook(
+                member=rng.choice(members), book=rng.choice(books), return_date=today + timedelta(days=7), admin=admin
+            )
+            for _ in range(args.books // 2)
+        ]
+    )
+    bulk_created.send(sender=BorrowedBook, instances=loans)
+
+    session = SessionStore()
+    session[SESSION_KEY] = str(admin.pk)
+    session[BACKEND_SESSION_KEY] = "django.contrib.auth.backends.ModelBackend"
+    session[HASH_SESSION_KEY] = admin.get_session_auth_hash()
+    session.create()
+    return f"{settings.SESSION_COOKIE_NAME}={session.session_key}"
+
+
+async def fetch(port, path, cookie):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nCookie: {cookie}\r\nConnection: close\r\n\r\n".encode()
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return int(response.split(b" ", 2)[1])
+
+
+async def client(port, cookie, deadline, seed, latencies, failures):
+    rng = random.Random(seed)
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            status = await fetch(port, rng.choice(PAGES), cookie)
+        except (OSError, IndexError, ValueError):
+            status = None
+        if status == 200:
+            latencies.append(time.perf_counter() - started)
+        else:
+            failures.append(status)
+
+
+async def load(port, cookie, clients, duration):
+    latencies, failures = [], []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*[client(port, cookie, deadline, seed, latencies, failures) for seed in range(clients)])
+    return latencies, failures
+
+
+def wait_for_server(port, process, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("The server exited during startup.")
+        try:
+            asyncio.run(fetch(port, "/login/", ""))
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("The server did not start.")
+
+
+def run(profile, args, database, cookie, port):
+    environment = {**server_environment(args, database), "SERVER_PROFILE": profile, "WEB_CONCURRENCY": str(args.workers)}
+    process = subprocess.Popen(
+        ["gunicorn", "--bind", f"127.0.0.1:{port}", "--backlog", "4096"],
+        cwd=ROOT,
+        env=environment,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_server(port, process)
+        asyncio.run(load(port, cookie, args.clients, 2))  # Warm-up: templates, caches, connections
+        latencies, failures = asyncio.run(load(port, cookie, args.clients, args.duration))
+    finally:
+        process.terminate()
+        process.wait()
+
+    latencies.sort()
+
+    def percentile(fraction):
+        return latencies[min(int(len(latencies) * fraction), len(latencies) - 1)] * 1000 if latencies else 0
+
+    return {
+        "profile": profile,
+        "requests/s": len(latencies) / args.duration,
+        "p50 ms": percentile(0.50),
+        "p95 ms": percentile(0.95),
+        "p99 ms": percentile(0.99),
+        "errors": len(failures),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=int, default=20, help="Seconds of load per profile.")
+    parser.add_argument("--workers", type=int, default=2, help="Gunicorn worker processes.")
+    parser.add_argument("--books", type=int, default=2000)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--database-url", help="A scratch PostgreSQL database to use instead of SQLite.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "load.sqlite3")
+        cookie = prepare(args, database)
+        rows = [run(profile, args, database, cookie, args.port) for profile in ("wsgi", "asgi")]
+
+    print(f"{args.clients} concurrent clients, {args.workers} workers, {args.duration}s per profile")
+    print(f"{'profile':<9}{'requests/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for row in rows:
+        print(
+            f"{row['profile']:<9}{row['requests/s']:>12.1f}{row['p50 ms']:>10.1f}"
+            f"{row['p95 ms']:>10.1f}{row['p99 ms']:>10.1f}{row['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Multi-process stress test for book inventory.
+
+Usage:
+    python benchmarks/inventory_stress.py --workers 8 --operations 2000
+
+Several processes lend and return books concurrently against one throwaway SQLite database,
+using the same services as the views. Afterwards, for every book, the quantity on the shelf plus
+the copies still lent out must equal the initial stock and no quantity may be negative.
+Exits with status 1 if any book drifted.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import timedelta
+from pathlib import Path
+
+
+def setup_django(database):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    os.environ["DATABASE_NAME"] = database
+    os.environ.pop("DATABASE_URL", None)  # Always run against the throwaway SQLite file
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    os.environ.setdefault("LIBRARY_FULL_TEXT_SEARCH", "False")
+
+    import logging
+
+    import django
+
+    django.setup()
+    logging.disable(logging.CRITICAL)
+
+
+def populate(books, stock):
+    from library.models import Book, Member
+    from users.models import Librarian
+
+    admin = Librarian.objects.create_user(email="stress@example.com", password="password")
+    Member.objects.create(name="Stress Member", email="member@example.com", admin=admin)
+    Book.objects.bulk_create(
+        [
+            Book(title=f"Book {index}", author="Author", category="Other", quantity=stock, admin=admin)
+            for index in range(books)
+        ]
+    )
+
+
+def worker(database, operations, seed, results):
+    setup_django(database)
+
+    from django.db import OperationalError
+    from django.utils import timezone
+
+    from library.lending import LendingError, lend_books, return_book
+    from library.models import Book, BorrowedBook, Member
+
+    rng = random.Random(seed)
+    member = Member.objects.get()
+    admin = member.admin
+    book_ids = list(Book.objects.values_list("pk", flat=True))
+    return_date = timezone.now().date() + timedelta(days=7)
+    outcomes = Counter()
+
+    for _ in range(operations):
+        for attempt in range(20):
+            try:
+                if rng.random() < 0.55:
+                    selected = rng.sample(book_ids, rng.randint(1, min(3, len(book_ids))))
+                    lend_books(admin, member, selected, return_date, 0, "Cash")
+                    outcomes["lent"] += 1
+                else:
+                    loan = BorrowedBook.objects.filter(returned=False).order_by("?").first()
+                    if loan is None:
+                        outcomes["nothing_to_return"] += 1
+                    else:
+                        return_book(loan)
+                        outcomes["returned"] += 1
+                break
+            except LendingError as error:
+                outcomes["out_of_stock" if "stock" in str(error) else "already_returned"] += 1
+                break
+            except OperationalError:
+                outcomes["busy_retries"] += 1
+                time.sleep(rng.uniform(0.001, 0.01) * (attempt + 1))
+        else:
+            outcomes["gave_up"] += 1
+
+    results.put(dict(outcomes))
+
+
+def check_inventory(stock):
+    from django.db.models import Count, Q
+
+    from library.models import Book
+
+    drifted = []
+    books = Book.objects.annotate(lent=Count("borrowed_books", filter=Q(borrowed_books__returned=False)))
+    for book in books:
+        if book.quantity < 0 or book.quantity + book.lent != stock:
+            drifted.append(f"{book.title}: quantity={book.quantity} lent={book.lent} stock={stock}")
+    return drifted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--operations", type=int, default=2000, help="Operations per worker.")
+    parser.add_argument("--books", type=int, default=5)
+    parser.add_argument("--stock", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "inventory-stress.sqlite3")
+        setup_django(database)
+
+        from django.core.management import call_command
+        from django.db import connections
+
+        call_command("migrate", verbosity=0)
+        populate(args.books, args.stock)
+        connections.close_all()
+
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        started = time.perf_counter()
+        processes = [
+            context.Process(target=worker, args=(database, args.operations, seed, results))
+            for seed in range(args.workers)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+
+        outcomes = Counter()
+        while not results.empty():
+            outcomes.update(results.get())
+        crashed = [process.exitcode for process in processes if process.exitcode != 0]
+
+        drifted = check_inventory(args.stock)
+
+    print(f"{args.workers} workers x {args.operations} operations in {elapsed:.1f}s")
+    for outcome, count in sorted(outcomes.items()):
+        print(f"  {outcome:<18}{count:>8}")
+
+    if crashed:
+        print(f"{len(crashed)} worker(s) crashed with exit codes {crashed}.")
+        sys.exit(1)
+
+    if drifted:
+        print("Inventory drifted:")
+        for line in drifted:
+            print(f"  {line}")
+        sys.exit(1)
+
+    print("Inventory consistent.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+"""
+Load test of the library with a generated data set and a scripted librarian workload.
+
+Usage:
+    python benchmarks/load_test.py --librarians 4 --workers 4 --requests 500
+    python benchmarks/load_test.py --compare          # also show the change against the previous run
+
+A throwaway SQLite database (or a scratch PostgreSQL database with --database-url) is filled with
+`--librarians` libraries, each with its members, books and a loan history: loans are 14 days long and
+started up to 90 days ago, older loans are mostly returned, and the open loans past their return date
+are flagged overdue by the real sweep. Then `--workers` processes, each logged in as one librarian,
+run `--requests` requests of the workload below through the Django test client (the full request stack
+without the HTTP parsing), against the URL names of library/urls.py.
+
+For every scenario the p50/p95/p99 latency and the number of SQL queries per request are reported.
+Each run is appended to benchmarks/results/load_test.jsonl with the commit it ran on, so a regression
+shows up as a change between consecutive runs with the same parameters (--compare prints it).
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS = Path(__file__).resolve().parent / "results" / "load_test.jsonl"
+
+WORDS = (
+    "python django rust history science story database network algorithm design pattern garden ocean "
+    "mountain river kingdom empire machine learning vision sound light shadow winter summer spring autumn"
+).split()
+
+# scenario: relative weight in the workload
+WORKLOAD = {
+    "dashboard": 20,
+    "browse": 25,
+    "search": 20,
+    "lend": 15,
+    "return": 12,
+    "pay_fine": 8,
+}
+
+LIST_PAGES = ["books", "members", "lent-books", "overdue-books", "payments"]
+
+LOAN_DAYS = 14
+
+
+def setup_django(args, database):
+    sys.path.insert(0, str(ROOT))
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        os.environ.pop("DATABASE_URL", None)
+        os.environ["DATABASE_NAME"] = database
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+    import logging
+
+    import django
+
+    django.setup()
+    logging.disable(logging.CRITICAL)
+
+
+def generate(args):
+    """
+    Creates the librarians and their libraries. Returns the librarian ids.
+    """
+    from django.utils import timezone
+
+    from library.models import CATEGORY_CHOICES, Book, BorrowedBook, Member, Transaction
+    from library.overdue import sweep_overdue
+    from library.signals import bulk_created
+    from library.stats import rebuild_library_stats
+    from users.models import Librarian
+
+    rng = random.Random(args.seed)
+    today = timezone.now().date()
+    categories = [choice for choice, _ in CATEGORY_CHOICES]
+    librarian_ids = []
+
+    for index in range(args.librarians):
+        admin = Librarian.objects.create_user(email=f"librarian{index}@example.com", password="password")
+        librarian_ids.append(admin.pk)
+
+        members = Member.objects.bulk_create(
+            [
+                Member(name=f"{rng.choice(WORDS).title()} {number}", email=f"m{index}-{number}@example.com", admin=admin)
+                for number in range(args.members)
+            ]
+        )
+        books = Book.objects.bulk_create(
+            [
+                Book(
+                    title=" ".join(rng.sample(WORDS, 3)).title(),
+                    author=f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()}",
+                    category=rng.choice(categories),
+                    quantity=rng.randint(1, 8),
+                    borrowing_fee=rng.choice([1, 2, 5, 10]),
+                    admin=admin,
+                )
+                for _ in range(args.books)
+            ]
+        )
+
+        loans = []
+        for _ in range(args.loans):
+            started = rng.randint(0, 90)
+            due = today - timedelta(days=started) + timedelta(days=LOAN_DAYS)
+            # Most loans come back around their return date; a few are kept well past it
+            returned = rng.random() < (0.9 if started > LOAN_DAYS + 7 else 0.5 if started > LOAN_DAYS else 0.3)
+            loans.append(
+                BorrowedBook(
+                    member=rng.choice(members),
+                    book=rng.choice(books),
+                    return_date=due,
+                    returned=returned,
+                    fine=rng.choice([0, 5, 10, 20]),
+                    admin=admin,
+                )
+            )
+        loans = BorrowedBook.objects.bulk_create(loans)
+        payments = Transaction.objects.bulk_create(
+            [
+                Transaction(member=loan.member, amount=loan.book.borrowing_fee, payment_method="Cash", admin=admin)
+                for loan in loans
+            ]
+        )
+
+        for model, instances in ((Member, members), (Book, books), (BorrowedBook, loans), (Transaction, payments)):
+            bulk_created.send(sender=model, instances=instances)
+        rebuild_library_stats(admin)
+
+    sweep_overdue(today)
+    return librarian_ids
+
+
+def git_commit():
+    def git(*command):
+        return subprocess.run(["git", *command], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+
+    return git("rev-parse", "--short", "HEAD") or "unknown", bool(git("status", "--porcelain", "--untracked-files=no"))
+
+
+class Workload:
+    """
+    The requests of one librarian. Candidates for each scenario (loans to return, books in stock)
+    are looked up before the request starts, so only the request itself is timed and counted.
+    """
+
+    def __init__(self, admin, rng):
+        from django.test import Client
+
+        from library.models import Member
+
+        self.admin = admin
+        self.rng = rng
+        self.client = Client()
+        self.client.force_login(admin)
+        self.member_ids = list(Member.objects.filter(admin=admin).values_list("pk", flat=True))
+
+    def dashboard(self):
+        from django.urls import reverse
+
+        return self.client.get(reverse("home"))
+
+    def browse(self):
+        from django.urls import reverse
+
+        return self.client.get(reverse(self.rng.choice(LIST_PAGES)))
+
+    def search(self):
+        from django.urls import reverse
+
+        return self.client.post(reverse(self.rng.choice(["books", "members"])), {"query": self.rng.choice(WORDS)[:4]})
+
+    def lend(self):
+        from django.urls import reverse
+        from django.utils import timezone
+
+        from library.models import Book
+
+        book_ids = list(Book.objects.filter(admin=self.admin, quantity__gt=0).values_list("pk", flat=True)[:200])
+        data = {
+            "book": self.rng.sample(book_ids, min(len(book_ids), self.rng.randint(1, 3))),
+            "return_date": (timezone.now().date() + timedelta(days=LOAN_DAYS)).isoformat(),
+            "fine": 10,
+            "payment_method": "Cash",
+        }
+        return lambda: self.client.post(
+            reverse("lend-member-book", kwargs={"pk": self.rng.choice(self.member_ids)}), data
+        )
+
+    def _open_loan(self, overdue):
+        from library.models import BorrowedBook
+
+        loans = BorrowedBook.objects.filter(admin=self.admin, returned=False, is_overdue=overdue)
+        return loans.values_list("pk", flat=True).order_by("?").first()
+
+    def return_(self):
+        from django.urls import reverse
+
+        loan = self._open_loan(overdue=False)
+        return loan and (lambda: self.client.get(reverse("return-book", kwargs={"pk": loan})))
+
+    def pay_fine(self):
+        from django.urls import reverse
+
+        loan = self._open_loan(overdue=True)
+        return loan and (
+            lambda: self.client.post(reverse("return-book-fine", kwargs={"pk": loan}), {"payment_method": "Cash"})
+        )
+
+    def prepare(self, scenario):
+        """
+        Returns a callable running one request of `scenario`, or None if there is nothing to do.
+        """
+        if scenario == "lend":
+            return self.lend()
+        if scenario == "return":
+            return self.return_()
+        if scenario == "pay_fine":
+            return self.pay_fine()
+        return getattr(self, scenario)
+
+
+def worker(args, database, admin_id, seed, results):
+    setup_django(args, database)
+
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext, setup_test_environment
+
+    from users.models import Librarian
+
+    setup_test_environment()  # Allows the test client's "testserver" host
+    rng = random.Random(seed)
+    workload = Workload(Librarian.objects.get(pk=admin_id), rng)
+    scenarios, weights = zip(*WORKLOAD.items())
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    started = time.perf_counter()
+
+    for _ in range(args.requests):
+        scenario = rng.choices(scenarios, weights)[0]
+        request = workload.prepare(scenario)
+        if not request:
+            continue
+        with CaptureQueriesContext(connection) as queries:
+            begin = time.perf_counter()
+            try:
+                response = request()
+                failed = response.status_code >= 400
+            except Exception:
+                failed = True
+            elapsed = time.perf_counter() - begin
+        if failed:
+            errors[scenario] += 1
+        else:
+            samples[scenario].append((elapsed, len(queries)))
+
+    results.put((dict(samples), dict(errors), time.perf_counter() - started))
+
+
+def prepare(args, database, ids):
+    setup_django(args, database)
+
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+    ids.extend(generate(args))
+
+
+def percentile(values, fraction):
+    return values[min(int(len(values) * fraction), len(values) - 1)] if values else 0
+
+
+def summarize(samples, errors):
+    scenarios = {}
+    for scenario in WORKLOAD:
+        timings = sorted(elapsed for elapsed, _ in samples.get(scenario, []))
+        queries = [count for _, count in samples.get(scenario, [])]
+        scenarios[scenario] = {
+            "requests": len(timings),
+            "errors": errors.get(scenario, 0),
+            "p50_ms": round(percentile(timings, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(timings, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(timings, 0.99) * 1000, 2),
+            "queries": round(sum(queries) / len(queries), 1) if queries else 0,
+        }
+    return scenarios
+
+
+def previous_run(parameters):
+    if not RESULTS.exists():
+        return None
+    runs = [json.loads(line) for line in RESULTS.read_text().splitlines() if line.strip()]
+    matching = [run for run in runs if run["parameters"] == parameters]
+    return matching[-1] if matching else None
+
+
+def report(run, previous):
+    print(f"commit {run['commit']}{' (uncommitted changes)' if run['dirty'] else ''}: "
+          f"{run['requests_per_second']:.1f} requests/s, {run['lends_per_second']:.1f} lends/s")
+    header = f"{'scenario':<11}{'requests':>9}{'errors':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}"
+    if previous:
+        header += f"{'p95 vs ' + previous['commit']:>18}"
+    print(header)
+    for scenario, row in run["scenarios"].items():
+        line = (
+            f"{scenario:<11}{row['requests']:>9}{row['errors']:>7}{row['p50_ms']:>9.1f}"
+            f"{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['queries']:>9.1f}"
+        )
+        before = previous and previous["scenarios"].get(scenario)
+        if before and before["p95_ms"]:
+            line += f"{(row['p95_ms'] / before['p95_ms'] - 1) * 100:>+17.0f}%"
+            if row["queries"] != before["queries"]:
+                line += f"  queries {before['queries']:g} -> {row['queries']:g}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--librarians", type=int, default=4)
+    parser.add_argument("--members", type=int, default=500, help="Members per librarian.")
+    parser.add_argument("--books", type=int, default=2000, help="Books per librarian.")
+    parser.add_argument("--loans", type=int, default=5000, help="Loans per librarian.")
+    parser.add_argument("--workers", type=int, default=4, help="Processes, each acting as one librarian.")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per worker.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url", help="A scratch PostgreSQL database to use instead of SQLite.")
+    parser.add_argument("--compare", action="store_true", help="Compare with the previous run with the same parameters.")
+    parser.add_argument("--no-save", action="store_true", help=f"Do not append the run to {RESULTS.name}.")
+    args = parser.parse_args()
+    if args.workers > args.librarians:
+        parser.error("--workers cannot exceed --librarians: each worker acts as its own librarian.")
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "load-test.sqlite3")
+        context = multiprocessing.get_context("spawn")
+        with context.Manager() as manager:
+            ids = manager.list()
+            setup = context.Process(target=prepare, args=(args, database, ids))
+            setup.start()
+            setup.join()
+            librarian_ids = list(ids)
+
+        results = context.Queue()
+        processes = [
+            context.Process(target=worker, args=(args, database, librarian_ids[index], args.seed + index, results))
+            for index in range(args.workers)
+        ]
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+        collected = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+
+    samples, errors = defaultdict(list), defaultdict(int)
+    for worker_samples, worker_errors, _ in collected:
+        for scenario, values in worker_samples.items():
+            samples[scenario].extend(values)
+        for scenario, count in worker_errors.items():
+            errors[scenario] += count
+
+    parameters = {
+        name: getattr(args, name)
+        for name in ("librarians", "members", "books", "loans", "workers", "requests", "seed")
+    }
+    parameters["database"] = "postgresql" if args.database_url else "sqlite"
+    commit, dirty = git_commit()
+    scenarios = summarize(samples, errors)
+    run = {
+        "commit": commit,
+        "dirty": dirty,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "parameters": parameters,
+        "requests_per_second": round(sum(row["requests"] for row in scenarios.values()) / elapsed, 1),
+        "lends_per_second": round(scenarios["lend"]["requests"] / elapsed, 1),
+        "scenarios": scenarios,
+    }
+
+    report(run, previous_run(parameters) if args.compare else None)
+    if not args.no_save:
+        RESULTS.parent.mkdir(exist_ok=True)
+        with RESULTS.open("a") as results_file:
+            results_file.write(json.dumps(run) + "\n")
+
+
+if __name__ == "__main__":
+    main()
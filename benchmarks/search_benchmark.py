@@ -0,0 +1,141 @@
+"""
+Compares the full-text search index with LIKE filters finding the same books.
+
+Usage:
+    python benchmarks/search_benchmark.py --rows 1000000
+
+A throwaway SQLite database is created in a temporary directory, filled with `--rows` books for
+one librarian, and each search term is run `--repeat` times through both paths. Both load one page
+of a list view (LIBRARY_PAGE_SIZE books, plus one to know whether there is a next page) with the same
+matching: every word of the term must start a word of the title or the author, as the FTS5 prefix
+terms of library.search do. The FTS5 side is search.search_page itself, best match first; the LIKE
+side matches "word%" or "% word%" per word, newest first. The number of matching books of each path
+is printed to show that they agree.
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+WORDS = (
+    "python django rust history science story database network algorithm design pattern garden ocean "
+    "mountain river kingdom empire machine learning vision sound light shadow winter summer spring autumn"
+).split()
+
+# One book in RARE_EVERY is by RARE_AUTHOR, for a selective search like that of a surname.
+RARE_AUTHOR = "Luciano Ramalho"
+RARE_EVERY = 10_000
+
+SEARCH_TERMS = ["pyth", "garden ocean", "empire", "ramalho", "zzz-no-match"]
+
+
+def setup_django(database):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    os.environ["DATABASE_NAME"] = database
+    os.environ.pop("DATABASE_URL", None)  # Always run against the throwaway SQLite file
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+    import django
+
+    django.setup()
+
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+
+def populate(rows):
+    from django.db import connection, transaction
+
+    from library.search import rebuild_search_index
+    from users.models import Librarian
+
+    admin = Librarian.objects.create_user(email="bench@example.com", password="password")
+    rng = random.Random(42)
+    batch_size = 50_000
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, rows, batch_size):
+            batch = []
+            for index in range(start, start + min(batch_size, rows - start)):
+                title = " ".join(rng.choices(WORDS, k=4)).title()
+                author = " ".join(rng.choices(WORDS, k=2)).title() if index % RARE_EVERY else RARE_AUTHOR
+                batch.append((admin.pk, title, author, "Other", 1, 1, "available"))
+            cursor.executemany(
+                "INSERT INTO library_book (admin_id, title, author, category, quantity, borrowing_fee, status, "
+                "created_at, updated_at) VALUES (%s, %s, %s, %s, %s, %s, %s, datetime('now'), datetime('now'))",
+                batch,
+            )
+        started = time.perf_counter()
+        rebuild_search_index()
+        print(f"Indexed {rows} books in {time.perf_counter() - started:.2f}s")
+
+    return admin
+
+
+def word_prefix_filter(term):
+    """
+    The LIKE conditions equivalent to the FTS5 query of `term`: each word starts a word of the title or author.
+    """
+    from django.db.models import Q
+
+    condition = Q()
+    for word in re.findall(r"\w+", term):
+        condition &= (
+            Q(title__istartswith=word)
+            | Q(title__icontains=f" {word}")
+            | Q(author__istartswith=word)
+            | Q(author__icontains=f" {word}")
+        )
+    return condition
+
+
+def timed(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(os.path.join(directory, "search-benchmark.sqlite3"))
+
+        from django.conf import settings
+
+        from library.models import Book
+        from library.search import SEARCH_CANDIDATES, ranked_ids, search_page
+
+        admin = populate(args.rows)
+        books = Book.objects.filter(admin=admin)
+        page_size = settings.LIBRARY_PAGE_SIZE
+
+        print(f"{'query':<16}{'matches':>10}{'LIKE (ms)':>12}{'FTS5 (ms)':>12}{'speed-up':>10}")
+        for term in SEARCH_TERMS:
+            condition = word_prefix_filter(term)
+            like_matches = books.filter(condition).count()
+            fts_matches = len(ranked_ids(Book, admin, term, limit=args.rows + SEARCH_CANDIDATES))
+            if like_matches != fts_matches:
+                raise SystemExit(f"{term!r}: LIKE matches {like_matches} books, FTS5 {fts_matches}")
+
+            like = timed(
+                lambda: list(books.filter(condition).order_by("-created_at", "-pk")[: page_size + 1]), args.repeat
+            )
+            fts = timed(lambda: list(search_page(books, term, ["title", "author"], admin)), args.repeat)
+            print(f"{term:<16}{like_matches:>10}{like:>12.1f}{fts:>12.1f}{like / fts:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Lend/return throughput of SQLite with and without the tuned connection setup (SQLITE_TUNING).
+
+Usage:
+    python benchmarks/sqlite_tuning.py --workers 4 --operations 300
+
+For each mode a throwaway database is created and several worker processes, standing in for gunicorn
+workers (one process and one connection each), drive the real lend and return views through the
+Django test client: the full request stack, sessions and transactions, without the HTTP parsing.
+Requests failing with "database is locked" are counted, not retried, as a user would see them.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import timedelta
+from pathlib import Path
+
+
+def setup_django(database, tuning):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    os.environ["DATABASE_NAME"] = database
+    os.environ.pop("DATABASE_URL", None)  # Always run against the throwaway SQLite file
+    os.environ["SQLITE_TUNING"] = str(tuning)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+    import logging
+
+    import django
+
+    django.setup()
+    logging.disable(logging.CRITICAL)
+
+
+def populate(books, stock):
+    from library.models import Book, Member
+    from users.models import Librarian
+
+    admin = Librarian.objects.create_user(email="bench@example.com", password="password")
+    Member.objects.create(name="Bench Member", email="member@example.com", admin=admin)
+    Book.objects.bulk_create(
+        [
+            Book(title=f"Book {index}", author="Author", category="Other", quantity=stock, admin=admin)
+            for index in range(books)
+        ]
+    )
+
+
+def worker(database, tuning, operations, seed, results):
+    setup_django(database, tuning)
+
+    from django.db import OperationalError
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+    from django.urls import reverse
+    from django.utils import timezone
+
+    from library.models import Book, BorrowedBook, Member
+
+    setup_test_environment()  # Allows the test client's "testserver" host
+    rng = random.Random(seed)
+    member = Member.objects.get()
+    book_ids = list(Book.objects.values_list("pk", flat=True))
+    client = Client()
+    client.force_login(member.admin)
+    lend_data = {
+        "return_date": (timezone.now().date() + timedelta(days=7)).isoformat(),
+        "fine": 0,
+        "payment_method": "Cash",
+    }
+    outcomes = Counter()
+    latencies = []
+
+    for _ in range(operations):
+        started = time.perf_counter()
+        try:
+            if rng.random() < 0.55:
+                client.post(
+                    reverse("lend-member-book", kwargs={"pk": member.pk}), {**lend_data, "book": rng.choice(book_ids)}
+                )
+                outcomes["lent"] += 1
+            else:
+                loan = BorrowedBook.objects.filter(returned=False).values_list("pk", flat=True).last()
+                if loan is None:
+                    continue
+                client.get(reverse("return-book", kwargs={"pk": loan}))
+                outcomes["returned"] += 1
+        except OperationalError:
+            outcomes["locked_errors"] += 1
+        latencies.append(time.perf_counter() - started)
+
+    results.put((dict(outcomes), latencies))
+
+
+def prepare(database, tuning, books, stock):
+    setup_django(database, tuning)
+
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+    populate(books, stock)
+
+
+def run(mode, tuning, args):
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, f"sqlite-{mode}.sqlite3")
+        context = multiprocessing.get_context("spawn")
+        setup = context.Process(target=prepare, args=(database, tuning, args.books, args.stock))
+        setup.start()
+        setup.join()
+
+        results = context.Queue()
+        processes = [
+            context.Process(target=worker, args=(database, tuning, args.operations, seed, results))
+            for seed in range(args.workers)
+        ]
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+        collected = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+
+    outcomes = Counter()
+    latencies = []
+    for worker_outcomes, worker_latencies in collected:
+        outcomes.update(worker_outcomes)
+        latencies.extend(worker_latencies)
+    latencies.sort()
+    done = outcomes["lent"] + outcomes["returned"]
+    return {
+        "mode": mode,
+        "requests/s": done / elapsed,
+        "p50 ms": latencies[len(latencies) // 2] * 1000 if latencies else 0,
+        "p95 ms": latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0,
+        "locked": outcomes["locked_errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--operations", type=int, default=300, help="Requests per worker.")
+    parser.add_argument("--books", type=int, default=20)
+    parser.add_argument("--stock", type=int, default=100000)
+    args = parser.parse_args()
+
+    rows = [run("default", False, args), run("tuned", True, args)]
+
+    print(f"{args.workers} workers x {args.operations} lend/return requests")
+    print(f"{'mode':<10}{'requests/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'locked':>8}")
+    for row in rows:
+        print(
+            f"{row['mode']:<10}{row['requests/s']:>12.1f}{row['p50 ms']:>10.1f}{row['p95 ms']:>10.1f}{row['locked']:>8}"
+        )
+    print(f"Speed-up: {rows[1]['requests/s'] / rows[0]['requests/s']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Render time of the books list (books/list-books.html) with and without the cached template loader
+and the row fragment cache.
+
+Usage:
+    python benchmarks/template_render.py --rows 10000 --repeat 5
+
+The page is rendered from unsaved Book instances, so no database is needed: only template
+loading and rendering is measured. "cold" renders right after the books changed (every row is
+rendered and stored), "warm" renders the same rows again (every row comes from the fragment cache).
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+CACHED_LOADERS = [("django.template.loaders.cached.Loader", LOADERS)]
+
+
+def setup_django():
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+    import django
+
+    django.setup()
+
+
+def templates_setting(loaders):
+    from django.conf import settings
+
+    return [{**settings.TEMPLATES[0], "OPTIONS": {**settings.TEMPLATES[0]["OPTIONS"], "loaders": loaders}}]
+
+
+def caches_setting(fragments):
+    from django.conf import settings
+
+    backend = "locmem.LocMemCache" if fragments else "dummy.DummyCache"
+    return {
+        **settings.CACHES,
+        "template_fragments": {
+            "BACKEND": f"django.core.cache.backends.{backend}",
+            "LOCATION": "benchmark",
+            "OPTIONS": {"MAX_ENTRIES": 1000000},
+        },
+    }
+
+
+def build_request():
+    from django.test import RequestFactory
+
+    from users.models import Librarian
+
+    request = RequestFactory().get("/books/")
+    request.user = Librarian(pk=1, email="bench@example.com", first_name="Bench", last_name="Librarian")
+    return request
+
+
+def build_books(rows):
+    from library.models import Book
+
+    return [
+        Book(
+            pk=index,
+            title=f"Book {index}",
+            author=f"Author {index % 97}",
+            category="Programming",
+            quantity=index % 5,
+            borrowing_fee=Decimal("1.50"),
+            status="available" if index % 5 else "not available",
+            admin_id=1,
+        )
+        for index in range(1, rows + 1)
+    ]
+
+
+def measure(render, repeat, before=None):
+    timings = []
+    for _ in range(repeat):
+        if before:
+            before()
+        started = time.perf_counter()
+        render()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.template.loader import render_to_string
+    from django.test.utils import override_settings
+
+    from library.cache import bump_generation
+    from library.models import Book
+
+    request = build_request()
+    context = {"books": build_books(args.rows), "query": "", "page": None}
+
+    def render():
+        return render_to_string("books/list-books.html", context, request=request)
+
+    def books_changed():
+        bump_generation(request.user.pk, Book)
+
+    modes = [
+        ("plain loaders", LOADERS, False, None),
+        ("cached loader", CACHED_LOADERS, False, None),
+        ("fragments, cold", CACHED_LOADERS, True, books_changed),
+        ("fragments, warm", CACHED_LOADERS, True, None),
+    ]
+    rows = []
+    for name, loaders, fragments, before in modes:
+        with override_settings(TEMPLATES=templates_setting(loaders), CACHES=caches_setting(fragments)):
+            render()  # Warm-up: compiles the templates and, for the warm mode, fills the fragment cache
+            rows.append((name, measure(render, args.repeat, before)))
+
+    print(f"list-books.html with {args.rows} rows, median of {args.repeat} renders")
+    print(f"{'mode':<18}{'ms':>10}")
+    for name, milliseconds in rows:
+        print(f"{name:<18}{milliseconds:>10.1f}")
+    print(f"Warm fragments vs plain loaders: {rows[0][1] / rows[-1][1]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Time to first response of gunicorn workers, with the application loaded in each worker
+(PRELOAD_APP=False) and loaded once in the master before forking (PRELOAD_APP=True, the default).
+
+Usage:
+    python benchmarks/worker_boot.py --repeat 5
+
+For each mode, gunicorn is started with one sync worker on a local port and two times are taken:
+    - cold start: from launching gunicorn to the first answered request,
+    - worker restart: from killing the worker to the first request answered by its replacement,
+      which is what a crashed, recycled (max_requests) or newly added worker costs.
+The request is GET /login/, which goes through the middleware, a view and a template.
+Medians of --repeat runs are printed. Run `python manage.py import_profile` to see where the time goes.
+"""
+import argparse
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def first_response(port, timeout=30):
+    """
+    Requests /login/ until it is answered; returns when a response arrives.
+    """
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=timeout) as connection:
+                connection.sendall(b"GET /login/ HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n")
+                if connection.recv(12).startswith(b"HTTP/1.1 200"):
+                    return
+        except OSError:
+            pass
+        time.sleep(0.005)
+    raise RuntimeError("The server did not answer.")
+
+
+def worker_pid(master):
+    output = subprocess.run(["pgrep", "-P", str(master.pid)], capture_output=True, text=True).stdout.split()
+    if len(output) != 1:
+        raise RuntimeError(f"Expected one worker, found {len(output)}.")
+    return int(output[0])
+
+
+def measure(preload, environment, port):
+    started = time.perf_counter()
+    master = subprocess.Popen(
+        ["gunicorn", "--bind", f"127.0.0.1:{port}", "--workers", "1"],
+        cwd=ROOT,
+        env={**environment, "PRELOAD_APP": str(preload)},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        first_response(port)
+        cold_start = time.perf_counter() - started
+
+        killed = time.perf_counter()
+        os.kill(worker_pid(master), signal.SIGKILL)
+        first_response(port)
+        restart = time.perf_counter() - killed
+    finally:
+        master.terminate()
+        master.wait()
+    return cold_start, restart
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        environment = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": "core.settings",
+            "DEBUG": "False",
+            "DATABASE_NAME": os.path.join(directory, "boot.sqlite3"),
+            "SERVER_PROFILE": "wsgi",
+        }
+        environment.pop("DATABASE_URL", None)
+        subprocess.run([sys.executable, "manage.py", "migrate", "--verbosity", "0"], cwd=ROOT, env=environment, check=True)
+
+        rows = []
+        for preload in (False, True):
+            runs = [measure(preload, environment, args.port) for _ in range(args.repeat)]
+            rows.append((preload, statistics.median(run[0] for run in runs), statistics.median(run[1] for run in runs)))
+
+    print(f"median of {args.repeat} runs, one sync worker")
+    print(f"{'PRELOAD_APP':<13}{'cold start ms':>15}{'worker restart ms':>19}")
+    for preload, cold_start, restart in rows:
+        print(f"{str(preload):<13}{cold_start * 1000:>15.0f}{restart * 1000:>19.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,19 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+from core.boot import warm_up
+
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+os.environ.setdefault("SERVER_PROFILE", "asgi")  # Async views and, on PostgreSQL, the connection pool
+
+
+def create_application():
+    """
+    Builds the ASGI application and warms it up, like core.wsgi.create_application.
+    """
+    application = get_asgi_application()
+    warm_up()
+    return application
+
 
-application = get_asgi_application()
+application = create_application()
@@ -0,0 +1,36 @@
+"""
+Work done once when a server process starts, see core.wsgi and core.asgi.
+"""
+from pathlib import Path
+
+from django.core.cache import caches
+from django.db import connections
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.urls import get_resolver
+
+
+def project_templates(engine):
+    for directory in map(Path, engine.dirs):
+        for path in sorted(directory.rglob("*.html")):
+            yield path.relative_to(directory).as_posix()
+
+
+def warm_up():
+    """
+    Loads what every worker would otherwise load on its first requests: the URLconf, with the views,
+    forms and models it imports, and the project templates when the cached loader keeps them compiled.
+    Run in the gunicorn master with preload_app, it is done once and shared by the forked workers.
+    Database and cache connections opened on the way are closed, so workers never share one.
+    """
+    get_resolver().url_patterns
+
+    for backend in engines.all():
+        engine = getattr(backend, "engine", None)  # Django template engines only
+        if engine is not None and any(isinstance(loader, CachedLoader) for loader in engine.template_loaders):
+            for name in project_templates(engine):
+                engine.get_template(name)
+
+    connections.close_all()
+    for cache in caches.all(initialized_only=True):
+        cache.close()
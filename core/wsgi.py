@@ -11,6 +11,19 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from core.boot import warm_up
+
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
-application = get_wsgi_application()
+
+def create_application():
+    """
+    Builds the WSGI application and warms it up (see core.boot.warm_up). Safe to call before
+    forking: `gunicorn --preload` (preload_app in gunicorn.conf.py) does it once in the master.
+    """
+    application = get_wsgi_application()
+    warm_up()
+    return application
+
+
+application = create_application()
@@ -0,0 +1,33 @@
+"""
+Gunicorn settings, loaded automatically by `gunicorn` from the project directory.
+
+SERVER_PROFILE selects how the application is served:
+    - "wsgi" (default): sync workers running core.wsgi, one request at a time per worker,
+    - "asgi": uvicorn workers running core.asgi, where the async views (dashboard and lists)
+      wait for the database without blocking the worker.
+WEB_CONCURRENCY sets the number of worker processes (2 by default).
+
+The workers save their request metrics in LIBRARY_METRICS_DIR every LIBRARY_METRICS_SAVE_INTERVAL
+seconds, a new temporary directory for each run of the server unless it is set, so that any worker
+can serve the metrics of all of them.
+
+The application is loaded and warmed up once in the master, before the workers are forked
+(preload_app, see core.wsgi.create_application): a new or restarted worker answers right away
+instead of importing Django and the project first. PRELOAD_APP=False loads it in each worker.
+"""
+import os
+import tempfile
+
+os.environ.setdefault("LIBRARY_METRICS_DIR", tempfile.mkdtemp(prefix="library-metrics-"))
+
+SERVER_PROFILE = os.environ.get("SERVER_PROFILE", "wsgi")
+
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+
+preload_app = os.environ.get("PRELOAD_APP", "True").lower() in ("true", "1", "yes")
+
+if SERVER_PROFILE == "asgi":
+    wsgi_app = "core.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "core.wsgi:application"
@@ -0,0 +1,325 @@
+import hashlib
+import json
+import logging
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from django.views.generic import View
+
+from users.models import Librarian
+
+from .export import EXPORTS, export_header
+from .forms import ApiLendForm
+from .lending import LendingError, lend_books, return_book
+from .models import PAYMENT_METHOD_CHOICES, Book, BorrowedBook, Member, Transaction
+from .pagination import paginate
+
+logger = logging.getLogger(__name__)
+
+API_MAX_PAGE_SIZE = 500
+
+# Upper bound on the loans returned by one batch request.
+API_MAX_BATCH = 100
+
+# kind: models whose rows appear in the resource. Its ETag changes whenever one of them changes.
+API_RESOURCES = {
+    "books": (Book,),
+    "members": (Member,),
+    "loans": (BorrowedBook, Book, Member),
+    "payments": (Transaction, Member),
+}
+
+# kind: {query parameter: lookup} filters accepted by the collection endpoints
+API_FILTERS = {
+    "loans": {"member": "member_id", "returned": "returned", "overdue": "is_overdue"},
+    "payments": {"member": "member_id"},
+}
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def api_fields(kind):
+    """
+    Returns {name: lookup} for the fields of a resource. They are the columns of the exports,
+    related fields named with an underscore (e.g. "member_name" for member__name).
+    """
+    return dict(zip(export_header(kind), EXPORTS[kind][1]))
+
+
+def api_login_required(view):
+    """
+    Like login_required, but answers 401 with a JSON body instead of redirecting to the login page.
+    """
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({"error": "Authentication required."}, status=401)
+        return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def api_view(view):
+    """
+    Turns ApiError raised by a view into a JSON error response.
+    """
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse({"error": str(error)}, status=error.status)
+
+    return wrapper
+
+
+def rows_version(admin, models):
+    """
+    Returns the count, latest updated_at and highest id of the librarian's rows of each model, read
+    with one query. Any insert, update or delete of those rows changes one of them.
+    """
+    versions = {}
+    for model in models:
+        rows = model.objects.filter(admin=OuterRef("pk")).order_by().values("admin")
+        name = model._meta.model_name
+        for key, aggregate in (("count", Count("pk")), ("updated", Max("updated_at")), ("last", Max("pk"))):
+            versions[f"{name}_{key}"] = Subquery(rows.annotate(value=aggregate).values("value"))
+    return Librarian.objects.filter(pk=admin.pk).values(**versions).get()
+
+
+def resource_etag(request, *args, **kwargs):
+    """
+    ETag of a collection or item: a digest of the version of the librarian's rows behind it (see rows_version).
+    It is read from the database, which every worker shares, so a matching If-None-Match gets a 304
+    after a single aggregate query.
+    """
+    models = API_RESOURCES.get(kwargs["kind"])
+    if models is None:
+        return None
+    version = rows_version(request.user, models)
+    return hashlib.sha1(json.dumps(version, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def selected_fields(kind, fields_param):
+    fields = api_fields(kind)
+    if not fields_param:
+        return fields
+
+    names = [name.strip() for name in fields_param.split(",") if name.strip()]
+    unknown = [name for name in names if name not in fields]
+    if unknown:
+        raise ApiError(f"Unknown fields: {', '.join(unknown)}.")
+    return {name: fields[name] for name in names}
+
+
+def page_size(limit_param):
+    if not limit_param:
+        return settings.LIBRARY_PAGE_SIZE
+    try:
+        limit = int(limit_param)
+    except ValueError:
+        raise ApiError("limit must be a number.")
+    if not 1 <= limit <= API_MAX_PAGE_SIZE:
+        raise ApiError(f"limit must be between 1 and {API_MAX_PAGE_SIZE}.")
+    return limit
+
+
+def filter_value(value):
+    if value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    try:
+        return int(value)
+    except ValueError:
+        raise ApiError(f"Invalid filter value: {value}.")
+
+
+def resource_rows(kind, admin, fields, params):
+    """
+    Returns the librarian's rows of a resource as a values() queryset of the selected fields,
+    plus "id" and "created_at" which the cursor needs.
+    """
+    model = EXPORTS[kind][0]
+    queryset = model.objects.filter(admin=admin)
+    for param, lookup in API_FILTERS.get(kind, {}).items():
+        if param in params:
+            queryset = queryset.filter(**{lookup: filter_value(params[param])})
+    return queryset.values(*dict.fromkeys(["id", "created_at", *fields.values()]))
+
+
+def serialize(row, fields):
+    return {name: row[lookup] for name, lookup in fields.items()}
+
+
+def json_body(request):
+    try:
+        body = json.loads(request.body)
+    except ValueError:
+        raise ApiError("The request body must be JSON.")
+    if not isinstance(body, dict):
+        raise ApiError("The request body must be a JSON object.")
+    return body
+
+
+def no_cache(response):
+    # Clients may keep the response but must revalidate it (with If-None-Match) before using it
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@method_decorator(api_login_required, name="dispatch")
+@method_decorator(api_view, name="dispatch")
+@method_decorator(condition(etag_func=resource_etag), name="get")
+class ApiListView(View):
+    """
+    Collection endpoint of the JSON API: /api/v1/<books|members|loans|payments>/
+    get(): Returns a page of the librarian's rows, newest first:
+           {"results": [...], "next": cursor or null, "previous": cursor or null}
+           Query parameters:
+            - fields: comma-separated fields to return (all by default),
+            - cursor: a "next" or "previous" value of an earlier page,
+            - limit: page size (LIBRARY_PAGE_SIZE by default, at most API_MAX_PAGE_SIZE),
+            - member, returned, overdue: filters, see API_FILTERS.
+           Rows are read with values(), without building model instances.
+    """
+
+    def get(self, request, *args, **kwargs):
+        kind = kwargs["kind"]
+        if kind not in API_RESOURCES:
+            raise ApiError("Unknown resource.", status=404)
+
+        fields = selected_fields(kind, request.GET.get("fields"))
+        page = paginate(
+            resource_rows(kind, request.user, fields, request.GET),
+            request.GET.get("cursor"),
+            page_size(request.GET.get("limit")),
+        )
+        return no_cache(
+            JsonResponse(
+                {
+                    "results": [serialize(row, fields) for row in page],
+                    "next": page.next_cursor,
+                    "previous": page.previous_cursor,
+                }
+            )
+        )
+
+
+@method_decorator(api_login_required, name="dispatch")
+@method_decorator(api_view, name="dispatch")
+@method_decorator(condition(etag_func=resource_etag), name="get")
+class ApiDetailView(View):
+    """
+    Item endpoint of the JSON API: /api/v1/<books|members|loans|payments>/<id>/
+    get(): Returns one row of the librarian, with the same "fields" parameter as the collection.
+    """
+
+    def get(self, request, *args, **kwargs):
+        kind = kwargs["kind"]
+        if kind not in API_RESOURCES:
+            raise ApiError("Unknown resource.", status=404)
+
+        fields = selected_fields(kind, request.GET.get("fields"))
+        row = resource_rows(kind, request.user, fields, {}).filter(pk=kwargs["pk"]).first()
+        if row is None:
+            raise ApiError("Not found.", status=404)
+        return no_cache(JsonResponse(serialize(row, fields)))
+
+
+@method_decorator(api_login_required, name="dispatch")
+@method_decorator(api_view, name="dispatch")
+class ApiLendView(View):
+    """
+    Batch lend endpoint of the JSON API: POST /api/v1/loans/lend/
+    Body: {"member": id, "books": [ids], "return_date": "YYYY-MM-DD", "fine": "5.00", "payment_method": "Cash"}
+    Lends every book to the member with lending.lend_books, all or nothing, and answers 201 with
+    the created loans and payment. Errors (unknown book, out of stock, borrowing limit) answer 400.
+    """
+
+    def post(self, request, *args, **kwargs):
+        body = json_body(request)
+        form = ApiLendForm(body, admin=request.user)
+        if not form.is_valid():
+            return JsonResponse({"error": "Invalid request.", "fields": {field: list(messages) for field, messages in form.errors.items()}}, status=400)
+
+        books = body.get("books")
+        if not isinstance(books, list):
+            raise ApiError("books must be a list of ids.")
+
+        try:
+            borrowed_books, payment = lend_books(
+                admin=request.user,
+                member=form.cleaned_data["member"],
+                book_ids=books,
+                return_date=form.cleaned_data["return_date"],
+                fine=form.cleaned_data["fine"],
+                payment_method=form.cleaned_data["payment_method"],
+            )
+        except LendingError as error:
+            logger.error(f"Error occurred while lending books: {error}")
+            raise ApiError(str(error))
+
+        logger.info("Books lent and payment made successfully.")
+        return JsonResponse(
+            {
+                "loans": [{"id": loan.pk, "book_id": loan.book_id} for loan in borrowed_books],
+                "payment": {"id": payment.pk, "amount": payment.amount},
+            },
+            status=201,
+        )
+
+
+@method_decorator(api_login_required, name="dispatch")
+@method_decorator(api_view, name="dispatch")
+class ApiReturnView(View):
+    """
+    Batch return endpoint of the JSON API: POST /api/v1/loans/return/
+    Body: {"loans": [ids], "payment_method": "Cash"}
+    Returns each loan with lending.return_book, independently of the others, and reports the outcome
+    of each: {"results": [{"id": 1, "returned": true, "payment": null}, {"id": 2, "error": "..."}]}.
+    Like the Return button, an overdue loan needs a payment_method to pay its fine.
+    """
+
+    def post(self, request, *args, **kwargs):
+        body = json_body(request)
+        loan_ids = body.get("loans")
+        if not isinstance(loan_ids, list) or not all(isinstance(loan_id, int) for loan_id in loan_ids):
+            raise ApiError("loans must be a list of ids.")
+        if len(loan_ids) > API_MAX_BATCH:
+            raise ApiError(f"At most {API_MAX_BATCH} loans can be returned at once.")
+
+        payment_method = body.get("payment_method")
+        if payment_method is not None and payment_method not in dict(PAYMENT_METHOD_CHOICES):
+            raise ApiError("Invalid payment_method.")
+
+        loans = BorrowedBook.objects.filter(admin=request.user).in_bulk(loan_ids)
+        today = timezone.now().date()
+        results = []
+        for loan_id in dict.fromkeys(loan_ids):
+            loan = loans.get(loan_id)
+            if loan is None:
+                results.append({"id": loan_id, "error": "Not found."})
+                continue
+            if loan.return_date < today and not payment_method:
+                results.append({"id": loan_id, "error": "This loan is overdue: a payment_method is required."})
+                continue
+            try:
+                payment = return_book(loan, payment_method=payment_method if loan.return_date < today else None)
+            except LendingError as error:
+                results.append({"id": loan_id, "error": str(error)})
+                continue
+            payment = {"id": payment.pk, "amount": payment.amount} if payment else None
+            results.append({"id": loan_id, "returned": True, "payment": payment})
+
+        logger.info(f"Batch return: {sum('returned' in result for result in results)} of {len(results)} loans returned.")
+        return JsonResponse({"results": results})
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from .api import ApiDetailView, ApiLendView, ApiListView, ApiReturnView
+
+urlpatterns = [
+    path("loans/lend/", ApiLendView.as_view(), name="api-lend"),
+    path("loans/return/", ApiReturnView.as_view(), name="api-return"),
+    path("<str:kind>/", ApiListView.as_view(), name="api-list"),
+    path("<str:kind>/<int:pk>/", ApiDetailView.as_view(), name="api-detail"),
+]
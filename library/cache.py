@@ -0,0 +1,148 @@
+import hashlib
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+from .instrumentation import count_cache_lookup
+
+KEY_PREFIX = "library"
+
+_MISSING = object()
+
+
+def shared_cache():
+    """
+    Returns True if the default cache is seen by every process (e.g. Redis or files), False if each
+    process has its own (local memory). Generation tokens only invalidate other workers in a shared cache.
+    """
+    return not isinstance(caches["default"], (LocMemCache, DummyCache))
+
+
+def _generation_key(admin_id, model):
+    return f"{KEY_PREFIX}:gen:{admin_id}:{model._meta.label_lower}"
+
+
+def bump_generation(admin_id, *models):
+    """
+    Invalidates every cached result of a librarian that depends on one of `models`.
+    Each (librarian, model) pair has a generation token that is part of the result keys; replacing it
+    makes the old entries unreachable (they expire on their own). The token is replaced right away and
+    again once the current transaction commits, so a reader that cached the pre-commit rows in between
+    is invalidated as well.
+    Tokens are random rather than counters, so an evicted token can never come back with an old value.
+    """
+    if admin_id is None or not models:
+        return
+
+    def bump():
+        cache.set_many({_generation_key(admin_id, model): uuid.uuid4().hex for model in models}, timeout=None)
+
+    bump()
+    if not transaction.get_autocommit():
+        transaction.on_commit(bump)
+
+
+def _generations(admin_id, models):
+    keys = [_generation_key(admin_id, model) for model in models]
+    generations = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in generations}
+    if missing:
+        for key, token in missing.items():
+            cache.add(key, token, timeout=None)
+        generations.update(cache.get_many(list(missing)))
+    return [generations.get(key, "") for key in keys]
+
+
+def generation(admin_id, models):
+    """
+    Returns a digest of the current generations of `models` for a librarian.
+    It changes whenever one of their rows changes, so it can version any cache key (see the cache_version tag).
+    """
+    return hashlib.sha1(":".join(_generations(admin_id, models)).encode()).hexdigest()
+
+
+def layout_key(admin_id, name):
+    """
+    Builds the cache key of a layout value of a librarian (see context_processors.layout_value).
+    """
+    return f"{KEY_PREFIX}:layout:{admin_id}:{name}"
+
+
+def result_key(admin_id, name, params, models):
+    """
+    Builds the cache key of a result: librarian, view name, a digest of the request parameters
+    and the current generation of every model the result depends on.
+    """
+    digest = hashlib.sha1(repr(params).encode()).hexdigest()
+    return f"{KEY_PREFIX}:q:{admin_id}:{name}:{digest}:{generation(admin_id, models)}"
+
+
+def _count(outcome):
+    count_cache_lookup(outcome)
+    key = f"{KEY_PREFIX}:stats:{outcome}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def cache_stats():
+    """
+    Returns the hit and miss counts of the query cache, and the hit rate.
+    They are kept in the cache backend, so a shared backend (file, Redis) counts across all workers.
+    """
+    counts = cache.get_many([f"{KEY_PREFIX}:stats:hits", f"{KEY_PREFIX}:stats:misses"])
+    hits = counts.get(f"{KEY_PREFIX}:stats:hits", 0)
+    misses = counts.get(f"{KEY_PREFIX}:stats:misses", 0)
+    return {"hits": hits, "misses": misses, "hit_rate": hits / (hits + misses) if hits + misses else 0.0}
+
+
+def reset_cache_stats():
+    cache.delete_many([f"{KEY_PREFIX}:stats:hits", f"{KEY_PREFIX}:stats:misses"])
+
+
+def cached_result(admin, name, params, models, compute):
+    """
+    Returns compute() for a librarian, cached on the default cache backend under (librarian, name, params)
+    and the generations of `models`, for LIBRARY_QUERY_CACHE_TIMEOUT seconds. compute() must return a
+    picklable, fully evaluated value (lists, not querysets). LIBRARY_QUERY_CACHE=False bypasses the cache.
+    """
+    if not settings.LIBRARY_QUERY_CACHE:
+        return compute()
+
+    key = result_key(admin.pk, name, params, models)
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        _count("misses")
+        value = compute()
+        cache.set(key, value, timeout=settings.LIBRARY_QUERY_CACHE_TIMEOUT)
+    else:
+        _count("hits")
+
+    return value
+
+
+async def acached_result(admin, name, params, models, compute):
+    """
+    Async counterpart of cached_result for async views: `compute` is a coroutine function.
+    The entry is read and written with the async cache API.
+    """
+    if not settings.LIBRARY_QUERY_CACHE:
+        return await compute()
+
+    key = await sync_to_async(result_key)(admin.pk, name, params, models)
+    value = await cache.aget(key, _MISSING)
+    if value is _MISSING:
+        await sync_to_async(_count)("misses")
+        value = await compute()
+        await cache.aset(key, value, timeout=settings.LIBRARY_QUERY_CACHE_TIMEOUT)
+    else:
+        await sync_to_async(_count)("hits")
+
+    return value
@@ -0,0 +1,167 @@
+import codecs
+import csv
+import io
+import json
+
+from django.db import transaction
+
+from .forms import AddBookForm, ImportMemberForm
+from .models import Book, Member
+from .signals import bulk_created
+
+IMPORT_BATCH_SIZE = 1000
+
+# Errors kept for the report; further errors are only counted.
+MAX_REPORTED_ERRORS = 1000
+
+# kind: (model, form validating each row)
+IMPORTS = {
+    "books": (Book, AddBookForm),
+    "members": (Member, ImportMemberForm),
+}
+
+
+class ImportResult:
+    """
+    Outcome of a catalogue import: rows created, rows rejected and the first rejected rows
+    as (line number, message) pairs.
+    """
+
+    def __init__(self):
+        self.created = 0
+        self.rejected = 0
+        self.errors = []
+
+    def reject(self, line, message):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+
+def detect_format(filename):
+    return "ndjson" if filename.lower().endswith((".ndjson", ".jsonl")) else "csv"
+
+
+def read_records(stream, import_format):
+    """
+    Yields (line number, record) pairs from a text stream, one line at a time.
+    A record is a dict of column values, or the error message of a line that cannot be parsed.
+    """
+    if import_format == "ndjson":
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as error:
+                yield line_number, f"Invalid JSON: {error}"
+                continue
+            yield line_number, record if isinstance(record, dict) else "Expected a JSON object."
+    else:
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+
+
+def is_utf8(chunks):
+    """
+    Returns whether the bytes of `chunks` decode as UTF-8, reading them one chunk at a time.
+    Rows are written in batches as a file is read, so a file is checked before its import starts:
+    a bad byte found further down would otherwise leave the earlier batches imported.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        for chunk in chunks:
+            decoder.decode(chunk)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def text_stream(uploaded_file):
+    """
+    Wraps an uploaded (binary) file for read_records, decoding it as it is read.
+    """
+    return io.TextIOWrapper(uploaded_file, encoding="utf-8-sig", newline="")
+
+
+def _form_errors(form):
+    return "; ".join(
+        f"{field}: {' '.join(messages)}" if field != "__all__" else " ".join(messages)
+        for field, messages in form.errors.items()
+    )
+
+
+def _write_batch(model, objects, result):
+    """
+    Writes one batch with a single bulk INSERT in its own transaction and sends bulk_created,
+    so the dashboard counters and the search index follow.
+    """
+    if not objects:
+        return
+    with transaction.atomic():
+        created = model.objects.bulk_create(objects)
+        bulk_created.send(sender=model, instances=created)
+    result.created += len(created)
+
+
+def _existing_emails(emails):
+    """
+    Returns which of `emails` already belong to a member, with one query for the whole batch.
+    """
+    return set(Member.objects.filter(email__in=emails).values_list("email", flat=True))
+
+
+def import_catalogue(kind, admin, records, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Imports books or members for a librarian from (line number, record) pairs (see read_records).
+    Every row is validated with the same form as the single-record pages; invalid rows are reported
+    in the result and skipped without aborting the import. Valid rows are written in batches of
+    `batch_size`, each with one bulk INSERT in its own transaction.
+    Member emails are checked against the database with one query per batch, and against the rest of
+    the file in memory, instead of one query per row.
+    """
+    model, form_class = IMPORTS[kind]
+    result = ImportResult()
+    seen_emails = set()
+    batch = []
+
+    def flush():
+        if kind == "members":
+            existing = _existing_emails([member.email for _, member in batch])
+            for line, member in batch:
+                if member.email in existing:
+                    result.reject(line, "email: A member with that email already exists.")
+            objects = [member for _, member in batch if member.email not in existing]
+        else:
+            objects = [obj for _, obj in batch]
+        _write_batch(model, objects, result)
+        batch.clear()
+
+    for line, record in records:
+        if isinstance(record, str):
+            result.reject(line, record)
+            continue
+
+        form = form_class(data=record)
+        if not form.is_valid():
+            result.reject(line, _form_errors(form))
+            continue
+
+        obj = form.save(commit=False)
+        obj.admin = admin
+        if kind == "books":
+            obj.status = "not-available" if obj.quantity == 0 else "available"  # As on the Add Book page
+        if kind == "members":
+            if obj.email in seen_emails:
+                result.reject(line, "email: Duplicate email in the file.")
+                continue
+            seen_emails.add(obj.email)
+
+        batch.append((line, obj))
+        if len(batch) >= batch_size:
+            flush()
+
+    flush()
+    return result
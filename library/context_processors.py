@@ -1,15 +1,90 @@
-from datetime import datetime
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+
+from .cache import layout_key
+from .stats import get_library_stats
 
 
 def greeting(request):
-    current_time = datetime.now().time()
-    if current_time.hour < 12:
-        greeting = "Morning"
-    elif current_time.hour < 16:
-        greeting = "Afternoon"
-    elif current_time.hour < 19:
-        greeting = "Evening"
-    else:
-        greeting = "Night"
-
-    return {"greeting": greeting}
+    hour = timezone.localtime().hour  # In TIME_ZONE, not the server's time zone
+    if hour < 12:
+        return "Morning"
+    elif hour < 16:
+        return "Afternoon"
+    elif hour < 19:
+        return "Evening"
+    return "Night"
+
+
+def display_name(request):
+    user = request.user
+    return (user.get_full_name() or user.email) if user.is_authenticated else ""
+
+
+def stats_badges(stats):
+    return {"lent": stats["total_borrowed_books"], "overdue": stats["total_overdue_books"]}
+
+
+def badges(request):
+    """
+    Counts shown next to the sidebar links, read from the librarian's LibraryStats row.
+    """
+    if not request.user.is_authenticated:
+        return {}
+    return stats_badges(get_library_stats(request.user))
+
+
+# Layout values available to every template: name: (function of the request, whether the value is
+# cached across requests, per librarian, for LIBRARY_LAYOUT_CACHE_TIMEOUT seconds).
+LAYOUT_VALUES = {
+    "greeting": (greeting, False),
+    "display_name": (display_name, False),
+    "badges": (badges, True),
+}
+
+
+def layout_value(request, name):
+    """
+    Returns a layout value, computed at most once per request. Cached values are shared by the
+    librarian's requests for LIBRARY_LAYOUT_CACHE_TIMEOUT seconds (0 turns that cache off); the
+    cached badges are dropped when the librarian's counters change (see events.publish_stats_delta).
+    """
+    values = request.__dict__.setdefault("_layout_values", {})
+    if name not in values:
+        compute, cached = LAYOUT_VALUES[name]
+        if cached and settings.LIBRARY_LAYOUT_CACHE_TIMEOUT and request.user.is_authenticated:
+            key = layout_key(request.user.pk, name)
+            values[name] = cache.get_or_set(key, partial(compute, request), settings.LIBRARY_LAYOUT_CACHE_TIMEOUT)
+        else:
+            values[name] = compute(request)
+    return values[name]
+
+
+def remember_layout_value(request, name, value):
+    """
+    Sets a layout value for the rest of the request, for a view that already has it at hand.
+    """
+    request.__dict__.setdefault("_layout_values", {})[name] = value
+
+
+def layout(request):
+    """
+    Adds the layout values to every template context as lazy objects: a value is only computed
+    when a template uses it, so pages that do not (login, errors) pay nothing.
+    """
+    return {name: SimpleLazyObject(partial(layout_value, request, name)) for name in LAYOUT_VALUES}
+
+
+async def aprefetch_layout(request):
+    """
+    Computes the layout values that need the database before an async view renders its template,
+    where they could not be computed synchronously from the event loop.
+    """
+    for name, (_, cached) in LAYOUT_VALUES.items():
+        if cached:
+            await sync_to_async(layout_value)(request, name)
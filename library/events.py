@@ -0,0 +1,193 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .cache import layout_key
+
+# Events waiting for a slow client before it is sent a fresh snapshot instead.
+SUBSCRIPTION_QUEUE_SIZE = 100
+
+
+class Subscription:
+    """
+    The events of one librarian for one client, filled by a broker from any thread and read from the event loop.
+    """
+
+    def __init__(self, broker, admin_id):
+        self.broker = broker
+        self.admin_id = admin_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIPTION_QUEUE_SIZE)
+        self.overflowed = False
+
+    def offer(self, event):
+        """
+        Queues an event from any thread.
+        """
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self):
+        return await self.queue.get()
+
+    def resync(self):
+        """
+        Returns True, and forgets the queued events, if events were dropped: the client needs a new snapshot.
+        """
+        if not self.overflowed:
+            return False
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.overflowed = False
+        return True
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """
+    In-process broker: events reach the clients connected to the process that published them.
+    Enough for a single server process (SERVER_PROFILE=asgi with WEB_CONCURRENCY=1); with several
+    processes, a broker shared by all of them (e.g. Redis pub/sub) with the same interface is needed.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = defaultdict(set)
+
+    def subscribe(self, admin_id):
+        """
+        Must be called from the event loop that will read the subscription.
+        """
+        subscription = Subscription(self, admin_id)
+        with self.lock:
+            self.subscriptions[admin_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.admin_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self.subscriptions.pop(subscription.admin_id, None)
+
+    def publish(self, admin_id, event):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(admin_id, ()))
+        for subscription in subscriptions:
+            subscription.offer(event)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """
+    Returns the broker of this process, an instance of LIBRARY_EVENT_BROKER.
+    """
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(settings.LIBRARY_EVENT_BROKER)()
+        return _broker
+
+
+def stats_event(deltas, state=None):
+    """
+    Turns LibraryStats deltas into the event sent to the librarian's clients, or None when no badge changes.
+    The type names the cause: a new loan, a return (or deleted loan), a newly overdue loan or a payment.
+    `state`, from stats.badge_state, adds the badge counts after the change ("badges") and its "version".
+    """
+    lent = deltas.get("total_borrowed_books", 0)
+    overdue = deltas.get("total_overdue_books", 0)
+    amount = deltas.get("total_amount", 0)
+
+    if lent > 0:
+        kind = "loan"
+    elif lent < 0:
+        kind = "return"
+    elif overdue:
+        kind = "overdue"
+    elif amount:
+        kind = "payment"
+    else:
+        return None
+
+    event = {"type": kind, "lent": lent, "overdue": overdue, "amount": str(amount)}
+    if state is not None:
+        event["badges"] = {"lent": state["lent"], "overdue": state["overdue"]}
+        event["version"] = state["version"]
+    return event
+
+
+def publish_stats_delta(admin_id, deltas, state, repair=False):
+    """
+    Publishes the badge changes of a librarian once the current transaction commits, and drops the
+    cached badges (see context_processors.layout_value) so the next page shows them too.
+    Called by stats.apply_stats_delta, which every change of the counters goes through, with the
+    badge state of the librarian's LibraryStats row after the change (None when there is no row),
+    and by stats.rebuild_library_stats with `repair`: a repair drops the cached badges even when
+    the counts did not change, as they may have been cached from a stale read.
+    """
+    event = stats_event(deltas, state)
+    if admin_id is None or (event is None and not repair):
+        return
+
+    def publish():
+        cache.delete(layout_key(admin_id, "badges"))
+        if event is not None and state is not None:
+            get_broker().publish(admin_id, event)
+
+    transaction.on_commit(publish, robust=True)
+
+
+def sse(event, data):
+    """
+    Formats a server-sent event.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def event_stream(admin_id, snapshot):
+    """
+    The server-sent events of a librarian: "badges" with the current counts, then one event per change
+    ("loan", "return", "overdue" or "payment", with the deltas and the counts after it), and a comment
+    every LIBRARY_EVENT_HEARTBEAT seconds to keep the connection open through proxies.
+    `snapshot` is an async callable returning the current badge state (see stats.abadge_state).
+    The subscription starts before the snapshot so no change is missed; the change of the snapshot's own
+    version is already included and dropped instead of being counted twice. An older version means the
+    snapshot may be ahead of the events (or the counters were reset), so a new snapshot is sent instead.
+    """
+    subscription = get_broker().subscribe(admin_id)
+    try:
+        state = await snapshot()
+        version = state["version"]
+        yield f"retry: {settings.LIBRARY_EVENT_RETRY_MS}\n" + sse("badges", state)
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), timeout=settings.LIBRARY_EVENT_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if subscription.resync() or event["version"] < version:
+                state = await snapshot()
+                version = state["version"]
+                yield sse("badges", state)
+            elif event["version"] > version:
+                version = event["version"]
+                yield sse(event["type"], event)
+    finally:
+        subscription.close()
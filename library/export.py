@@ -0,0 +1,105 @@
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Book, BorrowedBook, Member, Transaction
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+# kind: (model, exported fields). Related fields are fetched in the same query.
+EXPORTS = {
+    "members": (Member, ("id", "name", "email", "amount_due", "created_at")),
+    "books": (
+        Book,
+        ("id", "title", "author", "category", "quantity", "borrowing_fee", "status", "created_at"),
+    ),
+    "loans": (
+        BorrowedBook,
+        (
+            "id",
+            "member_id",
+            "member__name",
+            "book_id",
+            "book__title",
+            "return_date",
+            "returned",
+            "is_overdue",
+            "fine",
+            "created_at",
+        ),
+    ),
+    "payments": (Transaction, ("id", "member_id", "member__name", "amount", "payment_method", "created_at")),
+}
+
+
+class Echo:
+    """
+    A file-like object whose write() returns the value instead of storing it, so csv.writer
+    can produce one line at a time for a streaming response.
+    """
+
+    def write(self, value):
+        return value
+
+
+def export_header(kind):
+    """
+    Returns the column names of an export, e.g. "member__name" becomes "member_name".
+    """
+    return [field.replace("__", "_") for field in EXPORTS[kind][1]]
+
+
+def export_rows(kind, admin, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields the rows of one librarian as tuples, oldest first, without ever holding the whole table:
+    values_list() skips model instantiation and iterator() fetches `chunk_size` rows at a time
+    (through a server-side cursor on PostgreSQL).
+    """
+    model, fields = EXPORTS[kind]
+    queryset = model.objects.filter(admin=admin).order_by("created_at", "id").values_list(*fields)
+    return queryset.iterator(chunk_size=chunk_size)
+
+
+def csv_lines(kind, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(export_header(kind))
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(kind, rows):
+    header = export_header(kind)
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+def export_lines(kind, admin, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Returns a generator of text lines for an export in "csv" or "ndjson" format.
+    """
+    rows = export_rows(kind, admin, chunk_size=chunk_size)
+    if export_format == "ndjson":
+        return ndjson_lines(kind, rows)
+    return csv_lines(kind, rows)
+
+
+async def aexport_lines(lines, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Streams the lines of export_lines() from the event loop, for the ASGI handler, which would otherwise
+    read a sync generator into a list before sending anything. Each chunk of `chunk_size` lines is read
+    in one sync_to_async call, on the thread (and database cursor) of the request.
+    """
+    read_chunk = sync_to_async(lambda: "".join(islice(lines, chunk_size)))
+    try:
+        while chunk := await read_chunk():
+            yield chunk
+    finally:
+        await sync_to_async(lines.close)()
@@ -1,5 +1,6 @@
 from django import forms
 from django.core.exceptions import ValidationError
+from django.urls import reverse_lazy
 from django.utils.translation import gettext_lazy as _
 
 from .models import CATEGORY_CHOICES, PAYMENT_METHOD_CHOICES, Book, BorrowedBook, Member
@@ -26,6 +27,16 @@ class AddMemberForm(forms.ModelForm):
         return email
 
 
+class ImportMemberForm(AddMemberForm):
+    """
+    Validates one imported member row. Emails are checked for duplicates a whole batch at a time
+    by catalogue.import_catalogue instead of with one query per row.
+    """
+
+    def clean_email(self):
+        return self.cleaned_data.get("email")
+
+
 class UpdateMemberForm(forms.ModelForm):
     name = forms.CharField(
         widget=forms.TextInput(attrs={"class": "form-control form-control-lg", "placeholder": "Enter Member Name"})
@@ -72,21 +83,115 @@ class AddBookForm(forms.ModelForm):
         fields = ["title", "author", "category", "quantity", "borrowing_fee"]
 
 
+def lendable_books(admin):
+    return Book.objects.filter(admin=admin, quantity__gt=0)
+
+
+def library_members(admin):
+    return Member.objects.filter(admin=admin)
+
+
+# Rows offered by the autocomplete selects: kind: (queryset of a librarian, fields searched by prefix,
+# fields loaded for the labels). Served by views.AutocompleteView.
+AUTOCOMPLETE_KINDS = {
+    "books": (lendable_books, ("title", "author"), ("id", "title", "author")),
+    "members": (library_members, ("name", "email"), ("id", "name")),
+}
+
+
+def parse_ids(values):
+    """
+    Returns the distinct integer ids among `values`, in order, or None if one of them is not an integer.
+    """
+    try:
+        return list(dict.fromkeys(int(value) for value in values))
+    except (TypeError, ValueError):
+        return None
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    A <select> whose options are fetched by Select2 from the autocomplete endpoint of `kind` as the user types
+    (see static/assets/js/select2.js). Only the selected options are rendered, with one query for their labels.
+    """
+
+    def __init__(self, kind, multiple=False, attrs=None):
+        css = "js-example-basic-multiple" if multiple else "js-example-basic-single"
+        attrs = {
+            "class": f"form-control form-control-lg {css} w-100",
+            "data-autocomplete-url": reverse_lazy("autocomplete", kwargs={"kind": kind}),
+            **(attrs or {}),
+        }
+        super().__init__(attrs)
+        self.allow_multiple_selected = multiple
+        self.queryset = None
+
+    def value_from_datadict(self, data, files, name):
+        if self.allow_multiple_selected and hasattr(data, "getlist"):
+            return data.getlist(name)
+        return data.get(name)
+
+    def optgroups(self, name, value, attrs=None):
+        ids = parse_ids(value) or []
+        rows = self.queryset.in_bulk(ids) if ids and self.queryset is not None else {}
+        return [
+            (None, [self.create_option(name, pk, str(rows[pk]), True, index)], index)
+            for index, pk in enumerate(pk for pk in ids if pk in rows)
+        ]
+
+
+class AutocompleteModelField(forms.Field):
+    """
+    Chooses rows of `queryset` by id from an AutocompleteSelect. No choice list is loaded: the submitted
+    ids are checked with one in_bulk() query. Cleans to an object, or to a list of objects with multiple=True.
+    """
+
+    default_error_messages = {
+        "invalid_choice": _("Select a valid choice. That choice is not one of the available choices."),
+    }
+
+    def __init__(self, queryset, kind, multiple=False, **kwargs):
+        self.multiple = multiple
+        kwargs.setdefault("widget", AutocompleteSelect(kind, multiple=multiple))
+        super().__init__(**kwargs)
+        self.queryset = queryset
+
+    @property
+    def queryset(self):
+        return self._queryset
+
+    @queryset.setter
+    def queryset(self, queryset):
+        self._queryset = queryset
+        self.widget.queryset = queryset
+
+    def __deepcopy__(self, memo):
+        result = super().__deepcopy__(memo)
+        result.queryset = self.queryset.all()
+        return result
+
+    def to_python(self, value):
+        values = value if isinstance(value, (list, tuple)) else [value]
+        values = [value for value in values if value not in self.empty_values]
+        if not values:
+            return [] if self.multiple else None
+        if not self.multiple:
+            values = values[-1:]
+
+        ids = parse_ids(values)
+        rows = self.queryset.in_bulk(ids) if ids else {}
+        if ids is None or len(rows) != len(ids):
+            raise ValidationError(self.error_messages["invalid_choice"], code="invalid_choice")
+
+        objects = [rows[pk] for pk in ids]
+        return objects if self.multiple else objects[0]
+
+
 class LendBookForm(forms.ModelForm):
-    book = forms.ModelChoiceField(
-        label="Book / Books",
-        queryset=Book.objects.none(),  # Initially empty, filtered in __init__
-        empty_label=None,
-        widget=forms.Select(
-            attrs={"class": "form-control form-control-lg js-example-basic-multiple w-100", "multiple": "multiple"}
-        ),
-    )
+    # Initially empty, filtered in __init__
+    book = AutocompleteModelField(Book.objects.none(), "books", multiple=True, label="Book / Books")
 
-    member = forms.ModelChoiceField(
-        queryset=Member.objects.none(),  # Initially empty, filtered in __init__
-        empty_label=None,
-        widget=forms.Select(attrs={"class": "form-control form-control-lg js-example-basic-single w-100"}),
-    )
+    member = AutocompleteModelField(Member.objects.none(), "members")
 
     return_date = forms.DateField(
         widget=forms.DateInput(attrs={"class": "form-control form-control-lg", "type": "date", "id": "return-date"})
@@ -98,25 +203,21 @@ class LendBookForm(forms.ModelForm):
 
     class Meta:
         model = BorrowedBook
-        fields = ["book", "member", "return_date", "fine"]
+        # "book" and "member" are checked by their AutocompleteModelField only, with one query each
+        fields = ["return_date", "fine"]
 
     def __init__(self, *args, **kwargs):
         admin = kwargs.pop('admin', None)
         super().__init__(*args, **kwargs)
 
         if admin:
-            self.fields['book'].queryset = Book.objects.filter(admin=admin, quantity__gt=0)
-            self.fields['member'].queryset = Member.objects.filter(admin=admin)
+            self.fields['book'].queryset = lendable_books(admin)
+            self.fields['member'].queryset = library_members(admin)
 
 
 class LendMemberBookForm(forms.ModelForm):
-    book = forms.ModelChoiceField(
-        queryset=Book.objects.none(),  # Initially empty, filtered in __init__
-        empty_label=None,
-        widget=forms.Select(
-            attrs={"class": "form-control form-control-lg js-example-basic-multiple w-100", "multiple": "multiple"}
-        ),
-    )
+    # Initially empty, filtered in __init__
+    book = AutocompleteModelField(Book.objects.none(), "books", multiple=True)
 
     return_date = forms.DateField(
         widget=forms.DateInput(attrs={"class": "form-control form-control-lg", "type": "date", "id": "return-date"})
@@ -128,14 +229,14 @@ class LendMemberBookForm(forms.ModelForm):
 
     class Meta:
         model = BorrowedBook
-        fields = ["book", "return_date", "fine"]
+        fields = ["return_date", "fine"]  # "book" is checked by its AutocompleteModelField
 
     def __init__(self, *args, **kwargs):
         admin = kwargs.pop('admin', None)
         super().__init__(*args, **kwargs)
 
         if admin:
-            self.fields['book'].queryset = Book.objects.filter(admin=admin, quantity__gt=0)
+            self.fields['book'].queryset = lendable_books(admin)
 
 
 class UpdateBorrowedBookForm(forms.ModelForm):
@@ -159,3 +260,30 @@ class PaymentForm(forms.Form):
 
     class Meta:
         fields = ["payment_method"]
+
+
+class ImportCatalogueForm(forms.Form):
+    kind = forms.ChoiceField(
+        choices=(("books", "Books"), ("members", "Members")),
+        widget=forms.Select(attrs={"class": "form-control form-control-lg"}),
+    )
+    file = forms.FileField(
+        help_text="CSV with a header row, or NDJSON (.ndjson / .jsonl) with one object per line.",
+        widget=forms.ClearableFileInput(attrs={"class": "form-control form-control-lg", "accept": ".csv,.ndjson,.jsonl"}),
+    )
+
+
+class ApiLendForm(forms.Form):
+    """
+    Validates the JSON body of the batch lend endpoint (the book ids are checked by lend_books).
+    """
+
+    member = forms.ModelChoiceField(queryset=Member.objects.none())
+    return_date = forms.DateField()
+    fine = forms.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    payment_method = forms.ChoiceField(choices=PAYMENT_METHOD_CHOICES)
+
+    def __init__(self, *args, **kwargs):
+        admin = kwargs.pop("admin")
+        super().__init__(*args, **kwargs)
+        self.fields["member"].queryset = Member.objects.filter(admin=admin)
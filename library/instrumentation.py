@@ -0,0 +1,469 @@
+import atexit
+import fcntl
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger("library.requests")
+
+# Metrics of the request being served, None outside of a request. A context variable rather than a
+# thread local: async views run their queries in sync_to_async threads, which inherit the context.
+current_metrics = ContextVar("current_metrics", default=None)
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERIES_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+BYTES_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+class RequestMetrics:
+    """
+    What one request spent: SQL queries and their time, template rendering time and query cache lookups.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+def record_queries(execute, sql, params, many, context):
+    """
+    Execute wrapper installed on every database connection; counts the statements of the current request.
+    """
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - started
+
+
+def install_query_recorder(connection, **kwargs):
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_queries)
+
+
+connection_created.connect(install_query_recorder)
+
+
+def count_cache_lookup(outcome):
+    """
+    Counts a query cache "hits" or "misses" for the current request (see cache.cached_result).
+    """
+    metrics = current_metrics.get()
+    if metrics is not None:
+        setattr(metrics, f"cache_{outcome}", getattr(metrics, f"cache_{outcome}") + 1)
+
+
+class Histogram:
+    """
+    A Prometheus histogram with a "view" label, kept in the memory of the worker process.
+    """
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.series = {}  # view: [count per bucket..., count, sum]
+
+    def observe(self, view, value):
+        series = self.series.setdefault(view, [0] * (len(self.buckets) + 2))
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[index] += 1
+        series[-2] += 1
+        series[-1] += value
+
+    @staticmethod
+    def combine(first, second):
+        return [a + b for a, b in zip(first, second)]
+
+    def copy(self):
+        return {view: list(values) for view, values in self.series.items()}
+
+    def exposition(self, series):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for view, values in sorted(series.items()):
+            for bound, count in zip(self.buckets, values):
+                lines.append(f'{self.name}_bucket{{view="{view}",le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{view="{view}",le="+Inf"}} {values[-2]}')
+            lines.append(f'{self.name}_count{{view="{view}"}} {values[-2]}')
+            lines.append(f'{self.name}_sum{{view="{view}"}} {values[-1]:g}')
+        return lines
+
+
+class Counter:
+    """
+    A Prometheus counter with a "view" label, kept in the memory of the worker process.
+    """
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self.series = {}
+
+    def increment(self, view, value):
+        self.series[view] = self.series.get(view, 0) + value
+
+    @staticmethod
+    def combine(first, second):
+        return first + second
+
+    def copy(self):
+        return dict(self.series)
+
+    def exposition(self, series):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        lines.extend(f'{self.name}{{view="{view}"}} {value}' for view, value in sorted(series.items()))
+        return lines
+
+
+_lock = threading.Lock()
+
+REQUEST_SECONDS = Histogram("library_request_duration_seconds", "Time spent serving the request.", SECONDS_BUCKETS)
+REQUEST_QUERIES = Histogram("library_request_db_queries", "SQL queries run by the request.", QUERIES_BUCKETS)
+REQUEST_DB_SECONDS = Histogram("library_request_db_seconds", "Time spent in SQL queries.", SECONDS_BUCKETS)
+REQUEST_TEMPLATE_SECONDS = Histogram(
+    "library_request_template_seconds", "Time spent rendering templates, queries included.", SECONDS_BUCKETS
+)
+RESPONSE_BYTES = Histogram("library_response_size_bytes", "Size of the response body.", BYTES_BUCKETS)
+CACHE_HITS = Counter("library_request_cache_hits_total", "Query cache hits.")
+CACHE_MISSES = Counter("library_request_cache_misses_total", "Query cache misses.")
+
+METRICS = [REQUEST_SECONDS, REQUEST_QUERIES, REQUEST_DB_SECONDS, REQUEST_TEMPLATE_SECONDS, RESPONSE_BYTES, CACHE_HITS, CACHE_MISSES]
+
+# The name of the file of this process in LIBRARY_METRICS_DIR, the process it was named for, and whether
+# the series changed since they were last saved to it.
+_process_file = {"pid": None, "name": None, "dirty": False}
+
+# Held while the file of this process is written, so that an older copy of the series never replaces a newer one.
+_write_lock = threading.Lock()
+
+# The totals of the processes that have exited, in LIBRARY_METRICS_DIR.
+EXITED_FILE = "exited.json"
+
+
+def reset_metrics():
+    with _lock:
+        for metric in METRICS:
+            metric.series.clear()
+
+
+def _check_process():
+    """
+    Starts over in a process forked from the one that created the metrics (the gunicorn master with
+    preload_app), so that what the parent measured is not counted again by each of its children.
+    """
+    if _process_file["pid"] != os.getpid():
+        for metric in METRICS:
+            metric.series.clear()
+        _process_file.update(pid=os.getpid(), name=f"{os.getpid()}-{uuid.uuid4().hex}.json", dirty=False)
+        if settings.LIBRARY_METRICS_DIR:
+            threading.Thread(target=_save_periodically, name="library-metrics", daemon=True).start()
+
+
+def _save_periodically():
+    while True:
+        time.sleep(settings.LIBRARY_METRICS_SAVE_INTERVAL)
+        save_metrics()
+
+
+def save_metrics():
+    """
+    Saves the series of this process to its own file in LIBRARY_METRICS_DIR if they changed since they
+    were last saved. Requests only update the series in memory: this runs every LIBRARY_METRICS_SAVE_INTERVAL
+    seconds in a thread of its own, before a scrape and when the process exits. The series are copied
+    under the lock and written outside of it, replacing the file atomically so that a scrape in another
+    process reads either the previous version or this one.
+    """
+    directory = settings.LIBRARY_METRICS_DIR
+    if not directory:
+        return
+
+    with _write_lock:
+        with _lock:
+            if _process_file["pid"] != os.getpid() or not _process_file["dirty"]:
+                return
+            series = {metric.name: metric.copy() for metric in METRICS}
+            _process_file["dirty"] = False
+
+        os.makedirs(directory, exist_ok=True)
+        _write_json(os.path.join(directory, _process_file["name"]), series)
+
+
+# The requests of the last LIBRARY_METRICS_SAVE_INTERVAL seconds of a worker that exits normally are kept too
+atexit.register(save_metrics)
+
+
+def _write_json(path, data):
+    with open(f"{path}.tmp", "w") as file:
+        json.dump(data, file)
+    os.replace(f"{path}.tmp", path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _add_series(totals, process_series):
+    """
+    Adds {metric name: series} read from a file to `totals`, in place.
+    """
+    combine = {metric.name: metric.combine for metric in METRICS}
+    for name, series in process_series.items():
+        if name not in combine:
+            continue
+        for view, values in series.items():
+            total = totals.setdefault(name, {}).get(view)
+            totals[name][view] = values if total is None else combine[name](total, values)
+
+
+def _has_exited(path):
+    """
+    Whether the process that saved the file `path`, named "<pid>-<id>.json", is gone.
+    """
+    pid = os.path.basename(path).split("-")[0]
+    if not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:  # Alive, owned by another user
+        return False
+    return False
+
+
+def _compact_exited(directory):
+    """
+    Adds the files of the processes that have exited to the EXITED_FILE totals and deletes them, so a
+    scrape reads one file per running worker plus one however often workers were restarted.
+    The totals record the files they include until these are deleted, so a crash in between never
+    counts a file twice.
+    """
+    exited_path = os.path.join(directory, EXITED_FILE)
+    exited = _read_json(exited_path) or {"files": [], "series": {}}
+    for name in exited["files"]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+    merged = []
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        process_series = _read_json(path) if _has_exited(path) else None
+        if process_series is not None:
+            _add_series(exited["series"], process_series)
+            merged.append(os.path.basename(path))
+    if exited["files"] or merged:
+        _write_json(exited_path, {"files": merged, "series": exited["series"]})
+    for name in merged:
+        os.remove(os.path.join(directory, name))
+
+
+def _collected_series(directory):
+    """
+    Returns {metric name: series} summed over the files of every process in `directory`, the processes
+    that have exited included, so the counters only ever grow between scrapes.
+    Holds a lock file, as any worker may be scraped, so a file is never read both before and after
+    being compacted.
+    """
+    totals = {metric.name: {} for metric in METRICS}
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, ".lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        _compact_exited(directory)
+        for path in glob.glob(os.path.join(directory, "*.json")):
+            process_series = _read_json(path)
+            if os.path.basename(path) == EXITED_FILE and process_series is not None:
+                process_series = process_series["series"]
+            if process_series is not None:
+                _add_series(totals, process_series)
+    return totals
+
+
+def metrics_exposition():
+    """
+    Returns the per-view metrics in the Prometheus text format: those of every worker process when
+    LIBRARY_METRICS_DIR is set, otherwise those of this process.
+    """
+    if settings.LIBRARY_METRICS_DIR:
+        save_metrics()
+        series = _collected_series(settings.LIBRARY_METRICS_DIR)
+    else:
+        with _lock:
+            series = {metric.name: metric.copy() for metric in METRICS}
+    lines = [line for metric in METRICS for line in metric.exposition(series[metric.name])]
+    return "\n".join(lines) + "\n"
+
+
+class RequestMetricsMiddleware:
+    """
+    Measures every request and, once it is answered:
+        - logs one "library.requests" record with structured fields: view, method, status, duration_ms,
+          db_queries, db_time_ms, template_ms, cache_hits, cache_misses and response_bytes,
+        - adds it to the per-view histograms served by the metrics page.
+    A streaming response (exports, server-sent events) is answered once its content has been sent:
+    its queries and time are measured until then, and its size is the number of bytes streamed.
+    Requests that match no URL are grouped under the "unmatched" view, so the number of series stays bounded.
+    Sync and async capable: async views are served without a thread switch.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        metrics, token, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.answered(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        metrics, token, started = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.answered(request, response, metrics, started)
+
+    def start(self):
+        # Connections opened before this module was imported missed the connection_created signal
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+        metrics = RequestMetrics()
+        return metrics, current_metrics.set(metrics), time.perf_counter()
+
+    def answered(self, request, response, metrics, started):
+        if not response.streaming:
+            self.finish(request, response, metrics, started, len(response.content))
+            return response
+
+        measured = self.ameasured if response.is_async else self.measured
+        response.streaming_content = measured(response.streaming_content, request, response, metrics, started)
+        return response
+
+    def measured(self, content, request, response, metrics, started):
+        """
+        Streams `content` with the request's metrics current, and finishes the measurement when it ends
+        or the client goes away.
+        """
+        size = 0
+        current_metrics.set(metrics)
+        try:
+            for chunk in content:
+                size += len(chunk)
+                yield chunk
+        finally:
+            current_metrics.set(None)
+            self.finish(request, response, metrics, started, size)
+
+    async def ameasured(self, content, request, response, metrics, started):
+        size = 0
+        current_metrics.set(metrics)
+        try:
+            async for chunk in content:
+                size += len(chunk)
+                yield chunk
+        finally:
+            current_metrics.set(None)
+            self.finish(request, response, metrics, started, size)
+
+    def finish(self, request, response, metrics, started, size):
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        view = match.view_name if match else "unmatched"
+
+        with _lock:
+            _check_process()
+            REQUEST_SECONDS.observe(view, duration)
+            REQUEST_QUERIES.observe(view, metrics.queries)
+            REQUEST_DB_SECONDS.observe(view, metrics.db_time)
+            REQUEST_TEMPLATE_SECONDS.observe(view, metrics.template_time)
+            RESPONSE_BYTES.observe(view, size)
+            CACHE_HITS.increment(view, metrics.cache_hits)
+            CACHE_MISSES.increment(view, metrics.cache_misses)
+            _process_file["dirty"] = True
+
+        logger.info(
+            f"{request.method} {view} {response.status_code}",
+            extra={
+                "view": view,
+                "method": request.method,
+                "status": response.status_code,
+                "duration_ms": round(duration * 1000, 1),
+                "db_queries": metrics.queries,
+                "db_time_ms": round(metrics.db_time * 1000, 1),
+                "template_ms": round(metrics.template_time * 1000, 1),
+                "cache_hits": metrics.cache_hits,
+                "cache_misses": metrics.cache_misses,
+                "response_bytes": size,
+            },
+        )
+
+
+class TimedTemplate:
+    """
+    Wraps a template of the Django backend to add its rendering time to the current request's metrics.
+    """
+
+    def __init__(self, template):
+        self.wrapped = template
+
+    def __getattr__(self, name):
+        return getattr(self.wrapped, name)
+
+    def render(self, context=None, request=None):
+        metrics = current_metrics.get()
+        if metrics is None:
+            return self.wrapped.render(context, request)
+
+        started = time.perf_counter()
+        try:
+            return self.wrapped.render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    The Django template backend, timing every top-level render (extends and includes are part of it).
+    Rendering evaluates lazy querysets, so the template time includes their queries.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
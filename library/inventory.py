@@ -0,0 +1,42 @@
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .models import Book
+
+
+class OutOfStockError(Exception):
+    """
+    Raised when one or more books have no copy left to lend. `books` holds the titles concerned.
+    """
+
+    def __init__(self, books):
+        self.books = books
+        super().__init__(f"Out of stock: {', '.join(books)}." if books else "Out of stock.")
+
+
+def reserve_copies(book_ids):
+    """
+    Takes one copy of each book with a single conditional UPDATE (quantity > 0), so concurrent
+    checkouts can never lend the same last copy twice or drive a quantity below zero.
+    Raises OutOfStockError, leaving every quantity untouched, if any book has no copy left.
+    """
+    book_ids = list(book_ids)
+    with transaction.atomic():
+        updated = Book.objects.filter(pk__in=book_ids, quantity__gt=0).update(
+            quantity=F("quantity") - 1,
+            status=Case(When(quantity__lte=1, then=Value("not-available")), default=Value("available")),
+            updated_at=timezone.now(),
+        )
+        if updated != len(book_ids):
+            titles = list(Book.objects.filter(pk__in=book_ids, quantity=0).values_list("title", flat=True))
+            raise OutOfStockError(titles)
+
+
+def release_copies(book_ids):
+    """
+    Puts one copy of each book back on the shelf with a single UPDATE using F() expressions.
+    """
+    Book.objects.filter(pk__in=list(book_ids)).update(
+        quantity=F("quantity") + 1, status="available", updated_at=timezone.now()
+    )
@@ -0,0 +1,80 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .cache import bump_generation
+from .models import LedgerEntry, Member
+
+# Members owing more than this cannot borrow books.
+BORROWING_LIMIT = Decimal("500.00")
+
+AMOUNT_FIELD = DecimalField(max_digits=10, decimal_places=2)
+
+
+def record_entries(entries):
+    """
+    Appends LedgerEntry rows and moves the balance (Member.amount_due) of each member concerned, as one unit.
+    Runs one bulk INSERT and one UPDATE using F() expressions whatever the number of entries,
+    so concurrent writers never overwrite each other's balance changes. Zero amounts are skipped.
+    Returns the created entries.
+    """
+    amount_field = LedgerEntry._meta.get_field("amount")
+    entries = [entry for entry in entries if amount_field.to_python(entry.amount)]
+    if not entries:
+        return []
+
+    balances = defaultdict(Decimal)
+    for entry in entries:
+        balances[entry.member_id] += amount_field.to_python(entry.amount)
+
+    with transaction.atomic():
+        created = LedgerEntry.objects.bulk_create(entries)
+        Member.objects.filter(pk__in=list(balances)).update(
+            amount_due=Case(
+                *[
+                    When(pk=member_id, then=F("amount_due") + Value(amount, output_field=AMOUNT_FIELD))
+                    for member_id, amount in balances.items()
+                ],
+                default=F("amount_due"),
+            ),
+            updated_at=timezone.now(),
+        )
+        for admin_id in {entry.admin_id for entry in entries}:
+            bump_generation(admin_id, Member)
+
+    return created
+
+
+def within_borrowing_limit(member):
+    """
+    Locks the member row and checks its balance against BORROWING_LIMIT with a single query.
+    """
+    return Member.objects.select_for_update().filter(pk=member.pk, amount_due__lte=BORROWING_LIMIT).exists()
+
+
+def ledger_discrepancies(members=None):
+    """
+    Audits balances against the ledger. Returns (member, ledger_balance) pairs for every member
+    whose amount_due differs from the sum of their entries.
+    """
+    members = (Member.objects.all() if members is None else members).annotate(
+        ledger_balance=Coalesce(Sum("ledger_entries__amount"), Value(Decimal("0.00"), output_field=AMOUNT_FIELD))
+    )
+    return [(member, member.ledger_balance) for member in members.iterator() if member.amount_due != member.ledger_balance]
+
+
+def repair_balances(members=None):
+    """
+    Resets amount_due to the ledger balance for every member that has drifted. Returns the number repaired.
+    """
+    discrepancies = ledger_discrepancies(members)
+    with transaction.atomic():
+        for member, ledger_balance in discrepancies:
+            Member.objects.filter(pk=member.pk).update(amount_due=ledger_balance, updated_at=timezone.now())
+            bump_generation(member.admin_id, Member)
+
+    return len(discrepancies)
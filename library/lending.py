@@ -0,0 +1,134 @@
+from django.db import transaction
+
+from .cache import bump_generation
+from .inventory import OutOfStockError, release_copies, reserve_copies
+from .ledger import record_entries, within_borrowing_limit
+from .models import Book, BorrowedBook, LedgerEntry, Transaction
+from .overdue import loan_charge
+from .signals import bulk_created
+
+
+class LendingError(Exception):
+    """
+    Raised when a checkout cannot be completed. Nothing is written when it is raised.
+    """
+
+
+def lend_books(admin, member, book_ids, return_date, fine, payment_method):
+    """
+    Lends the selected books to a member and records the borrowing fee payment, as one unit.
+    Runs a fixed number of queries whatever the number of books:
+        - one query locking the member and checking their balance against the borrowing limit,
+        - one query to fetch the selected books,
+        - one conditional UPDATE reserving a copy of every book (see inventory.reserve_copies),
+        - one bulk INSERT of the BorrowedBook rows and one INSERT of the Transaction,
+        - the fee and payment LedgerEntry rows (see ledger.record_entries).
+    Raises LendingError (and rolls back) if the member owes more than the borrowing limit,
+    or if a book is unknown to the librarian or out of stock.
+    Returns the created BorrowedBook rows and the Transaction.
+    """
+    try:
+        book_ids = list(dict.fromkeys(int(book_id) for book_id in book_ids))
+    except (TypeError, ValueError):
+        raise LendingError("Invalid book selected.")
+
+    if not book_ids:
+        raise LendingError("Select at least one book.")
+
+    with transaction.atomic():
+        if not within_borrowing_limit(member):
+            raise LendingError("Member has exceeded the borrowing limit.")
+
+        books = Book.objects.filter(admin=admin).in_bulk(book_ids)
+        if len(books) != len(book_ids):
+            raise LendingError("Invalid book selected.")
+
+        try:
+            reserve_copies(book_ids)
+        except OutOfStockError as error:
+            raise LendingError(str(error))
+        bump_generation(admin.pk, Book)  # reserve_copies() updates quantities without model signals
+
+        borrowed_books = BorrowedBook.objects.bulk_create(
+            [
+                BorrowedBook(member=member, book=book, return_date=return_date, fine=fine, admin=admin)
+                for book in books.values()
+            ]
+        )
+        payment = Transaction.objects.create(
+            member=member,
+            amount=sum(book.borrowing_fee for book in books.values()),
+            payment_method=payment_method,
+            admin=admin,
+        )
+        record_entries(
+            [
+                LedgerEntry(admin=admin, member=member, kind="fee", amount=payment.amount, payment=payment),
+                LedgerEntry(admin=admin, member=member, kind="payment", amount=-payment.amount, payment=payment),
+            ]
+        )
+        bulk_created.send(sender=BorrowedBook, instances=borrowed_books)
+
+    return borrowed_books, payment
+
+
+def return_book(borrowed_book, payment_method=None):
+    """
+    Marks a loan as returned and puts the copy back in stock, as one unit.
+    If a payment method is given, the loan's fine is recorded as a Transaction and returned;
+    the ledger gets the fine (unless the overdue sweep already charged it) and the payment.
+    Without a payment, a fine already charged by the sweep is waived with an adjustment.
+    The loan row is locked (select_for_update) so a double submit cannot release the copy twice;
+    LendingError is raised if the loan was already returned.
+    """
+    with transaction.atomic():
+        borrowed_book = BorrowedBook.objects.select_for_update().select_related("member").get(pk=borrowed_book.pk)
+        if borrowed_book.returned:
+            raise LendingError("This book has already been returned.")
+
+        charged = loan_charge(borrowed_book)
+        borrowed_book.returned = True
+        borrowed_book.save()
+        release_copies([borrowed_book.book_id])
+        bump_generation(borrowed_book.admin_id, Book)
+
+        payment = None
+        entries = []
+        if payment_method:
+            payment = Transaction.objects.create(
+                member=borrowed_book.member,
+                amount=borrowed_book.fine,
+                payment_method=payment_method,
+                admin_id=borrowed_book.admin_id,
+            )
+            if not charged:
+                entries.append(_loan_entry(borrowed_book, "fine", borrowed_book.fine))
+            entries.append(_loan_entry(borrowed_book, "payment", -borrowed_book.fine, payment=payment))
+        elif charged:
+            entries.append(_loan_entry(borrowed_book, "adjustment", -charged))
+        record_entries(entries)
+
+    return payment
+
+
+def _loan_entry(borrowed_book, kind, amount, **kwargs):
+    return LedgerEntry(
+        admin_id=borrowed_book.admin_id,
+        member_id=borrowed_book.member_id,
+        kind=kind,
+        amount=amount,
+        borrowed_book=borrowed_book,
+        **kwargs,
+    )
+
+
+def delete_loan(borrowed_book):
+    """
+    Deletes a loan, putting the copy back in stock if it was still out.
+    """
+    with transaction.atomic():
+        borrowed_book = BorrowedBook.objects.select_for_update().get(pk=borrowed_book.pk)
+        if not borrowed_book.returned:
+            release_copies([borrowed_book.book_id])
+            bump_generation(borrowed_book.admin_id, Book)
+        borrowed_book.delete()
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from library.ledger import ledger_discrepancies, repair_balances
+
+
+class Command(BaseCommand):
+    help = "Checks every member's amount_due against the sum of their ledger entries."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Reset drifted balances to the ledger balance.")
+
+    def handle(self, *args, **options):
+        if options["fix"]:
+            repaired = repair_balances()
+            self.stdout.write(self.style.SUCCESS(f"Repaired {repaired} member balance(s)."))
+            return
+
+        discrepancies = ledger_discrepancies()
+        for member, ledger_balance in discrepancies:
+            self.stdout.write(f"{member} (#{member.pk}): amount_due {member.amount_due}, ledger {ledger_balance}")
+
+        if discrepancies:
+            raise CommandError(f"{len(discrepancies)} member balance(s) do not match the ledger.")
+        self.stdout.write(self.style.SUCCESS("All member balances match the ledger."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from library.cache import cache_stats, reset_cache_stats, shared_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Shows the hit and miss counts of the per-librarian query cache. "
+        "The counts are kept in the default cache, so they need a shared backend (CACHE_URL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Reset the counters after showing them.")
+
+    def handle(self, *args, **options):
+        if not shared_cache():
+            raise CommandError(
+                "The default cache is local to each process: the counts of the server processes cannot be read "
+                "from here. Set CACHE_URL to a shared backend (e.g. rediscache:// or filecache://)."
+            )
+
+        stats = cache_stats()
+        self.stdout.write(f"hits: {stats['hits']}  misses: {stats['misses']}  hit rate: {stats['hit_rate']:.1%}")
+        if options["reset"]:
+            reset_cache_stats()
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from library.export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, EXPORTS, export_lines
+from users.models import Librarian
+
+
+class Command(BaseCommand):
+    help = "Streams a librarian's members, books, loans or payments as CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--admin", required=True, help="Email of the librarian to export.")
+        parser.add_argument("--kind", choices=sorted(EXPORTS), required=True)
+        parser.add_argument("--format", dest="export_format", choices=sorted(EXPORT_FORMATS), default="csv")
+        parser.add_argument("--output", help="File to write to. Writes to stdout by default.")
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE, help="Rows fetched per round trip.")
+
+    def handle(self, *args, **options):
+        admin = Librarian.objects.filter(email=options["admin"]).first()
+        if admin is None:
+            raise CommandError(f"Librarian with email {options['admin']} does not exist.")
+
+        lines = export_lines(options["kind"], admin, options["export_format"], chunk_size=options["chunk_size"])
+        if options["output"]:
+            with open(options["output"], "w", newline="", encoding="utf-8") as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
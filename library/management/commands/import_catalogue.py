@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from library.catalogue import IMPORT_BATCH_SIZE, IMPORTS, detect_format, import_catalogue, is_utf8, read_records
+from users.models import Librarian
+
+
+class Command(BaseCommand):
+    help = "Imports books or members for a librarian from a CSV (with a header row) or NDJSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or NDJSON (.ndjson / .jsonl) file to import.")
+        parser.add_argument("--admin", required=True, help="Email of the librarian the rows belong to.")
+        parser.add_argument("--kind", choices=sorted(IMPORTS), required=True)
+        parser.add_argument("--format", dest="import_format", choices=["csv", "ndjson"], help="Defaults to the file extension.")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="Rows written per transaction.")
+
+    def handle(self, *args, **options):
+        admin = Librarian.objects.filter(email=options["admin"]).first()
+        if admin is None:
+            raise CommandError(f"Librarian with email {options['admin']} does not exist.")
+
+        with open(options["path"], "rb") as file:
+            if not is_utf8(iter(lambda: file.read(64 * 1024), b"")):
+                raise CommandError(f"{options['path']} must be UTF-8 encoded; nothing was imported.")
+
+        import_format = options["import_format"] or detect_format(options["path"])
+        with open(options["path"], encoding="utf-8-sig", newline="") as stream:
+            result = import_catalogue(
+                options["kind"], admin, read_records(stream, import_format), batch_size=options["batch_size"]
+            )
+
+        for line, message in result.errors:
+            self.stderr.write(f"Line {line}: {message}")
+        self.stdout.write(
+            self.style.SUCCESS(f"Imported {result.created} {options['kind']}, rejected {result.rejected} row(s).")
+        )
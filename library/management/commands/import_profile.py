@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PROJECT_PACKAGES = ("core", "library", "users")
+
+
+def import_times(target):
+    """
+    Imports `target` in a fresh interpreter under `python -X importtime` and returns
+    (module, self microseconds, cumulative microseconds) for every module it imported.
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=settings.BASE_DIR,
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "core.settings")},
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode:
+        raise CommandError(f"Importing {target} failed:\n{process.stderr[-2000:]}")
+
+    rows = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_time, cumulative, module = line[len("import time:") :].split("|")
+        rows.append((module.strip(), int(self_time), int(cumulative)))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Reports how long a worker spends importing modules when it boots: the total, the time per top-level "
+        "package and the slowest modules, project modules marked with *. Measured with `python -X importtime` "
+        "in a fresh interpreter, so nothing is already imported."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", default="core.wsgi", help="Module to import (default: core.wsgi).")
+        parser.add_argument("--limit", type=int, default=20, help="Number of packages and modules to list.")
+
+    def handle(self, *args, **options):
+        rows = import_times(options["target"])
+        if not rows:
+            raise CommandError("No import times were reported.")
+
+        packages = defaultdict(int)
+        for module, self_time, _ in rows:
+            packages[module.split(".")[0]] += self_time
+        total = sum(packages.values())
+        project = sum(packages[package] for package in PROJECT_PACKAGES)
+
+        self.stdout.write(f"{options['target']}: {total / 1000:.1f} ms of imports, {len(rows)} modules")
+        self.stdout.write(f"project modules ({', '.join(PROJECT_PACKAGES)}): {project / 1000:.1f} ms\n")
+
+        self.stdout.write(f"{'package':<40}{'ms':>10}")
+        for package, self_time in sorted(packages.items(), key=lambda item: -item[1])[: options["limit"]]:
+            self.stdout.write(f"{package:<40}{self_time / 1000:>10.1f}")
+
+        self.stdout.write(f"\n{'module':<58}{'self ms':>10}{'cumulative ms':>15}")
+        for module, self_time, cumulative in sorted(rows, key=lambda row: -row[1])[: options["limit"]]:
+            marker = "*" if module.split(".")[0] in PROJECT_PACKAGES else " "
+            self.stdout.write(f"{marker}{module:<57}{self_time / 1000:>10.1f}{cumulative / 1000:>15.1f}")
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from library.stats import rebuild_library_stats
+from users.models import Librarian
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the per-librarian LibraryStats counters from the Member, Book, BorrowedBook and Transaction tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--admin", help="Email of a single librarian to rebuild. Rebuilds everyone by default.")
+
+    def handle(self, *args, **options):
+        librarians = Librarian.objects.all()
+        if options["admin"]:
+            librarians = librarians.filter(email=options["admin"])
+            if not librarians.exists():
+                raise CommandError(f"Librarian with email {options['admin']} does not exist.")
+
+        with transaction.atomic():
+            count = 0
+            for librarian in librarians.iterator():
+                rebuild_library_stats(librarian)
+                count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {count} librarian(s)."))
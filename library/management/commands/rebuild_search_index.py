@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from library.search import rebuild_search_index, search_enabled
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the SQLite FTS5 search index for books, members, lent books and payments."
+
+    def handle(self, *args, **options):
+        if not search_enabled():
+            raise CommandError("Full-text search is disabled or the FTS5 tables do not exist on this database.")
+
+        with transaction.atomic():
+            rebuild_search_index()
+
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from library.overdue import SWEEP_BATCH_SIZE, sweep_overdue
+
+
+class Command(BaseCommand):
+    help = (
+        "Flags loans whose return date has passed, charges their fines to the members' amount due "
+        "and updates the dashboard counters. Meant to run from cron, e.g. a few minutes past midnight."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=SWEEP_BATCH_SIZE, help="Number of loans flagged per transaction."
+        )
+
+    def handle(self, *args, **options):
+        flagged = sweep_overdue(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Flagged {flagged} overdue loan(s)."))
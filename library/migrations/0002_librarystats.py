@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('library', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LibraryStats',
+            fields=[
+                ('admin', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='library_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_members', models.IntegerField(default=0)),
+                ('total_books', models.IntegerField(default=0)),
+                ('total_borrowed_books', models.IntegerField(default=0)),
+                ('total_overdue_books', models.IntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0.0, max_digits=12)),
+                ('overdue_amount', models.DecimalField(decimal_places=2, default=0.0, max_digits=12)),
+            ],
+            options={
+                'verbose_name_plural': 'library stats',
+            },
+        ),
+    ]
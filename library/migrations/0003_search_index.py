@@ -0,0 +1,66 @@
+from django.db import migrations
+
+SEARCH_TABLES = {
+    "library_search_book": (
+        ["title", "author"],
+        "SELECT b.id, b.admin_id, b.title, b.author FROM library_book b WHERE b.admin_id IS NOT NULL",
+    ),
+    "library_search_member": (
+        ["name", "email"],
+        "SELECT m.id, m.admin_id, m.name, m.email FROM library_member m WHERE m.admin_id IS NOT NULL",
+    ),
+    "library_search_borrowedbook": (
+        ["title", "author", "member"],
+        "SELECT bb.id, bb.admin_id, b.title, b.author, m.name FROM library_borrowedbook bb "
+        "JOIN library_book b ON b.id = bb.book_id JOIN library_member m ON m.id = bb.member_id "
+        "WHERE bb.admin_id IS NOT NULL",
+    ),
+    "library_search_transaction": (
+        ["member"],
+        "SELECT t.id, t.admin_id, m.name FROM library_transaction t "
+        "JOIN library_member m ON m.id = t.member_id WHERE t.admin_id IS NOT NULL",
+    ),
+}
+
+
+def fts5_available(schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return False
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE temp.library_fts5_probe USING fts5(body)")
+            cursor.execute("DROP TABLE temp.library_fts5_probe")
+        except Exception:
+            return False
+    return True
+
+
+def create_search_tables(apps, schema_editor):
+    if not fts5_available(schema_editor):
+        return
+
+    for table, (columns, source) in SEARCH_TABLES.items():
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {table} USING fts5("
+            f"{', '.join(columns)}, admin_id UNINDEXED, prefix='2 3', tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(f"INSERT INTO {table}(rowid, admin_id, {', '.join(columns)}) {source}")
+
+
+def drop_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+
+    for table in SEARCH_TABLES:
+        schema_editor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0002_librarystats"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_tables, drop_search_tables),
+    ]
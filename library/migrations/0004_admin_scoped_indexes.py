@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0003_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['admin', 'created_at', 'id'], name='book_admin_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='borrowedbook',
+            index=models.Index(fields=['admin', 'created_at', 'id'], name='borrowed_admin_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='borrowedbook',
+            index=models.Index(fields=['admin', 'returned', 'return_date'], name='borrowed_admin_returned_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='borrowedbook',
+            index=models.Index(condition=models.Q(('returned', False)), fields=['admin', 'return_date'], name='borrowed_open_loans_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['admin', 'created_at', 'id'], name='member_admin_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['email'], name='member_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['admin', 'created_at', 'id'], name='transaction_admin_created_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0004_admin_scoped_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='borrowedbook',
+            name='borrowed_open_loans_idx',
+        ),
+        migrations.AddField(
+            model_name='borrowedbook',
+            name='is_overdue',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='borrowedbook',
+            index=models.Index(condition=models.Q(('is_overdue', False), ('returned', False)), fields=['return_date'], name='borrowed_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='borrowedbook',
+            index=models.Index(condition=models.Q(('is_overdue', True)), fields=['admin', 'created_at', 'id'], name='borrowed_overdue_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def open_balances(apps, schema_editor):
+    """
+    Records the existing amount_due of every member as an opening entry, so balances audit cleanly.
+    """
+    Member = apps.get_model("library", "Member")
+    LedgerEntry = apps.get_model("library", "LedgerEntry")
+    LedgerEntry.objects.bulk_create(
+        [
+            LedgerEntry(admin_id=admin_id, member_id=member_id, kind="opening", amount=amount_due)
+            for member_id, admin_id, amount_due in Member.objects.exclude(amount_due=0)
+            .values_list("pk", "admin_id", "amount_due")
+            .iterator()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0005_borrowedbook_is_overdue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('kind', models.CharField(choices=[('opening', 'Opening balance'), ('fee', 'Borrowing fee'), ('fine', 'Overdue fine'), ('payment', 'Payment'), ('adjustment', 'Adjustment')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('admin', models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('borrowed_book', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='library.borrowedbook')),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='library.member')),
+                ('payment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='library.transaction')),
+            ],
+            options={
+                'verbose_name_plural': 'ledger entries',
+            },
+        ),
+        migrations.RunPython(open_balances, migrations.RunPython.noop),
+    ]
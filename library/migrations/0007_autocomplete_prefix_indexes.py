@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# Indexes for the istartswith lookups of search.prefix_matches on PostgreSQL, which compares
+# UPPER(column::text) with LIKE 'PREFIX%': text_pattern_ops lets LIKE use them whatever the collation.
+# SQLite serves autocomplete from the FTS5 prefix index (migration 0003) instead.
+PREFIX_INDEXES = {
+    "library_book_title_prefix_idx": ("library_book", "title"),
+    "library_book_author_prefix_idx": ("library_book", "author"),
+    "library_member_name_prefix_idx": ("library_member", "name"),
+    "library_member_email_prefix_idx": ("library_member", "email"),
+}
+
+
+def create_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for name, (table, column) in PREFIX_INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {table} (admin_id, UPPER({column}::text) text_pattern_ops)"
+        )
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for name in PREFIX_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0006_ledgerentry"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0007_autocomplete_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='librarystats',
+            name='version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
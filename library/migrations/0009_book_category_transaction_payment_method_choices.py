@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0008_librarystats_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='book',
+            name='category',
+            field=models.CharField(choices=[('Programming', 'Programming'), ('Technology', 'Technology'), ('Science', 'Science'), ('History', 'History'), ('Story', 'Story'), ('Other', 'Other')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='payment_method',
+            field=models.CharField(choices=[('Cash', 'Cash'), ('Gpay', 'Gpay'), ('PhonePay', 'PhonePay'), ('Paytm', 'Paytm'), ('Card', 'Card')], max_length=20),
+        ),
+    ]
@@ -109,6 +109,14 @@ PAYMENT_METHOD_CHOICES = (
     ("Card", "Card"),
 )
 
+LEDGER_ENTRY_KINDS = (
+    ("opening", "Opening balance"),
+    ("fee", "Borrowing fee"),
+    ("fine", "Overdue fine"),
+    ("payment", "Payment"),
+    ("adjustment", "Adjustment"),
+)
+
 # 🟢 Member Model - Librarian ko add kiya
 class Member(AbstractBaseModel):
     admin = models.ForeignKey(Librarian, on_delete=models.CASCADE, null=True, blank=True, default=None)  # ✅ Updated
@@ -118,6 +126,12 @@ class Member(AbstractBaseModel):
         max_digits=10, decimal_places=2, default=0.00, validators=[MinValueValidator(0.00), MaxValueValidator(500.00)]
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["admin", "created_at", "id"], name="member_admin_created_idx"),
+            models.Index(fields=["email"], name="member_email_idx"),
+        ]
+
     def __str__(self):
         return f"{self.name}"
 
@@ -133,6 +147,11 @@ class Book(AbstractBaseModel):
     )
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="available")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["admin", "created_at", "id"], name="book_admin_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.title} by {self.author}"
 
@@ -144,6 +163,19 @@ class BorrowedBook(AbstractBaseModel):
     return_date = models.DateField()
     returned = models.BooleanField(default=False)
     fine = models.DecimalField(max_digits=10, decimal_places=2, default=0.00, validators=[MinValueValidator(0.00)])
+    is_overdue = models.BooleanField(default=False)  # Set by the sweep_overdue command, cleared on return
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["admin", "created_at", "id"], name="borrowed_admin_created_idx"),
+            models.Index(fields=["admin", "returned", "return_date"], name="borrowed_admin_returned_idx"),
+            models.Index(
+                fields=["return_date"], condition=models.Q(returned=False, is_overdue=False), name="borrowed_due_idx"
+            ),
+            models.Index(
+                fields=["admin", "created_at", "id"], condition=models.Q(is_overdue=True), name="borrowed_overdue_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.member.name} borrowed {self.book.title} on {self.created_at}"
@@ -155,5 +187,46 @@ class Transaction(AbstractBaseModel):
     amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00, validators=[MinValueValidator(0.00)])
     payment_method = models.CharField(max_length=20, choices=PAYMENT_METHOD_CHOICES)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["admin", "created_at", "id"], name="transaction_admin_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.member.name} paid {self.amount} via {self.payment_method}"
+
+# 🟢 LibraryStats Model - Dashboard counters per Librarian, kept up to date by signals
+class LibraryStats(models.Model):
+    admin = models.OneToOneField(Librarian, on_delete=models.CASCADE, primary_key=True, related_name="library_stats")
+    total_members = models.IntegerField(default=0)
+    total_books = models.IntegerField(default=0)
+    total_borrowed_books = models.IntegerField(default=0)
+    total_overdue_books = models.IntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
+    overdue_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
+    version = models.PositiveBigIntegerField(default=0)  # Incremented by every change of the counters
+
+    class Meta:
+        verbose_name_plural = "library stats"
+
+    def __str__(self):
+        return f"Stats for {self.admin}"
+
+# 🟢 LedgerEntry Model - Append-only history of every change to Member.amount_due
+class LedgerEntry(AbstractBaseModel):
+    admin = models.ForeignKey(Librarian, on_delete=models.CASCADE, null=True, blank=True, default=None)
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name="ledger_entries")
+    kind = models.CharField(max_length=20, choices=LEDGER_ENTRY_KINDS)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)  # Positive when the member owes more
+    borrowed_book = models.ForeignKey(
+        BorrowedBook, on_delete=models.SET_NULL, null=True, blank=True, related_name="ledger_entries"
+    )
+    payment = models.ForeignKey(
+        Transaction, on_delete=models.SET_NULL, null=True, blank=True, related_name="ledger_entries"
+    )
+
+    class Meta:
+        verbose_name_plural = "ledger entries"
+
+    def __str__(self):
+        return f"{self.get_kind_display()} of {self.amount} for {self.member}"
@@ -0,0 +1,66 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import bump_generation
+from .ledger import record_entries
+from .models import BorrowedBook, LedgerEntry
+from .stats import apply_stats_delta
+
+SWEEP_BATCH_SIZE = 500
+
+
+def loan_charge(borrowed_book):
+    """
+    Returns what a BorrowedBook row currently adds to its member's amount due:
+    the loan's fine once the sweep has flagged it overdue, nothing otherwise.
+    """
+    if borrowed_book.returned or not borrowed_book.is_overdue:
+        return 0
+
+    return BorrowedBook._meta.get_field("fine").to_python(borrowed_book.fine)
+
+
+def sweep_overdue(today=None, batch_size=SWEEP_BATCH_SIZE):
+    """
+    Flags the loans whose return date has passed since the last sweep and charges their fines.
+    Only rows not flagged yet are touched, so the work is proportional to what became overdue
+    since the last run rather than to the number of open loans. Each batch, in one transaction:
+        - flags the loans with one UPDATE,
+        - records an overdue fine LedgerEntry per loan, moving the members' amount due (see ledger.record_entries),
+        - adds the new overdue books and fines to each librarian's LibraryStats row.
+    Returns the number of loans flagged.
+    """
+    today = today or timezone.now().date()
+    flagged = 0
+
+    while True:
+        with transaction.atomic():
+            loans = list(
+                BorrowedBook.objects.select_for_update()
+                .filter(returned=False, is_overdue=False, return_date__lt=today)
+                .order_by("return_date", "pk")
+                .values_list("pk", "admin_id", "member_id", "fine")[:batch_size]
+            )
+            if not loans:
+                return flagged
+
+            BorrowedBook.objects.filter(pk__in=[pk for pk, _, _, _ in loans]).update(is_overdue=True, updated_at=timezone.now())
+
+            stats = defaultdict(lambda: defaultdict(int))
+            for _, admin_id, _, fine in loans:
+                stats[admin_id]["total_overdue_books"] += 1
+                stats[admin_id]["overdue_amount"] += fine
+
+            record_entries(
+                [
+                    LedgerEntry(admin_id=admin_id, member_id=member_id, kind="fine", amount=fine, borrowed_book_id=pk)
+                    for pk, admin_id, member_id, fine in loans
+                ]
+            )
+            for admin_id, deltas in stats.items():
+                apply_stats_delta(admin_id, **deltas)
+                bump_generation(admin_id, BorrowedBook)
+
+        flagged += len(loans)
@@ -0,0 +1,142 @@
+import base64
+import binascii
+import json
+import logging
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+NEXT = "n"
+PREVIOUS = "p"
+
+
+class KeysetPage:
+    """
+    One page of a keyset-paginated queryset, newest first on (created_at, id).
+    Iterates over the page items; next_cursor/previous_cursor are opaque tokens or None.
+    `offset` is the number of rows on the pages before this one, to number the rows across pages.
+    """
+
+    def __init__(self, items, next_cursor=None, previous_cursor=None, offset=0):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.offset = offset
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+def _encode(payload):
+    payload = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode(token):
+    padded = token + "=" * (-len(token) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+
+def encode_cursor(obj, direction, offset):
+    """
+    Encodes the (created_at, id) position of `obj`, a paging direction and the number of rows before
+    the page the cursor leads to (or, going back, before `obj`) into a URL-safe token.
+    `obj` is a model instance or a values() dict containing "created_at" and "id".
+    """
+    created_at, pk = (obj["created_at"], obj["id"]) if isinstance(obj, dict) else (obj.created_at, obj.pk)
+    return _encode({"d": direction, "c": created_at.isoformat(), "i": pk, "o": offset})
+
+
+def decode_cursor(token):
+    """
+    Decodes a token created by encode_cursor into (direction, created_at, id, offset).
+    Returns None if the token is malformed.
+    """
+    try:
+        payload = _decode(token)
+        direction = payload["d"]
+        offset = int(payload.get("o", 0))
+        if direction not in (NEXT, PREVIOUS) or offset < 0:
+            return None
+        return direction, datetime.fromisoformat(payload["c"]), int(payload["i"]), offset
+    except (AttributeError, binascii.Error, ValueError, KeyError, TypeError):
+        return None
+
+
+def encode_offset_cursor(offset):
+    """
+    Encodes a position in a ranked list, such as search results, into a token like those of encode_cursor.
+    Ranked lists have no (created_at, id) order to page on, so they are paged by offset.
+    """
+    return _encode({"o": offset})
+
+
+def decode_offset_cursor(token):
+    """
+    Decodes a token created by encode_offset_cursor into the offset. Returns None if the token is malformed.
+    """
+    try:
+        offset = int(_decode(token)["o"])
+        return offset if offset >= 0 else None
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        return None
+
+
+def paginate(queryset, cursor=None, page_size=None):
+    """
+    Returns a KeysetPage of `queryset` (of instances or values() dicts), newest first on (created_at, id).
+    Pages are located with a WHERE clause on the cursor position rather than an OFFSET, so every
+    page costs the same and rows inserted concurrently never shift the contents of other pages.
+    The cursors carry the number of rows before the page, which only numbers the rows.
+    """
+    page_size = page_size or settings.LIBRARY_PAGE_SIZE
+    position = decode_cursor(cursor) if cursor else None
+    if cursor and position is None:
+        logger.warning("Invalid pagination cursor received, falling back to the first page.")
+
+    if position and position[0] == PREVIOUS:
+        _, created_at, pk, before = position
+        rows = list(
+            queryset.filter(Q(created_at__gte=created_at) & (Q(created_at__gt=created_at) | Q(pk__gt=pk)))
+            .order_by("created_at", "pk")[: page_size + 1]
+        )
+        if rows:
+            items = rows[:page_size][::-1]
+            # Rows added or deleted since the cursor was made change the count before it: number from 1 at least
+            offset = max(before - len(items), 0) if len(rows) > page_size else 0
+            previous_cursor = encode_cursor(items[0], PREVIOUS, offset) if len(rows) > page_size else None
+            return KeysetPage(items, encode_cursor(items[-1], NEXT, offset + len(items)), previous_cursor, offset)
+        position = None
+
+    offset = 0
+    if position:
+        _, created_at, pk, offset = position
+        queryset = queryset.filter(Q(created_at__lte=created_at) & (Q(created_at__lt=created_at) | Q(pk__lt=pk)))
+
+    rows = list(queryset.order_by("-created_at", "-pk")[: page_size + 1])
+    items = rows[:page_size]
+    next_cursor = encode_cursor(items[-1], NEXT, offset + len(items)) if len(rows) > page_size else None
+    previous_cursor = encode_cursor(items[0], PREVIOUS, offset) if position and items else None
+
+    return KeysetPage(items, next_cursor, previous_cursor, offset)
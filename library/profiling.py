@@ -0,0 +1,123 @@
+import cProfile
+import os
+import random
+import re
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+# <UTC timestamp>-<view>-<duration>ms.prof, see profile_path()
+PROFILE_NAME = re.compile(r"^(?P<timestamp>\d{8}T\d{6}\.\d{6})-(?P<view>[\w.:-]+)-(?P<duration>\d+)ms\.prof$")
+
+
+def profile_directory():
+    return Path(settings.REQUEST_PROFILING_DIR)
+
+
+def profile_path(view, duration):
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S.%f")
+    return profile_directory() / f"{timestamp}-{view}-{round(duration * 1000)}ms.prof"
+
+
+def captured_profiles():
+    """
+    Returns the saved profiles, newest first, as dicts: name, view, duration_ms, size and captured_at.
+    """
+    directory = profile_directory()
+    if not directory.is_dir():
+        return []
+
+    profiles = []
+    for entry in os.scandir(directory):
+        match = PROFILE_NAME.match(entry.name)
+        if match is None or not entry.is_file():
+            continue
+        profiles.append(
+            {
+                "name": entry.name,
+                "view": match["view"],
+                "duration_ms": int(match["duration"]),
+                "size": entry.stat().st_size,
+                "captured_at": datetime.strptime(match["timestamp"], "%Y%m%dT%H%M%S.%f").replace(tzinfo=timezone.utc),
+            }
+        )
+    return sorted(profiles, key=lambda profile: profile["name"], reverse=True)
+
+
+def prune_profiles():
+    """
+    Deletes the oldest profiles beyond REQUEST_PROFILING_KEEP.
+    """
+    for profile in captured_profiles()[settings.REQUEST_PROFILING_KEEP :]:
+        (profile_directory() / profile["name"]).unlink(missing_ok=True)
+
+
+class SlowRequestProfilerMiddleware:
+    """
+    Opt-in profiler of slow requests (REQUEST_PROFILING). A random REQUEST_PROFILING_RATE share of the
+    requests runs under cProfile; those that take longer than REQUEST_PROFILING_THRESHOLD_MS are saved
+    to REQUEST_PROFILING_DIR, one .prof file per request (open with `python -m pstats` or snakeviz).
+    The other requests pay a single random() call, so a low rate keeps the overhead negligible.
+    cProfile follows the thread it is enabled in: for async views, work done in sync_to_async threads
+    (the ORM) shows up as time waiting on them, not as their own calls, and requests overlapping a
+    profiled one on the event loop appear in its profile.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.profiling = False
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if random.random() >= settings.REQUEST_PROFILING_RATE:
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        self.save(request, profiler, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        # The profiler hooks the event loop thread, which serves every request at once: one profile at a time
+        if self.profiling or random.random() >= settings.REQUEST_PROFILING_RATE:
+            return await self.get_response(request)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        self.profiling = True
+        profiler.enable()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.disable()
+            self.profiling = False
+        self.save(request, profiler, time.perf_counter() - started)
+        return response
+
+    def save(self, request, profiler, duration):
+        if duration * 1000 < settings.REQUEST_PROFILING_THRESHOLD_MS:
+            return
+
+        match = request.resolver_match
+        path = profile_path(match.view_name if match else "unmatched", duration)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(path)
+        prune_profiles()
@@ -0,0 +1,225 @@
+import logging
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .models import Book, BorrowedBook, Member, Transaction
+from .pagination import KeysetPage, decode_offset_cursor, encode_offset_cursor, paginate
+
+# Default upper bound on the ranked matches returned by ranked_ids.
+SEARCH_CANDIDATES = 500
+
+# Rows returned by an autocomplete lookup.
+AUTOCOMPLETE_RESULTS = 20
+
+logger = logging.getLogger(__name__)
+
+
+class SearchIndex:
+    """
+    An SQLite FTS5 table mirroring the searchable text of one model. The FTS rowid is the
+    primary key of the indexed row and admin_id is stored unindexed to scope matches per librarian.
+    """
+
+    def __init__(self, model, columns, select, joins=""):
+        self.model = model
+        self.table = f"library_search_{model._meta.model_name}"
+        self.base = model._meta.db_table
+        self.columns = columns
+        self.select = select
+        self.joins = joins
+
+    def source_sql(self, where):
+        return (
+            f"SELECT {self.base}.id, {self.base}.admin_id, {self.select} "
+            f"FROM {self.base} {self.joins} WHERE {self.base}.admin_id IS NOT NULL AND {where}"
+        )
+
+    def insert(self, cursor, where, params=()):
+        columns = ", ".join(self.columns)
+        cursor.execute(f"INSERT INTO {self.table}(rowid, admin_id, {columns}) {self.source_sql(where)}", params)
+
+    def delete(self, cursor, where, params=()):
+        cursor.execute(f"DELETE FROM {self.table} WHERE rowid IN (SELECT id FROM {self.base} WHERE {where})", params)
+
+    def delete_ids(self, cursor, ids):
+        placeholders = ", ".join(["%s"] * len(ids))
+        cursor.execute(f"DELETE FROM {self.table} WHERE rowid IN ({placeholders})", list(ids))
+
+    def reindex(self, cursor, where, params=()):
+        self.delete(cursor, where, params)
+        self.insert(cursor, where, params)
+
+
+SEARCH_INDEXES = {
+    Book: SearchIndex(Book, ["title", "author"], "library_book.title, library_book.author"),
+    Member: SearchIndex(Member, ["name", "email"], "library_member.name, library_member.email"),
+    BorrowedBook: SearchIndex(
+        BorrowedBook,
+        ["title", "author", "member"],
+        "library_book.title, library_book.author, library_member.name",
+        "JOIN library_book ON library_book.id = library_borrowedbook.book_id "
+        "JOIN library_member ON library_member.id = library_borrowedbook.member_id",
+    ),
+    Transaction: SearchIndex(
+        Transaction,
+        ["member"],
+        "library_member.name",
+        "JOIN library_member ON library_member.id = library_transaction.member_id",
+    ),
+}
+
+# Whether the FTS5 tables exist, per database name. Checked once per process.
+_fts_tables_present = {}
+
+# Rows whose indexed text is copied from another model: {source model: [(model, foreign key column)]}
+JOINED_INDEXES = {
+    Book: [(BorrowedBook, "book_id")],
+    Member: [(BorrowedBook, "member_id"), (Transaction, "member_id")],
+}
+
+
+def search_enabled():
+    """
+    Returns True if the full-text index can be used on the default database.
+    The FTS5 tables only exist on SQLite builds that ship the FTS5 extension.
+    """
+    if not settings.LIBRARY_FULL_TEXT_SEARCH or connection.vendor != "sqlite":
+        return False
+
+    name = str(connection.settings_dict["NAME"])
+    if name not in _fts_tables_present:
+        _fts_tables_present[name] = SEARCH_INDEXES[Book].table in connection.introspection.table_names()
+    return _fts_tables_present[name]
+
+
+def build_match_query(query):
+    """
+    Turns free text into an FTS5 MATCH expression where every word is a quoted prefix term.
+    Returns None if the text has no searchable words.
+    """
+    terms = re.findall(r"\w+", query or "")
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def ranked_ids(model, admin, query, limit=SEARCH_CANDIDATES, offset=0, within=None):
+    """
+    Returns the primary keys of a librarian's rows matching `query`, best match first: `limit` of them,
+    skipping the first `offset`. `within`, a queryset of `model`, restricts the matches to its rows (e.g. the
+    overdue loans) in the same query, so its filters never push matches out of the limit.
+    """
+    match = build_match_query(query)
+    if match is None:
+        return []
+
+    index = SEARCH_INDEXES[model]
+    sql = f"SELECT rowid FROM {index.table} WHERE {index.table} MATCH %s AND admin_id = %s"
+    params = [match, admin.pk]
+    if within is not None:
+        subquery, subquery_params = within.order_by().values("pk").query.sql_with_params()
+        # The unary + keeps SQLite from handing the IN list to FTS5, which would run the MATCH once per id
+        sql += f" AND +rowid IN ({subquery})"
+        params += subquery_params
+    with connection.cursor() as cursor:
+        cursor.execute(f"{sql} ORDER BY rank LIMIT %s OFFSET %s", [*params, limit, offset])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_page(queryset, query, search_fields, admin, cursor=None):
+    """
+    Returns the page of `queryset` to display for a list view.
+    Without a query this is a keyset page. With a query, the rows matching it: with the full-text index,
+    best match first, paged with offset cursors since the rank has no keyset; without the index, rows
+    where one of `search_fields` contains the query, as a keyset page. `search_fields` are the fields
+    the view's index covers, so both paths find the same rows.
+    """
+    if not query:
+        return paginate(queryset, cursor)
+
+    if not search_enabled():
+        condition = Q()
+        for field in search_fields:
+            condition |= Q(**{f"{field}__icontains": query})
+        return paginate(queryset.filter(condition), cursor)
+
+    offset = decode_offset_cursor(cursor) if cursor else 0
+    if offset is None:
+        logger.warning("Invalid search cursor received, falling back to the first page.")
+        offset = 0
+
+    # The index is scoped to the librarian already: only narrower querysets (e.g. the overdue loans) are passed
+    # as `within`, whose IN list costs as much as the ranking itself on large tables.
+    scoped = queryset.query.where == queryset.model._default_manager.filter(admin=admin).query.where
+    page_size = settings.LIBRARY_PAGE_SIZE
+    ids = ranked_ids(
+        queryset.model, admin, query, limit=page_size + 1, offset=offset, within=None if scoped else queryset
+    )
+    rows = queryset.in_bulk(ids[:page_size])
+    items = [rows[pk] for pk in ids[:page_size] if pk in rows]
+    next_cursor = encode_offset_cursor(offset + page_size) if len(ids) > page_size else None
+    previous_cursor = encode_offset_cursor(max(offset - page_size, 0)) if offset else None
+    return KeysetPage(items, next_cursor, previous_cursor, offset)
+
+
+def prefix_matches(queryset, query, prefix_fields, admin, limit=AUTOCOMPLETE_RESULTS):
+    """
+    Returns up to `limit` rows of `queryset` for an autocomplete lookup, without loading the others.
+    With the full-text index, every word of the query is a prefix term matched against the index's
+    prefix tables, best match first. Without it, rows where one of `prefix_fields` starts with the query,
+    in the order of the first field; PostgreSQL has indexes for these lookups (migration 0007).
+    """
+    if not query or not query.strip():
+        return []
+
+    if not search_enabled():
+        condition = Q()
+        for field in prefix_fields:
+            condition |= Q(**{f"{field}__istartswith": query.strip()})
+        return list(queryset.filter(condition).order_by(prefix_fields[0], "pk")[:limit])
+
+    ids = ranked_ids(queryset.model, admin, query, limit=limit, within=queryset)
+    rows = queryset.in_bulk(ids)
+    return [rows[pk] for pk in ids if pk in rows]
+
+
+def index_objects(model, ids):
+    """
+    Adds or refreshes the index rows of the given objects, and of rows that copy their text.
+    """
+    if not ids or not search_enabled():
+        return
+
+    ids = list(ids)
+    placeholders = ", ".join(["%s"] * len(ids))
+    with connection.cursor() as cursor:
+        index = SEARCH_INDEXES[model]
+        index.reindex(cursor, f"{index.base}.id IN ({placeholders})", ids)
+        for joined_model, column in JOINED_INDEXES.get(model, []):
+            joined = SEARCH_INDEXES[joined_model]
+            joined.reindex(cursor, f"{joined.base}.{column} IN ({placeholders})", ids)
+
+
+def remove_objects(model, ids):
+    """
+    Removes the index rows of deleted objects.
+    """
+    if not ids or not search_enabled():
+        return
+
+    with connection.cursor() as cursor:
+        SEARCH_INDEXES[model].delete_ids(cursor, ids)
+
+
+def rebuild_search_index():
+    """
+    Repopulates every full-text table from the model tables.
+    """
+    with connection.cursor() as cursor:
+        for index in SEARCH_INDEXES.values():
+            cursor.execute(f"DELETE FROM {index.table}")
+            index.insert(cursor, "1 = 1")
+            cursor.execute(f"INSERT INTO {index.table}({index.table}) VALUES ('optimize')")
@@ -1,12 +1,229 @@
-from django.db.models.signals import pre_save
-from django.dispatch import receiver
+from collections import defaultdict
 
-from library.models import BorrowedBook
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from library.cache import bump_generation
+from library.ledger import record_entries
+from library.models import Book, BorrowedBook, LedgerEntry, LibraryStats, Member, Transaction
+from library.overdue import loan_charge
+from users.models import Librarian
+from library.search import index_objects, remove_objects
+from library.stats import apply_stats_delta, loan_contribution, payment_contribution
+
+# Sent with `instances` after rows are written with bulk_create(), which skips the per-row model signals.
+bulk_created = Signal()
+
+STATS_CONTRIBUTIONS = {
+    BorrowedBook: loan_contribution,
+    Transaction: payment_contribution,
+}
+
+STATS_COUNTERS = {
+    Member: "total_members",
+    Book: "total_books",
+}
+
+# Fields whose values end up in the full-text index, directly or through joined rows.
+SEARCH_TEXT_FIELDS = {
+    Book: ("admin_id", "title", "author"),
+    Member: ("admin_id", "name", "email"),
+}
+
+
+@receiver(pre_save, sender=BorrowedBook)
+def clear_overdue_flag(sender, instance, **kwargs):
+    """
+    A loan stops being overdue once it is returned or its return date is moved to today or later.
+    Loans only become overdue through the sweep_overdue command.
+    """
+    return_date = sender._meta.get_field("return_date").to_python(instance.return_date)
+    if instance.returned or return_date >= timezone.now().date():
+        instance.is_overdue = False
 
 
 @receiver(pre_save, sender=BorrowedBook)
-def update_book_quantity_on_borrowing(sender, instance, **kwargs):
-    if instance.book.quantity > 1:
-        instance.book.status = "available"
+@receiver(pre_save, sender=Transaction)
+def remember_stats_contribution(sender, instance, **kwargs):
+    """
+    Stores what the row contributed to the stats (and, for loans, to the member's amount due)
+    before this save, so post_save can apply the difference.
+    """
+    instance._stats_before = (None, {})
+    instance._charge_before = (None, 0, False)
+    if instance.pk:
+        previous = sender.objects.filter(pk=instance.pk).first()
+        if previous:
+            instance._stats_before = (previous.admin_id, STATS_CONTRIBUTIONS[sender](previous))
+            if sender is BorrowedBook:
+                instance._charge_before = (previous.member_id, loan_charge(previous), previous.returned)
+
+
+@receiver(post_save, sender=BorrowedBook)
+@receiver(post_save, sender=Transaction)
+def update_stats_on_save(sender, instance, **kwargs):
+    previous_admin_id, before = getattr(instance, "_stats_before", (None, {}))
+    after = STATS_CONTRIBUTIONS[sender](instance)
+
+    if previous_admin_id == instance.admin_id:
+        fields = set(before) | set(after)
+        apply_stats_delta(instance.admin_id, **{field: after.get(field, 0) - before.get(field, 0) for field in fields})
     else:
-        instance.book.status = "not-available"
+        apply_stats_delta(previous_admin_id, **{field: -value for field, value in before.items()})
+        apply_stats_delta(instance.admin_id, **after)
+
+
+@receiver(post_delete, sender=BorrowedBook)
+@receiver(post_delete, sender=Transaction)
+def update_stats_on_delete(sender, instance, **kwargs):
+    before = STATS_CONTRIBUTIONS[sender](instance)
+    apply_stats_delta(instance.admin_id, **{field: -value for field, value in before.items()})
+
+
+def _deleted_with_member(origin):
+    """
+    True when a row is deleted through the cascade of its member or librarian, whose balance goes with it.
+    """
+    model = getattr(origin, "model", type(origin))
+    return isinstance(model, type) and issubclass(model, (Member, Librarian))
+
+
+def _adjustment(instance, member_id, amount, **kwargs):
+    return LedgerEntry(admin_id=instance.admin_id, member_id=member_id, kind="adjustment", amount=amount, **kwargs)
+
+
+@receiver(post_save, sender=BorrowedBook)
+def update_amount_due_on_save(sender, instance, **kwargs):
+    """
+    Records an adjustment when editing a loan changes what it charges the member, e.g. its fine
+    or return date. Returns are settled by lending.return_book, which knows whether the fine was paid.
+    """
+    previous_member_id, before, previously_returned = getattr(instance, "_charge_before", (None, 0, False))
+    if instance.returned and not previously_returned:
+        return
+
+    after = loan_charge(instance)
+    if previous_member_id in (None, instance.member_id):
+        entries = [_adjustment(instance, instance.member_id, after - before, borrowed_book=instance)]
+    else:
+        entries = [
+            _adjustment(instance, previous_member_id, -before, borrowed_book=instance),
+            _adjustment(instance, instance.member_id, after, borrowed_book=instance),
+        ]
+    record_entries(entries)
+
+
+@receiver(post_delete, sender=BorrowedBook)
+def update_amount_due_on_delete(sender, instance, origin=None, **kwargs):
+    if not _deleted_with_member(origin):
+        record_entries([_adjustment(instance, instance.member_id, -loan_charge(instance))])
+
+
+@receiver(post_delete, sender=Transaction)
+def update_amount_due_on_payment_delete(sender, instance, origin=None, **kwargs):
+    """
+    A deleted payment no longer settles anything, so the member owes its amount again.
+    """
+    if not _deleted_with_member(origin):
+        record_entries([_adjustment(instance, instance.member_id, instance.amount)])
+
+
+@receiver(bulk_created, sender=BorrowedBook)
+@receiver(bulk_created, sender=Transaction)
+@receiver(bulk_created, sender=Member)
+@receiver(bulk_created, sender=Book)
+def update_stats_on_bulk_create(sender, instances, **kwargs):
+    deltas = defaultdict(lambda: defaultdict(int))
+    for instance in instances:
+        if sender in STATS_COUNTERS:
+            deltas[instance.admin_id][STATS_COUNTERS[sender]] += 1
+            continue
+        for field, value in STATS_CONTRIBUTIONS[sender](instance).items():
+            deltas[instance.admin_id][field] += value
+
+    for admin_id, fields in deltas.items():
+        apply_stats_delta(admin_id, **fields)
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_save, sender=Book)
+def update_counter_on_create(sender, instance, created, **kwargs):
+    if created:
+        apply_stats_delta(instance.admin_id, **{STATS_COUNTERS[sender]: 1})
+
+
+@receiver(post_delete, sender=Member)
+@receiver(post_delete, sender=Book)
+def update_counter_on_delete(sender, instance, **kwargs):
+    apply_stats_delta(instance.admin_id, **{STATS_COUNTERS[sender]: -1})
+
+
+@receiver(pre_save, sender=Book)
+@receiver(pre_save, sender=Member)
+def remember_search_text(sender, instance, **kwargs):
+    """
+    Stores the indexed text before this save, so unchanged rows (e.g. quantity updates) skip reindexing.
+    """
+    instance._search_text_before = None
+    if instance.pk:
+        instance._search_text_before = (
+            sender.objects.filter(pk=instance.pk).values_list(*SEARCH_TEXT_FIELDS[sender]).first()
+        )
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_save, sender=Member)
+@receiver(post_save, sender=BorrowedBook)
+@receiver(post_save, sender=Transaction)
+def update_search_index(sender, instance, created, **kwargs):
+    if sender in SEARCH_TEXT_FIELDS and not created:
+        current = tuple(getattr(instance, field) for field in SEARCH_TEXT_FIELDS[sender])
+        if current == getattr(instance, "_search_text_before", None):
+            return
+    index_objects(sender, [instance.pk])
+
+
+@receiver(post_delete, sender=Book)
+@receiver(post_delete, sender=Member)
+@receiver(post_delete, sender=BorrowedBook)
+@receiver(post_delete, sender=Transaction)
+def remove_from_search_index(sender, instance, **kwargs):
+    remove_objects(sender, [instance.pk])
+
+
+@receiver(bulk_created)
+def update_search_index_on_bulk_create(sender, instances, **kwargs):
+    index_objects(sender, [instance.pk for instance in instances])
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_save, sender=Member)
+@receiver(post_save, sender=BorrowedBook)
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Book)
+@receiver(post_delete, sender=Member)
+@receiver(post_delete, sender=BorrowedBook)
+@receiver(post_delete, sender=Transaction)
+def invalidate_cached_results(sender, instance, **kwargs):
+    bump_generation(instance.admin_id, sender)
+    previous_admin_id, _ = getattr(instance, "_stats_before", (None, {}))
+    if previous_admin_id not in (None, instance.admin_id):
+        bump_generation(previous_admin_id, sender)
+
+
+@receiver(bulk_created)
+def invalidate_cached_results_on_bulk_create(sender, instances, **kwargs):
+    for admin_id in {instance.admin_id for instance in instances}:
+        bump_generation(admin_id, sender)
+
+
+@receiver(post_save, sender=Librarian)
+@receiver(post_delete, sender=Librarian)
+def invalidate_librarian_results(sender, instance, created=True, **kwargs):
+    """
+    Primary keys can be reused after a librarian is deleted, so a new or deleted librarian
+    must never see results cached under the same id.
+    """
+    if created:
+        bump_generation(instance.pk, Book, Member, BorrowedBook, Transaction, LibraryStats)
@@ -0,0 +1,179 @@
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Count, F, DecimalField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from users.models import Librarian
+
+from .cache import bump_generation
+from .events import publish_stats_delta, stats_event
+from .models import Book, BorrowedBook, LibraryStats, Member, Transaction
+
+STATS_FIELDS = (
+    "total_members",
+    "total_books",
+    "total_borrowed_books",
+    "total_overdue_books",
+    "total_amount",
+    "overdue_amount",
+)
+
+ZERO_AMOUNT = Value(Decimal("0.00"), output_field=DecimalField(max_digits=10, decimal_places=2))
+
+
+def _per_admin(queryset, aggregate, output_field):
+    """
+    Wraps an aggregate over `queryset` as a scalar subquery correlated on the librarian row,
+    so several tables can be aggregated in a single SELECT.
+    """
+    return Subquery(
+        queryset.filter(admin=OuterRef("pk")).order_by().values("admin").annotate(value=aggregate).values("value"),
+        output_field=output_field,
+    )
+
+
+def get_dashboard_stats(admin):
+    """
+    Computes the dashboard figures for a librarian with database-side aggregation.
+    Returns a dict with:
+        - total_members, total_books, total_borrowed_books, total_overdue_books
+        - total_amount, overdue_amount
+    All six figures come from one query; recently added books are fetched by the view.
+    """
+    amount_field = DecimalField(max_digits=10, decimal_places=2)
+    borrowed = BorrowedBook.objects.filter(returned=False)
+    overdue = borrowed.filter(is_overdue=True)
+
+    stats = (
+        Librarian.objects.filter(pk=admin.pk)
+        .annotate(
+            total_members=Coalesce(_per_admin(Member.objects, Count("pk"), IntegerField()), 0),
+            total_books=Coalesce(_per_admin(Book.objects, Count("pk"), IntegerField()), 0),
+            total_borrowed_books=Coalesce(_per_admin(borrowed, Count("pk"), IntegerField()), 0),
+            total_overdue_books=Coalesce(_per_admin(overdue, Count("pk"), IntegerField()), 0),
+            total_amount=Coalesce(_per_admin(Transaction.objects, Sum("amount"), amount_field), ZERO_AMOUNT),
+            overdue_amount=Coalesce(_per_admin(overdue, Sum("fine"), amount_field), ZERO_AMOUNT),
+        )
+        .values(*STATS_FIELDS)
+        .first()
+    )
+
+    return stats
+
+
+def rebuild_library_stats(admin):
+    """
+    Recomputes the LibraryStats row of a librarian from the underlying tables.
+    Used to create missing rows and to repair drift. An existing row is updated in place and its version
+    incremented, never reset, and the repair is published like the changes of apply_stats_delta, so open
+    pages and the cached badges show the repaired counts.
+    """
+    figures = get_dashboard_stats(admin)
+    previous = LibraryStats.objects.filter(admin_id=admin.pk).values(*STATS_FIELDS).first()
+    stats, _ = LibraryStats.objects.update_or_create(
+        admin_id=admin.pk, defaults={**figures, "version": F("version") + 1}, create_defaults=figures
+    )
+    stats.refresh_from_db(fields=["version"])
+    bump_generation(admin.pk, LibraryStats)
+
+    deltas = {field: figures[field] - (previous[field] if previous else 0) for field in STATS_FIELDS}
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    state = badge_state(admin.pk) if stats_event(deltas) is not None else None
+    publish_stats_delta(admin.pk, deltas, state, repair=True)
+    return stats
+
+
+def get_library_stats(admin):
+    """
+    Returns the dashboard figures of a librarian as a dict, read from the LibraryStats row.
+    The row is rebuilt from scratch the first time it is requested.
+    """
+    stats = LibraryStats.objects.filter(admin_id=admin.pk).first()
+    if stats is None:
+        with transaction.atomic():
+            stats = rebuild_library_stats(admin)
+
+    return {field: getattr(stats, field) for field in STATS_FIELDS}
+
+
+async def aget_library_stats(admin):
+    """
+    Async counterpart of get_library_stats, for async views.
+    """
+    stats = await LibraryStats.objects.filter(admin_id=admin.pk).values(*STATS_FIELDS).afirst()
+    if stats is None:
+        stats = await sync_to_async(get_library_stats)(admin)
+
+    return stats
+
+
+def badge_state(admin_id):
+    """
+    Returns the sidebar badge counts of a librarian with the version of their LibraryStats row, read
+    together: {"lent": ..., "overdue": ..., "version": ...}, or None if the librarian has no row yet.
+    """
+    row = (
+        LibraryStats.objects.filter(admin_id=admin_id)
+        .values("total_borrowed_books", "total_overdue_books", "version")
+        .first()
+    )
+    if row is None:
+        return None
+    return {"lent": row["total_borrowed_books"], "overdue": row["total_overdue_books"], "version": row["version"]}
+
+
+async def abadge_state(admin):
+    """
+    Async badge_state for the events stream, building the LibraryStats row the first time.
+    """
+    state = await sync_to_async(badge_state)(admin.pk)
+    if state is None:
+        await sync_to_async(get_library_stats)(admin)
+        state = await sync_to_async(badge_state)(admin.pk)
+    return state
+
+
+def apply_stats_delta(admin_id, **deltas):
+    """
+    Adds the given deltas to a librarian's counters, and increments the row's version, with a single
+    UPDATE using F() expressions. If the librarian has no LibraryStats row yet the deltas are dropped;
+    the row is rebuilt from the tables on the next read.
+    The change is published to the librarian's open pages once the transaction commits (see events),
+    with the badge counts read right after the UPDATE, in the same transaction.
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if admin_id is None or not deltas:
+        return
+
+    updated = LibraryStats.objects.filter(admin_id=admin_id).update(
+        version=F("version") + 1, **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+    state = badge_state(admin_id) if updated and stats_event(deltas) is not None else None
+    publish_stats_delta(admin_id, deltas, state)
+
+
+def loan_contribution(borrowed_book):
+    """
+    Returns the counters a BorrowedBook row contributes to its librarian's stats.
+    A loan counts as overdue once the sweep_overdue command has flagged it, until it is returned.
+    """
+    if borrowed_book.returned:
+        return {}
+
+    fine = BorrowedBook._meta.get_field("fine").to_python(borrowed_book.fine)
+    overdue = borrowed_book.is_overdue
+
+    return {
+        "total_borrowed_books": 1,
+        "total_overdue_books": 1 if overdue else 0,
+        "overdue_amount": fine if overdue else 0,
+    }
+
+
+def payment_contribution(payment):
+    """
+    Returns the counters a Transaction row contributes to its librarian's stats.
+    """
+    return {"total_amount": Transaction._meta.get_field("amount").to_python(payment.amount)}
@@ -0,0 +1,25 @@
+"""
+The project's URLs with the async views of the dashboard and list pages, as served under ASGI
+(see library.urls.page_path). Earlier patterns win, so the other pages are the project's own.
+"""
+from django.urls import path
+
+from core.urls import urlpatterns as project_urlpatterns
+from library.views import (
+    AsyncBooksListView,
+    AsyncHomeView,
+    AsyncLentBooksListView,
+    AsyncListPaymentsView,
+    AsyncMembersListView,
+    AsyncOverdueBooksView,
+)
+
+urlpatterns = [
+    path("", AsyncHomeView.as_view(), name="home"),
+    path("members/", AsyncMembersListView.as_view(), name="members"),
+    path("books/", AsyncBooksListView.as_view(), name="books"),
+    path("lent-books/", AsyncLentBooksListView.as_view(), name="lent-books"),
+    path("payments/", AsyncListPaymentsView.as_view(), name="payments"),
+    path("overdue-books/", AsyncOverdueBooksView.as_view(), name="overdue-books"),
+    *project_urlpatterns,
+]
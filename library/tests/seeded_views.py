@@ -0,0 +1,155 @@
+import time
+from datetime import timedelta
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from library.models import Book, BorrowedBook, Member, Transaction
+from library.stats import rebuild_library_stats
+from users.models import Librarian
+
+# Rows of each kind per librarian: enough for a query per row to stand out from a query per page.
+SEEDED_ROWS = 8
+
+
+class SeededViewsMixin:
+    """
+    Seeds two librarians with members, books, loans (half of them overdue) and payments,
+    and lists a request for every view of library/urls.py and users/urls.py (see view_requests).
+    Used by the query plan and query budget tests.
+    """
+
+    def seed(self):
+        self.user = Librarian.objects.create_user(email="test@gmail.com", password="password", is_staff=True)
+        self.other_user = Librarian.objects.create_user(email="other@gmail.com", password="password")
+        today = timezone.now().date()
+        for admin in (self.user, self.other_user):
+            members = [
+                Member.objects.create(name=f"Member {index}", email=f"m{index}.{admin.pk}@gmail.com", admin=admin)
+                for index in range(SEEDED_ROWS)
+            ]
+            books = [
+                Book.objects.create(
+                    title=f"Book {index}", author="Author", category="Programming", quantity=5, admin=admin
+                )
+                for index in range(SEEDED_ROWS)
+            ]
+            for index, (member, book) in enumerate(zip(members, books)):
+                BorrowedBook.objects.create(
+                    member=member,
+                    book=book,
+                    return_date=today + timedelta(days=7 if index % 2 else -7),
+                    fine=2,
+                    is_overdue=not index % 2,
+                    admin=admin,
+                )
+                Transaction.objects.create(member=member, amount=5, payment_method="Cash", admin=admin)
+            rebuild_library_stats(admin)  # As after a first visit of the dashboard; the counters are kept from then on
+
+        self.member = Member.objects.filter(admin=self.user).first()
+        self.book = Book.objects.filter(admin=self.user).first()
+        self.loan = BorrowedBook.objects.filter(admin=self.user).first()
+        self.payment = Transaction.objects.filter(admin=self.user).first()
+        self.client.force_login(self.user)
+
+    def run_request(self, method, url, data=None):
+        """
+        Requests `url` and returns the (sql, params) of every statement it ran and its wall time in seconds.
+        Each request is rolled back so mutating views all see the same seeded data, and the client is
+        logged in again afterwards in case the request logged it out.
+        """
+        statements = []
+
+        def record(execute, sql, params, many, context):
+            statements.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with transaction.atomic():
+            with connection.execute_wrapper(record):
+                started = time.perf_counter()
+                response = getattr(self.client, method)(url, data or {})
+                if response.streaming:
+                    b"".join(response.streaming_content)
+                elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+
+        self.client.force_login(self.user)
+        return statements, elapsed
+
+    def view_requests(self):
+        """
+        Yields (URL name, label, method, url, data) for one or more requests per view.
+        The label identifies the request, e.g. "POST members (search)".
+        """
+        pk_urls = {
+            "update-member": self.member,
+            "delete-member": self.member,
+            "lend-member-book": self.member,
+            "update-book": self.book,
+            "delete-book": self.book,
+            "edit-borrowed-book": self.loan,
+            "delete-borrowed-book": self.loan,
+            "return-book": self.loan,
+            "return-book-fine": self.loan,
+            "delete-payment": self.payment,
+        }
+        for name in ("home", "add-member", "members", "add-book", "books", "lend-book", "lent-books", "payments",
+                     "overdue-books", "import-catalogue", "events", "metrics", "profiles", "login", "register"):
+            yield name, f"GET {name}", "get", reverse(name), None
+        for name, obj in pk_urls.items():
+            yield name, f"GET {name}", "get", reverse(name, kwargs={"pk": obj.pk}), None
+        yield "profile", "GET profile (unknown)", "get", reverse("profile", kwargs={"name": "unknown.prof"}), None
+        for name in ("members", "books", "lent-books", "payments", "overdue-books"):
+            yield name, f"POST {name} (search)", "post", reverse(name), {"query": "member"}
+        for kind in ("members", "books"):
+            yield "autocomplete", f"GET autocomplete ({kind})", "get", reverse("autocomplete", kwargs={"kind": kind}), {
+                "q": "m"
+            }
+        for kind in ("members", "books", "loans", "payments"):
+            yield "export", f"GET export ({kind})", "get", reverse("export", kwargs={"kind": kind}), None
+        cursor_page = self.client.get(reverse("members")).context["page"]
+        yield "members", "GET members (next page)", "get", reverse("members"), {"cursor": cursor_page.next_cursor or ""}
+        yield "add-member", "POST add-member", "post", reverse("add-member"), {"name": "New Member", "email": "new@gmail.com"}
+        yield "update-member", "POST update-member", "post", reverse("update-member", kwargs={"pk": self.member.pk}), {
+            "name": "Renamed",
+            "email": "r@gmail.com",
+        }
+        yield "add-book", "POST add-book", "post", reverse("add-book"), {
+            "title": "New Book",
+            "author": "Author",
+            "category": "Programming",
+            "quantity": 2,
+            "borrowing_fee": 1,
+        }
+        yield "import-catalogue", "POST import-catalogue", "post", reverse("import-catalogue"), {
+            "kind": "members",
+            "file": SimpleUploadedFile("members.csv", b"name,email\nNew Member,new@gmail.com\nDuplicate,m0.1@gmail.com\n"),
+        }
+        next_week = (timezone.now().date() + timedelta(days=7)).isoformat()
+        yield "lend-member-book", "POST lend-member-book", "post", reverse(
+            "lend-member-book", kwargs={"pk": self.member.pk}
+        ), {"book": self.book.pk, "return_date": next_week, "fine": 0, "payment_method": "Cash"}
+        yield "lend-book", "POST lend-book", "post", reverse("lend-book"), {
+            "member": self.member.pk,
+            "book": self.book.pk,
+            "return_date": next_week,
+            "fine": 0,
+            "payment_method": "Cash",
+        }
+        yield "edit-borrowed-book", "POST edit-borrowed-book", "post", reverse(
+            "edit-borrowed-book", kwargs={"pk": self.loan.pk}
+        ), {"return_date": next_week, "fine": 3}
+        yield "return-book-fine", "POST return-book-fine", "post", reverse(
+            "return-book-fine", kwargs={"pk": self.loan.pk}
+        ), {"payment_method": "Cash"}
+        yield "login", "POST login", "post", reverse("login"), {"email": "test@gmail.com", "password": "password"}
+        yield "register", "POST register", "post", reverse("register"), {
+            "email": "new@gmail.com",
+            "first_name": "New",
+            "last_name": "Librarian",
+            "password": "a-Long-password-1",
+            "repeat_password": "a-Long-password-1",
+        }
+        yield "logout", "GET logout", "get", reverse("logout"), None
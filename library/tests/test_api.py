@@ -0,0 +1,209 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from library.inventory import release_copies
+from library.models import Book, BorrowedBook, Member, Transaction
+from users.models import Librarian
+
+
+class TestApi(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = Librarian.objects.create_user(email="test@gmail.com", password="password")
+        self.other_user = Librarian.objects.create_user(email="other@gmail.com", password="password")
+        self.member = Member.objects.create(name="John Doe", email="member@gmail.com", admin=self.user)
+        self.books = [
+            Book.objects.create(
+                title=f"Book {index}", author="Author", category="Programming", quantity=2, borrowing_fee=10, admin=self.user
+            )
+            for index in range(3)
+        ]
+        Book.objects.create(title="Not mine", author="Author", category="Other", quantity=1, admin=self.other_user)
+        self.client.force_login(self.user)
+        self.next_week = (timezone.now().date() + timedelta(days=7)).isoformat()
+
+    def post_json(self, name, body):
+        return self.client.post(reverse(name), json.dumps(body), content_type="application/json")
+
+    def test_requires_authentication(self):
+        self.client.logout()
+
+        response = self.client.get(reverse("api-list", kwargs={"kind": "books"}))
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {"error": "Authentication required."})
+
+    def test_list_is_scoped_to_the_librarian(self):
+        response = self.client.get(reverse("api-list", kwargs={"kind": "books"}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([book["title"] for book in response.json()["results"]], ["Book 2", "Book 1", "Book 0"])
+
+    def test_sparse_fields(self):
+        response = self.client.get(reverse("api-list", kwargs={"kind": "books"}), {"fields": "id,title"})
+
+        self.assertEqual(response.json()["results"][0], {"id": self.books[2].pk, "title": "Book 2"})
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(reverse("api-list", kwargs={"kind": "books"}), {"fields": "title,password"})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Unknown fields: password."})
+
+    def test_unknown_resource(self):
+        self.assertEqual(self.client.get(reverse("api-list", kwargs={"kind": "librarians"})).status_code, 404)
+
+    def test_cursor_pagination(self):
+        url = reverse("api-list", kwargs={"kind": "books"})
+        first = self.client.get(url, {"limit": 2, "fields": "title"}).json()
+        second = self.client.get(url, {"limit": 2, "fields": "title", "cursor": first["next"]}).json()
+
+        self.assertEqual(first["results"], [{"title": "Book 2"}, {"title": "Book 1"}])
+        self.assertEqual(second["results"], [{"title": "Book 0"}])
+        self.assertIsNone(second["next"])
+        back = self.client.get(url, {"limit": 2, "fields": "title", "cursor": second["previous"]}).json()
+        self.assertEqual(back["results"], first["results"])
+
+    def test_invalid_limit(self):
+        response = self.client.get(reverse("api-list", kwargs={"kind": "books"}), {"limit": 100000})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_detail(self):
+        response = self.client.get(reverse("api-detail", kwargs={"kind": "members", "pk": self.member.pk}))
+
+        self.assertEqual(response.json()["email"], "member@gmail.com")
+        other = Book.objects.get(admin=self.other_user)
+        self.assertEqual(self.client.get(reverse("api-detail", kwargs={"kind": "books", "pk": other.pk})).status_code, 404)
+
+    def test_unchanged_collection_returns_304_with_one_query(self):
+        url = reverse("api-list", kwargs={"kind": "loans"})
+        etag = self.client.get(url)["ETag"]
+
+        # session + user lookup + the version of the rows
+        with self.assertNumQueries(3):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_does_not_depend_on_the_cache(self):
+        url = reverse("api-list", kwargs={"kind": "books"})
+        etag = self.client.get(url)["ETag"]
+
+        cache.clear()  # Another worker, with caches of its own
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Book.objects.filter(pk=self.books[0].pk).delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_bulk_updates_change_the_etag(self):
+        url = reverse("api-list", kwargs={"kind": "books"})
+        etag = self.client.get(url)["ETag"]
+
+        release_copies([self.books[1].pk])
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_changed_collection_gets_a_new_etag(self):
+        url = reverse("api-list", kwargs={"kind": "loans"})
+        etag = self.client.get(url)["ETag"]
+
+        self.member.name = "Jane Doe"
+        self.member.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_batch_lend(self):
+        response = self.post_json(
+            "api-lend",
+            {
+                "member": self.member.pk,
+                "books": [self.books[0].pk, self.books[1].pk],
+                "return_date": self.next_week,
+                "fine": "5.00",
+                "payment_method": "Cash",
+            },
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()["loans"]), 2)
+        self.assertEqual(response.json()["payment"]["amount"], "20.00")
+        self.assertEqual(BorrowedBook.objects.filter(member=self.member).count(), 2)
+        self.assertEqual(Book.objects.get(pk=self.books[0].pk).quantity, 1)
+
+    def test_kiosk_login_flow(self):
+        # What a kiosk without a browser does: fetch the CSRF cookie, log in, then send it back with each POST
+        Librarian.objects.filter(pk=self.user.pk).update(is_staff=True)
+        kiosk = Client(enforce_csrf_checks=True)
+        kiosk.get(reverse("login"))
+        token = kiosk.cookies["csrftoken"].value
+        response = kiosk.post(
+            reverse("login"), {"email": "test@gmail.com", "password": "password", "csrfmiddlewaretoken": token}
+        )
+        self.assertEqual(response.status_code, 302)
+
+        body = json.dumps({"loans": [], "payment_method": "Cash"})
+        url = reverse("api-return")
+        self.assertEqual(kiosk.post(url, body, content_type="application/json").status_code, 403)
+        token = kiosk.cookies["csrftoken"].value
+        response = kiosk.post(url, body, content_type="application/json", HTTP_X_CSRFTOKEN=token)
+        self.assertEqual(response.status_code, 200)
+
+    def test_batch_lend_is_all_or_nothing(self):
+        other = Book.objects.get(admin=self.other_user)
+
+        response = self.post_json(
+            "api-lend",
+            {
+                "member": self.member.pk,
+                "books": [self.books[0].pk, other.pk],
+                "return_date": self.next_week,
+                "fine": "5.00",
+                "payment_method": "Cash",
+            },
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Invalid book selected."})
+        self.assertFalse(BorrowedBook.objects.exists())
+
+    def test_batch_lend_validates_the_body(self):
+        response = self.post_json("api-lend", {"member": self.member.pk, "books": [self.books[0].pk]})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("return_date", response.json()["fields"])
+        self.assertEqual(self.client.post(reverse("api-lend"), "{", content_type="application/json").status_code, 400)
+
+    def test_batch_return(self):
+        on_time = BorrowedBook.objects.create(
+            member=self.member, book=self.books[0], return_date=self.next_week, fine=5, admin=self.user
+        )
+        late = BorrowedBook.objects.create(
+            member=self.member,
+            book=self.books[1],
+            return_date=timezone.now().date() - timedelta(days=1),
+            fine=5,
+            admin=self.user,
+        )
+
+        response = self.post_json("api-return", {"loans": [on_time.pk, late.pk, 999999]})
+
+        results = {result["id"]: result for result in response.json()["results"]}
+        self.assertEqual(results[on_time.pk], {"id": on_time.pk, "returned": True, "payment": None})
+        self.assertIn("payment_method is required", results[late.pk]["error"])
+        self.assertEqual(results[999999], {"id": 999999, "error": "Not found."})
+
+        response = self.post_json("api-return", {"loans": [late.pk, on_time.pk], "payment_method": "Cash"})
+
+        results = {result["id"]: result for result in response.json()["results"]}
+        self.assertEqual(results[late.pk]["payment"]["amount"], "5.00")
+        self.assertEqual(results[on_time.pk]["error"], "This book has already been returned.")
+        self.assertEqual(Transaction.objects.get().amount, Decimal("5.00"))
@@ -0,0 +1,63 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import resolve, reverse
+
+from library.models import Book, Member
+from users.models import Librarian
+
+
+@override_settings(ROOT_URLCONF="library.tests.async_urls")
+class TestAsyncViews(TestCase):
+    """
+    Drives the async views through the ASGI handler, where any synchronous query from the
+    event loop raises SynchronousOnlyOperation.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = Librarian.objects.create_user(
+            email="test@gmail.com", password="password", first_name="Ada", last_name="Lovelace"
+        )
+        self.member = Member.objects.create(name="John Doe", email="member@gmail.com", admin=self.user)
+        Book.objects.create(title="Test Title", author="Test Author", category="Programming", quantity=2, admin=self.user)
+
+    async def test_dashboard(self):
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(reverse("home"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["total_books"], 1)
+        self.assertEqual([book.title for book in response.context["recently_added_books"]], ["Test Title"])
+        self.assertContains(response, "Ada Lovelace")
+
+    async def test_list_views(self):
+        await self.async_client.aforce_login(self.user)
+
+        for name in ("members", "books", "lent-books", "payments", "overdue-books"):
+            with self.subTest(name=name):
+                response = await self.async_client.get(reverse(name))
+                self.assertEqual(response.status_code, 200)
+
+    async def test_search(self):
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.post(reverse("books"), {"query": "Test"})
+
+        self.assertEqual([book.title for book in response.context["books"]], ["Test Title"])
+
+    async def test_views_are_async(self):
+        for name in ("home", "members", "books", "lent-books", "payments", "overdue-books"):
+            with self.subTest(name=name):
+                self.assertTrue(resolve(reverse(name)).func.view_class.view_is_async)
+
+    def test_wsgi_serves_the_sync_views(self):
+        with override_settings(ROOT_URLCONF="core.urls"):
+            self.assertFalse(resolve(reverse("home")).func.view_class.view_is_async)
+            self.assertFalse(resolve(reverse("books")).func.view_class.view_is_async)
+
+    async def test_login_required(self):
+        response = await self.async_client.get(reverse("books"))
+
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse("login"), response.url)
@@ -0,0 +1,119 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from library.forms import LendBookForm
+from library.models import Book, Member
+from library.search import rebuild_search_index
+from users.models import Librarian
+
+
+class TestAutocomplete(TestCase):
+    def setUp(self):
+        self.user = Librarian.objects.create_user(email="test@gmail.com", password="password")
+        other = Librarian.objects.create_user(email="other@gmail.com", password="password")
+        self.book = Book.objects.create(
+            title="Python Tricks", author="Dan Bader", category="Programming", quantity=2, admin=self.user
+        )
+        Book.objects.create(title="Pythonic Code", author="Someone", category="Programming", quantity=0, admin=self.user)
+        Book.objects.create(title="Python Crash Course", author="Eric", category="Programming", quantity=1, admin=other)
+        Book.objects.create(title="Clean Code", author="Robert Martin", category="Programming", quantity=1, admin=self.user)
+        self.member = Member.objects.create(name="John Doe", email="john@gmail.com", admin=self.user)
+        Member.objects.create(name="Jane Roe", email="jane@gmail.com", admin=other)
+        rebuild_search_index()
+        self.client.force_login(self.user)
+
+    def lookup(self, kind, query):
+        response = self.client.get(reverse("autocomplete", kwargs={"kind": kind}), {"q": query})
+        self.assertEqual(response.status_code, 200)
+        return response.json()["results"]
+
+    def test_books_in_stock_of_the_librarian(self):
+        self.assertEqual(self.lookup("books", "pyth"), [{"id": self.book.pk, "text": "Python Tricks by Dan Bader"}])
+        self.assertEqual([result["text"] for result in self.lookup("books", "rob")], ["Clean Code by Robert Martin"])
+
+    def test_members(self):
+        self.assertEqual(self.lookup("members", "jo"), [{"id": self.member.pk, "text": "John Doe"}])
+        self.assertEqual(self.lookup("members", "ja"), [])
+
+    @override_settings(LIBRARY_FULL_TEXT_SEARCH=False)
+    def test_prefix_lookups_without_the_index(self):
+        self.assertEqual([result["id"] for result in self.lookup("books", "PYTH")], [self.book.pk])
+        self.assertEqual([result["id"] for result in self.lookup("members", "john@")], [self.member.pk])
+        self.assertEqual(self.lookup("books", "code"), [])  # Prefixes of the fields, not of every word
+
+    def test_empty_query(self):
+        with self.assertNumQueries(2):  # Session and user
+            self.assertEqual(self.lookup("books", " "), [])
+
+    def test_unknown_kind(self):
+        response = self.client.get(reverse("autocomplete", kwargs={"kind": "payments"}), {"q": "a"})
+
+        self.assertEqual(response.status_code, 404)
+
+
+class TestLendFormIds(TestCase):
+    def setUp(self):
+        self.user = Librarian.objects.create_user(email="test@gmail.com", password="password")
+        self.other = Librarian.objects.create_user(email="other@gmail.com", password="password")
+        self.member = Member.objects.create(name="John Doe", email="john@gmail.com", admin=self.user)
+        self.books = [
+            Book.objects.create(title=f"Book {i}", author="Author", category="Programming", quantity=1, admin=self.user)
+            for i in range(3)
+        ]
+
+    def form(self, books, member=None):
+        data = {
+            "book": [str(book) for book in books],
+            "member": str(member or self.member.pk),
+            "return_date": (timezone.now().date() + timedelta(days=7)).isoformat(),
+            "fine": "0",
+        }
+        return LendBookForm(data, admin=self.user)
+
+    def test_ids_are_checked_with_one_query_per_field(self):
+        form = self.form([book.pk for book in self.books])
+
+        with self.assertNumQueries(2):
+            self.assertTrue(form.is_valid(), form.errors)
+
+        self.assertEqual(form.cleaned_data["book"], self.books)
+        self.assertEqual(form.cleaned_data["member"], self.member)
+
+    def test_every_book_id_is_checked(self):
+        foreign = Book.objects.create(title="Foreign", author="Author", category="Programming", quantity=1, admin=self.other)
+        out_of_stock = Book.objects.create(
+            title="Gone", author="Author", category="Programming", quantity=0, admin=self.user
+        )
+
+        for ids in ([self.books[0].pk, foreign.pk], [out_of_stock.pk, self.books[0].pk], [self.books[0].pk, "x"]):
+            form = self.form(ids)
+            self.assertFalse(form.is_valid())
+            self.assertIn("book", form.errors)
+
+    def test_member_of_another_librarian(self):
+        stranger = Member.objects.create(name="Jane Roe", email="jane@gmail.com", admin=self.other)
+
+        form = self.form([self.books[0].pk], member=stranger.pk)
+
+        self.assertFalse(form.is_valid())
+        self.assertIn("member", form.errors)
+
+    def test_lend_page_does_not_list_the_choices(self):
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("lend-book"))
+
+        self.assertNotContains(response, "Book 0")
+        self.assertNotContains(response, "John Doe")
+        self.assertContains(response, f'data-autocomplete-url="{reverse("autocomplete", kwargs={"kind": "books"})}"')
+
+    def test_invalid_form_keeps_the_selection(self):
+        self.client.force_login(self.user)
+
+        response = self.client.post(reverse("lend-book"), {"book": [self.books[1].pk], "member": self.member.pk})
+
+        self.assertContains(response, f'<option value="{self.books[1].pk}" selected>Book 1 by Author</option>', html=True)
+        self.assertContains(response, f'<option value="{self.member.pk}" selected>John Doe</option>', html=True)
@@ -0,0 +1,31 @@
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.template import engines
+from django.test import SimpleTestCase, override_settings
+
+from core.boot import warm_up
+
+
+class TestBoot(SimpleTestCase):
+    def test_warm_up_compiles_templates(self):
+        cached_loader = [("django.template.loaders.cached.Loader", settings.TEMPLATES[0]["OPTIONS"]["loaders"])]
+        templates = [{**settings.TEMPLATES[0], "OPTIONS": {**settings.TEMPLATES[0]["OPTIONS"], "loaders": cached_loader}}]
+
+        with override_settings(TEMPLATES=templates):
+            warm_up()
+            [loader] = engines["django"].engine.template_loaders
+
+            self.assertIn("books/list-books.html", loader.get_template_cache)
+            self.assertIn("users/login.html", loader.get_template_cache)
+
+    def test_import_profile(self):
+        stdout = StringIO()
+
+        call_command("import_profile", "--limit", "5", stdout=stdout)
+
+        output = stdout.getvalue()
+        self.assertTrue(output.startswith("core.wsgi: "))
+        self.assertIn("project modules (core, library, users): ", output)
+        self.assertIn("*core.wsgi", output)
@@ -0,0 +1,172 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from library.catalogue import IMPORT_BATCH_SIZE, import_catalogue, read_records
+from library.models import Book, LibraryStats, Member
+from library.search import ranked_ids
+from library.stats import rebuild_library_stats
+from users.models import Librarian
+
+BOOKS_CSV = """title,author,category,quantity,borrowing_fee
+Fluent Python,Luciano Ramalho,Programming,3,2.00
+No Author,,Programming,1,1.00
+Dune,Frank Herbert,Story,2,1.50
+Bad Category,Someone,Cooking,1,1.00
+"""
+
+
+class TestCatalogueImport(TestCase):
+    def setUp(self):
+        self.user = Librarian.objects.create_user(email="test@gmail.com", password="password")
+        Member.objects.create(name="Existing", email="taken@gmail.com", admin=self.user)
+
+    def member_records(self, count):
+        return [
+            (index + 1, {"name": f"Member {index}", "email": f"member{index}@gmail.com"}) for index in range(count)
+        ]
+
+    def test_books_are_validated_and_imported(self):
+        result = import_catalogue("books", self.user, read_records(StringIO(BOOKS_CSV), "csv"))
+
+        self.assertEqual(result.created, 2)
+        self.assertEqual([line for line, _ in result.errors], [3, 5])
+        self.assertIn("author", result.errors[0][1])
+        self.assertEqual(
+            set(Book.objects.filter(admin=self.user).values_list("title", flat=True)), {"Fluent Python", "Dune"}
+        )
+
+    def test_book_status_follows_quantity(self):
+        records = [
+            (1, {"title": "Gone", "author": "Someone", "category": "Story", "quantity": "0", "borrowing_fee": "1.00"}),
+            (2, {"title": "Here", "author": "Someone", "category": "Story", "quantity": "2", "borrowing_fee": "1.00"}),
+        ]
+
+        import_catalogue("books", self.user, records)
+
+        self.assertEqual(
+            dict(Book.objects.filter(admin=self.user).values_list("title", "status")),
+            {"Gone": "not-available", "Here": "available"},
+        )
+
+    def test_member_emails_are_deduplicated(self):
+        records = [
+            (1, {"name": "A", "email": "a@gmail.com"}),
+            (2, {"name": "Taken", "email": "taken@gmail.com"}),
+            (3, {"name": "A again", "email": "a@gmail.com"}),
+            (4, {"name": "B", "email": "b@gmail.com"}),
+        ]
+
+        result = import_catalogue("members", self.user, records, batch_size=2)
+
+        self.assertEqual(result.created, 2)
+        self.assertEqual([line for line, _ in result.errors], [2, 3])
+        self.assertEqual(Member.objects.filter(email="a@gmail.com").count(), 1)
+
+    def test_query_count_depends_on_batches_not_rows(self):
+        with CaptureQueriesContext(connection) as small:
+            import_catalogue("members", self.user, self.member_records(10), batch_size=50)
+        Member.objects.exclude(email="taken@gmail.com").delete()
+        with CaptureQueriesContext(connection) as large:
+            import_catalogue("members", self.user, self.member_records(40), batch_size=50)
+
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_imported_rows_update_stats(self):
+        rebuild_library_stats(self.user)
+
+        import_catalogue("books", self.user, read_records(StringIO(BOOKS_CSV), "csv"))
+
+        self.assertEqual(LibraryStats.objects.get(admin=self.user).total_books, 2)
+
+    @skipUnless(connection.vendor == "sqlite", "The full-text index requires SQLite FTS5.")
+    def test_imported_rows_are_searchable(self):
+        import_catalogue("books", self.user, read_records(StringIO(BOOKS_CSV), "csv"))
+
+        self.assertEqual(len(ranked_ids(Book, self.user, "herbert")), 1)
+
+    def test_invalid_ndjson_lines_are_reported(self):
+        lines = StringIO('{"name": "A", "email": "a@gmail.com"}\nnot json\n[1, 2]\n')
+
+        result = import_catalogue("members", self.user, read_records(lines, "ndjson"))
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual([line for line, _ in result.errors], [2, 3])
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as handle:
+            handle.write(BOOKS_CSV)
+        self.addCleanup(os.remove, handle.name)
+
+        out, err = StringIO(), StringIO()
+        call_command(
+            "import_catalogue", handle.name, "--admin", "test@gmail.com", "--kind", "books", stdout=out, stderr=err
+        )
+
+        self.assertIn("Imported 2 books, rejected 2 row(s).", out.getvalue())
+        self.assertIn("Line 3:", err.getvalue())
+
+    def test_command_rejects_a_file_that_is_not_utf8(self):
+        with tempfile.NamedTemporaryFile("wb", suffix=".csv", delete=False) as handle:
+            handle.write(BOOKS_CSV.encode() + b"Caf\xe9,Someone,Story,1,1.00\n")
+        self.addCleanup(os.remove, handle.name)
+
+        with self.assertRaisesMessage(CommandError, "must be UTF-8 encoded; nothing was imported."):
+            call_command(
+                "import_catalogue", handle.name, "--admin", "test@gmail.com", "--kind", "books", "--batch-size", "1"
+            )
+
+        self.assertFalse(Book.objects.exists())
+
+
+class TestImportCatalogueView(TestCase):
+    def setUp(self):
+        self.user = Librarian.objects.create_user(email="test@gmail.com", password="password")
+        self.client.force_login(self.user)
+
+    def test_get(self):
+        response = self.client.get(reverse("import-catalogue"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "import-catalogue.html")
+
+    def upload(self, name, content, kind):
+        return self.client.post(
+            reverse("import-catalogue"), {"kind": kind, "file": SimpleUploadedFile(name, content.encode())}
+        )
+
+    def test_upload_csv(self):
+        response = self.upload("books.csv", BOOKS_CSV, "books")
+
+        self.assertEqual(response.context["result"].created, 2)
+        self.assertContains(response, "2 row(s) rejected")
+
+    def test_file_that_is_not_utf8_is_not_imported(self):
+        # Two batches of valid rows first: the bad byte is only read once the first would have been written
+        rows = "".join(f"Book {index},Author,Story,1,1.00\n" for index in range(2 * IMPORT_BATCH_SIZE))
+        content = (BOOKS_CSV + rows).encode() + b"Caf\xe9,Someone,Story,1,1.00\n"
+
+        response = self.client.post(
+            reverse("import-catalogue"), {"kind": "books", "file": SimpleUploadedFile("books.csv", content)}
+        )
+
+        self.assertContains(response, "The file must be UTF-8 encoded.")
+        self.assertFalse(Book.objects.exists())
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=0)
+    def test_upload_ndjson_spooled_to_disk(self):
+        content = "\n".join(json.dumps({"name": f"M{index}", "email": f"m{index}@gmail.com"}) for index in range(3))
+
+        response = self.upload("members.ndjson", content, "members")
+
+        self.assertEqual(response.context["result"].created, 3)
+        self.assertEqual(Member.objects.filter(admin=self.user).count(), 3)
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from library.context_processors import greeting, layout, layout_value
+from library.models import Book, BorrowedBook, Member
+from library.stats import rebuild_library_stats
+from users.models import Librarian
+
+
+class TestLayoutContext(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = Librarian.objects.create_user(
+            email="test@gmail.com", password="password", first_name="Ada", last_name="Lovelace"
+        )
+        member = Member.objects.create(name="John Doe", email="member@gmail.com", admin=self.user)
+        book = Book.objects.create(title="Test Title", author="Author", category="Programming", quantity=2, admin=self.user)
+        BorrowedBook.objects.create(
+            member=member, book=book, return_date=timezone.now().date() - timedelta(days=3), is_overdue=True, admin=self.user
+        )
+        rebuild_library_stats(self.user)
+
+    def request(self, user):
+        request = RequestFactory().get("/")
+        request.user = user
+        return request
+
+    @override_settings(TIME_ZONE="Asia/Kolkata")
+    def test_greeting_uses_the_time_zone_setting(self):
+        # 06:00 UTC is 11:30 in Kolkata, 10:00 UTC is 15:30
+        with mock.patch("django.utils.timezone.now", return_value=datetime(2024, 1, 1, 6, tzinfo=dt_timezone.utc)):
+            self.assertEqual(greeting(None), "Morning")
+        with mock.patch("django.utils.timezone.now", return_value=datetime(2024, 1, 1, 10, tzinfo=dt_timezone.utc)):
+            self.assertEqual(greeting(None), "Afternoon")
+
+    def test_values_are_lazy(self):
+        request = self.request(self.user)
+
+        with self.assertNumQueries(0):
+            context = layout(request)
+        self.assertFalse(getattr(request, "_layout_values", None))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(context["badges"]["overdue"], 1)
+        self.assertEqual(str(context["display_name"]), "Ada Lovelace")
+
+    @override_settings(LIBRARY_LAYOUT_CACHE_TIMEOUT=0)
+    def test_values_are_memoised_per_request(self):
+        request = self.request(self.user)
+
+        with self.assertNumQueries(1):
+            layout_value(request, "badges")
+            layout_value(request, "badges")
+
+    def test_badges_are_cached_across_requests(self):
+        layout_value(self.request(self.user), "badges")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(layout_value(self.request(self.user), "badges"), {"lent": 1, "overdue": 1})
+
+    def test_anonymous_user(self):
+        request = self.request(AnonymousUser())
+
+        with self.assertNumQueries(0):
+            self.assertEqual(layout_value(request, "badges"), {})
+            self.assertEqual(layout_value(request, "display_name"), "")
+
+    def test_sidebar_badges(self):
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("books"))
+
+        self.assertContains(response, "Ada Lovelace")
+        self.assertContains(response, '<span class="badge badge-pill badge-danger ms-2" data-badge="overdue">1</span>', html=False)
+
+    def test_login_page_does_not_compute_them(self):
+        with self.assertNumQueries(0):
+            self.client.get(reverse("login"))
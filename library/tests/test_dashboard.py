@@ -0,0 +1,89 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from library.models import Book, BorrowedBook, Member, Transaction
+from library.stats import get_dashboard_stats, rebuild_library_stats
+from users.models import Librarian
+
+
+class TestDashboardStats(TestCase):
+    def setUp(self):
+        self.user = Librarian.objects.create_user(email="test@gmail.com", password="password")
+        self.other_user = Librarian.objects.create_user(email="other@gmail.com", password="password")
+        self.member = Member.objects.create(name="John Doe", email="member@gmail.com", admin=self.user)
+        self.book = Book.objects.create(
+            title="Test Title",
+            author="Test Author",
+            category="Programming",
+            quantity=10,
+            borrowing_fee=1.00,
+            admin=self.user,
+        )
+        today = timezone.now().date()
+        BorrowedBook.objects.create(
+            member=self.member,
+            book=self.book,
+            return_date=today - timedelta(days=3),
+            fine=5,
+            is_overdue=True,
+            admin=self.user,
+        )
+        BorrowedBook.objects.create(
+            member=self.member, book=self.book, return_date=today + timedelta(days=3), fine=7, admin=self.user
+        )
+        BorrowedBook.objects.create(
+            member=self.member,
+            book=self.book,
+            return_date=today - timedelta(days=3),
+            fine=11,
+            returned=True,
+            admin=self.user,
+        )
+        Transaction.objects.create(member=self.member, amount=20, payment_method="Cash", admin=self.user)
+        Transaction.objects.create(member=self.member, amount=2.5, payment_method="Card", admin=self.user)
+
+        other_member = Member.objects.create(name="Jane Doe", email="jane@gmail.com", admin=self.other_user)
+        Transaction.objects.create(member=other_member, amount=100, payment_method="Cash", admin=self.other_user)
+
+    def test_stats_are_computed_in_one_query(self):
+        with self.assertNumQueries(1):
+            stats = get_dashboard_stats(self.user)
+
+        self.assertEqual(stats["total_members"], 1)
+        self.assertEqual(stats["total_books"], 1)
+        self.assertEqual(stats["total_borrowed_books"], 2)
+        self.assertEqual(stats["total_overdue_books"], 1)
+        self.assertEqual(stats["total_amount"], Decimal("22.50"))
+        self.assertEqual(stats["overdue_amount"], Decimal("5.00"))
+
+    def test_empty_library_returns_zeros(self):
+        empty_user = Librarian.objects.create_user(email="empty@gmail.com", password="password")
+        stats = get_dashboard_stats(empty_user)
+
+        self.assertEqual(stats["total_members"], 0)
+        self.assertEqual(stats["total_overdue_books"], 0)
+        self.assertEqual(stats["total_amount"], Decimal("0.00"))
+
+    def test_home_view_query_count(self):
+        rebuild_library_stats(self.user)
+        self.client.force_login(self.user)
+
+        # session + user lookup, LibraryStats primary-key lookup, recently added books
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("home"))
+
+        for key in (
+            "total_members",
+            "total_books",
+            "total_borrowed_books",
+            "total_overdue_books",
+            "recently_added_books",
+            "total_amount",
+            "overdue_amount",
+        ):
+            self.assertIn(key, response.context)
+        self.assertContains(response, "Test Title")
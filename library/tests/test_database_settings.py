@@ -0,0 +1,21 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+
+
+@skipUnless(hasattr(settings, "SQLITE_PRAGMAS"), "SQLite connection tuning is off.")
+class TestSQLiteTuning(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_pragmas_are_applied_to_new_connections(self):
+        pragmas = settings.SQLITE_PRAGMAS
+
+        self.assertEqual(self.pragma("synchronous"), 1)  # NORMAL
+        self.assertEqual(self.pragma("busy_timeout"), pragmas["busy_timeout"])
+        self.assertEqual(self.pragma("cache_size"), pragmas["cache_size"])
+        self.assertEqual(settings.DATABASES["default"]["OPTIONS"]["transaction_mode"], "IMMEDIATE")
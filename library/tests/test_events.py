@@ -0,0 +1,216 @@
+import asyncio
+import json
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from library.cache import layout_key
+from library.context_processors import layout_value
+from library.events import LocalBroker, event_stream, get_broker, stats_event
+from library.models import Book, BorrowedBook, LibraryStats, Member, Transaction
+from library.stats import abadge_state, rebuild_library_stats
+from users.models import Librarian
+
+
+class TestBadgeEvents(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = Librarian.objects.create_user(email="test@gmail.com", password="password")
+        self.member = Member.objects.create(name="John Doe", email="member@gmail.com", admin=self.user)
+        self.book = Book.objects.create(
+            title="Test Title", author="Author", category="Programming", quantity=2, admin=self.user
+        )
+        rebuild_library_stats(self.user)
+
+    def lend(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return BorrowedBook.objects.create(
+                member=self.member, book=self.book, return_date=timezone.now().date() + timedelta(days=7), admin=self.user
+            )
+
+    def event(self, kind, lent, version):
+        badges = {"lent": 1 + lent, "overdue": 0}
+        return {"type": kind, "lent": lent, "overdue": 0, "amount": "0", "badges": badges, "version": version}
+
+    async def read(self, stream):
+        return await asyncio.wait_for(anext(stream), timeout=5)
+
+    async def disconnect(self, stream):
+        # What the ASGI handler does when the client goes away: cancel the pending read
+        pending = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0.01)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+
+    def test_event_types(self):
+        self.assertEqual(stats_event({"total_borrowed_books": 1})["type"], "loan")
+        self.assertEqual(stats_event({"total_borrowed_books": -1, "total_overdue_books": -1})["type"], "return")
+        self.assertEqual(stats_event({"total_overdue_books": 2, "overdue_amount": 10})["type"], "overdue")
+        self.assertEqual(stats_event({"total_amount": 5})["amount"], "5")
+        self.assertIsNone(stats_event({"total_members": 1}))
+
+    def test_changes_are_published_on_commit(self):
+        with mock.patch.object(LocalBroker, "publish") as publish:
+            with self.captureOnCommitCallbacks() as callbacks:
+                BorrowedBook.objects.create(
+                    member=self.member, book=self.book, return_date=timezone.now().date(), admin=self.user
+                )
+                Transaction.objects.create(member=self.member, amount=20, admin=self.user)
+            publish.assert_not_called()
+
+            for callback in callbacks:
+                callback()
+
+        self.assertEqual(
+            [call.args for call in publish.call_args_list],
+            [
+                (
+                    self.user.pk,
+                    {
+                        "type": "loan",
+                        "lent": 1,
+                        "overdue": 0,
+                        "amount": "0",
+                        "badges": {"lent": 1, "overdue": 0},
+                        "version": 1,
+                    },
+                ),
+                (
+                    self.user.pk,
+                    {
+                        "type": "payment",
+                        "lent": 0,
+                        "overdue": 0,
+                        "amount": "20",
+                        "badges": {"lent": 1, "overdue": 0},
+                        "version": 2,
+                    },
+                ),
+            ],
+        )
+
+    def test_repairs_are_published(self):
+        BorrowedBook.objects.create(
+            member=self.member, book=self.book, return_date=timezone.now().date(), admin=self.user
+        )
+        LibraryStats.objects.filter(admin=self.user).update(total_borrowed_books=0)  # Drifted
+        layout_value(mock.Mock(user=self.user), "badges")
+
+        with mock.patch.object(LocalBroker, "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                rebuild_library_stats(self.user)
+
+        publish.assert_called_once_with(
+            self.user.pk,
+            {"type": "loan", "lent": 1, "overdue": 0, "amount": "0", "badges": {"lent": 1, "overdue": 0}, "version": 2},
+        )
+        self.assertIsNone(cache.get(layout_key(self.user.pk, "badges")))
+
+    def test_repairs_drop_the_cached_badges_even_without_changes(self):
+        layout_value(mock.Mock(user=self.user), "badges")
+
+        with mock.patch.object(LocalBroker, "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                rebuild_library_stats(self.user)
+
+        publish.assert_not_called()
+        self.assertIsNone(cache.get(layout_key(self.user.pk, "badges")))
+
+    def test_changes_drop_the_cached_badges(self):
+        layout_value(mock.Mock(user=self.user), "badges")
+        self.assertIsNotNone(cache.get(layout_key(self.user.pk, "badges")))
+
+        self.lend()
+
+        self.assertIsNone(cache.get(layout_key(self.user.pk, "badges")))
+
+    async def test_subscribers_receive_their_librarian_events(self):
+        other = await sync_to_async(Librarian.objects.create_user)(email="other@gmail.com", password="password")
+        subscription = get_broker().subscribe(self.user.pk)
+        other_subscription = get_broker().subscribe(other.pk)
+        try:
+            await sync_to_async(self.lend)()
+
+            event = await asyncio.wait_for(subscription.get(), timeout=5)
+            self.assertEqual(event["type"], "loan")
+            self.assertTrue(other_subscription.queue.empty())
+        finally:
+            subscription.close()
+            other_subscription.close()
+
+    async def test_stream(self):
+        await self.async_client.aforce_login(self.user)
+        await sync_to_async(self.lend)()
+
+        response = await self.async_client.get(reverse("events"))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+        first = (await self.read(stream)).decode()
+        self.assertTrue(first.startswith("retry: "))
+        self.assertIn('event: badges\ndata: {"lent": 1, "overdue": 0, "version": 1}\n\n', first)
+
+        get_broker().publish(self.user.pk, self.event("return", -1, version=2))
+        event = (await self.read(stream)).decode()
+        self.assertTrue(event.startswith("event: return\n"))
+        self.assertEqual(json.loads(event.split("data: ")[1])["badges"], {"lent": 0, "overdue": 0})
+
+        await self.disconnect(stream)
+        self.assertNotIn(self.user.pk, get_broker().subscriptions)
+
+    async def test_changes_in_the_snapshot_are_not_sent_again(self):
+        async def snapshot():
+            await sync_to_async(self.lend)()  # Committed and published between the subscription and the snapshot
+            return await abadge_state(self.user)
+
+        stream = event_stream(self.user.pk, snapshot)
+        self.assertIn('"lent": 1, "overdue": 0, "version": 1', await self.read(stream))
+
+        get_broker().publish(self.user.pk, self.event("return", -1, version=2))
+
+        # The loan event, of version 1 like the snapshot, was queued first and is dropped
+        self.assertTrue((await self.read(stream)).startswith("event: return\n"))
+        await stream.aclose()
+
+    async def test_older_versions_send_a_new_snapshot(self):
+        await sync_to_async(self.lend)()
+        stream = event_stream(self.user.pk, lambda: abadge_state(self.user))
+        self.assertIn('"version": 1', await self.read(stream))
+
+        # The counters went back, e.g. rows rebuilt by an older release: the stream must not freeze
+        await LibraryStats.objects.filter(admin=self.user).aupdate(version=0)
+        get_broker().publish(self.user.pk, self.event("return", -1, version=0))
+
+        self.assertEqual(
+            await self.read(stream), 'event: badges\ndata: {"lent": 1, "overdue": 0, "version": 0}\n\n'
+        )
+        get_broker().publish(self.user.pk, self.event("loan", 1, version=1))
+        self.assertTrue((await self.read(stream)).startswith("event: loan\n"))
+        await stream.aclose()
+
+    @override_settings(LIBRARY_EVENT_HEARTBEAT=0.1)
+    async def test_heartbeat(self):
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(reverse("events"))
+        stream = aiter(response.streaming_content)
+        await self.read(stream)
+        self.assertEqual(await self.read(stream), b": keep-alive\n\n")
+        await self.disconnect(stream)
+
+    def test_not_streamed_by_wsgi_workers(self):
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("events"))
+
+        self.assertEqual(response.status_code, 204)
+
+    def test_login_required(self):
+        response = self.client.get(reverse("events"))
+
+        self.assertEqual(response.status_code, 302)
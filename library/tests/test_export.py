@@ -0,0 +1,91 @@
+import csv
+import json
+from io import StringIO
+
+from asgiref.sync import sync_to_async
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from library.export import aexport_lines, export_lines
+from library.models import Book, BorrowedBook, Member, Transaction
+from users.models import Librarian
+
+
+class TestExport(TestCase):
+    def setUp(self):
+        self.user = Librarian.objects.create_user(email="test@gmail.com", password="password")
+        self.other_user = Librarian.objects.create_user(email="other@gmail.com", password="password")
+        self.member = Member.objects.create(name="John Doe", email="member@gmail.com", admin=self.user)
+        self.books = [
+            Book.objects.create(
+                title=f"Title {index}", author="Test Author", category="Programming", quantity=2, admin=self.user
+            )
+            for index in range(5)
+        ]
+        Book.objects.create(title="Foreign", author="Author", category="Other", quantity=1, admin=self.other_user)
+        self.loan = BorrowedBook.objects.create(
+            member=self.member, book=self.books[0], return_date="2030-01-01", fine=3, admin=self.user
+        )
+        Transaction.objects.create(member=self.member, amount=5, payment_method="Cash", admin=self.user)
+        self.client.force_login(self.user)
+
+    def read_csv(self, response):
+        return list(csv.DictReader(StringIO(b"".join(response.streaming_content).decode())))
+
+    def test_books_csv_is_streamed_and_scoped_to_admin(self):
+        response = self.client.get(reverse("export", kwargs={"kind": "books"}))
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn('filename="books.csv"', response["Content-Disposition"])
+        self.assertEqual([row["title"] for row in self.read_csv(response)], [f"Title {index}" for index in range(5)])
+
+    def test_loans_ndjson_includes_related_fields(self):
+        response = self.client.get(reverse("export", kwargs={"kind": "loans"}), {"format": "ndjson"})
+
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["member_name"], "John Doe")
+        self.assertEqual(rows[0]["book_title"], "Title 0")
+        self.assertEqual(rows[0]["return_date"], "2030-01-01")
+        self.assertEqual(rows[0]["fine"], "3.00")
+
+    def test_unknown_export_is_not_found(self):
+        self.assertEqual(self.client.get(reverse("export", kwargs={"kind": "librarians"})).status_code, 404)
+        self.assertEqual(
+            self.client.get(reverse("export", kwargs={"kind": "books"}), {"format": "xml"}).status_code, 404
+        )
+
+    async def test_streamed_from_the_event_loop_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(reverse("export", kwargs={"kind": "books"}))
+
+        self.assertTrue(response.is_async)  # Not collected into a list by StreamingHttpResponse.__aiter__
+        content = b"".join([chunk async for chunk in response.streaming_content]).decode()
+        rows = csv.DictReader(StringIO(content))
+        self.assertEqual([row["title"] for row in rows], [f"Title {index}" for index in range(5)])
+
+    async def test_async_lines_are_read_in_chunks(self):
+        lines = await sync_to_async(export_lines)("books", self.user, "csv")
+
+        chunks = [chunk async for chunk in aexport_lines(lines, chunk_size=4)]
+
+        self.assertEqual([chunk.count("\n") for chunk in chunks], [4, 2])
+
+    def test_rows_are_fetched_in_chunks_with_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            lines = list(export_lines("books", self.user, "csv", chunk_size=2))
+
+        self.assertEqual(len(lines), 6)
+        self.assertEqual(len(queries.captured_queries), 1)
+
+    def test_command(self):
+        out = StringIO()
+        call_command("export_library", "--admin", "test@gmail.com", "--kind", "payments", stdout=out)
+
+        rows = list(csv.DictReader(StringIO(out.getvalue())))
+        self.assertEqual([(row["member_name"], row["amount"]) for row in rows], [("John Doe", "5.00")])
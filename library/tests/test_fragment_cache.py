@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from library.lending import lend_books
+from library.models import Book, Member
+from users.models import Librarian
+
+
+@override_settings(
+    LIBRARY_QUERY_CACHE=False,
+    # Off by default with the local-memory default cache of the tests, see SHARED_CACHE
+    CACHES={**settings.CACHES, "template_fragments": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+)
+class TestFragmentCache(TestCase):
+    def setUp(self):
+        caches["template_fragments"].clear()
+        self.user = Librarian.objects.create_user(email="test@gmail.com", password="password")
+        self.member = Member.objects.create(name="John Doe", email="member@gmail.com", admin=self.user)
+        self.book = Book.objects.create(
+            title="Test Title", author="Test Author", category="Programming", quantity=2, admin=self.user
+        )
+        self.client.force_login(self.user)
+
+    def test_rows_are_served_from_the_fragment_cache(self):
+        self.client.get(reverse("books"))
+        # Bypasses the signals on purpose: the cached row is still the current version
+        Book.objects.filter(pk=self.book.pk).update(author="Someone Else")
+
+        response = self.client.get(reverse("books"))
+
+        self.assertContains(response, "Test Author")
+
+    def test_saving_a_row_changes_the_version(self):
+        self.client.get(reverse("books"))
+
+        self.book.title = "Renamed"
+        self.book.save()
+
+        self.assertContains(self.client.get(reverse("books")), "Renamed")
+
+    def test_lending_refreshes_quantities(self):
+        self.client.get(reverse("books"))
+
+        lend_books(self.user, self.member, [self.book.pk], timezone.now().date() + timedelta(days=7), 0, "Cash")
+
+        self.assertContains(self.client.get(reverse("books")), "<td>1</td>")
+
+    def test_loan_rows_follow_related_rows(self):
+        lend_books(self.user, self.member, [self.book.pk], timezone.now().date() + timedelta(days=7), 0, "Cash")
+        self.client.get(reverse("lent-books"))
+
+        self.member.name = "Jane Doe"
+        self.member.save()
+
+        self.assertContains(self.client.get(reverse("lent-books")), "Jane Doe")
+
+    def test_row_numbers_are_not_cached(self):
+        Book.objects.create(title="Another", author="Author", category="Other", quantity=1, admin=self.user)
+        self.client.get(reverse("books"))
+
+        response = self.client.post(reverse("books"), {"query": "Test Title"})
+
+        self.assertContains(response, "<td>1</td>")
+        self.assertContains(response, "Test Title")
+        self.assertNotContains(response, "Another")
+
+
+class TestFragmentCacheDefault(TestCase):
+    def test_off_with_a_per_process_default_cache(self):
+        # Another worker would keep the row fragments of versions it never saw change
+        self.assertFalse(settings.SHARED_CACHE)
+        self.assertIsInstance(caches["template_fragments"], DummyCache)
@@ -0,0 +1,154 @@
+import json
+import os
+import subprocess
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from library.instrumentation import EXITED_FILE, REQUEST_SECONDS, metrics_exposition, reset_metrics
+from library.models import Book, Member
+from users.models import Librarian
+
+
+class TestRequestMetrics(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_metrics()
+        self.user = Librarian.objects.create_user(email="test@gmail.com", password="password")
+        self.staff = Librarian.objects.create_user(email="staff@gmail.com", password="password", is_staff=True)
+        Member.objects.create(name="John Doe", email="member@gmail.com", admin=self.user)
+        Book.objects.create(title="Test Title", author="Test Author", category="Programming", quantity=2, admin=self.user)
+
+    def request_record(self, logs):
+        [record] = [record for record in logs.records if record.name == "library.requests"]
+        return record
+
+    @override_settings(LIBRARY_QUERY_CACHE=False)
+    def test_request_log_record(self):
+        self.client.force_login(self.user)
+
+        with self.assertLogs("library.requests", level="INFO") as logs:
+            response = self.client.get(reverse("members"))
+
+        record = self.request_record(logs)
+        self.assertEqual(record.view, "members")
+        self.assertEqual(record.method, "GET")
+        self.assertEqual(record.status, 200)
+        self.assertGreater(record.db_queries, 0)
+        self.assertGreater(record.template_ms, 0)
+        self.assertGreaterEqual(record.duration_ms, record.template_ms)
+        self.assertEqual(record.response_bytes, len(response.content))
+
+    @override_settings(LIBRARY_QUERY_CACHE=True)
+    def test_cache_lookups(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse("members"))
+
+        with self.assertLogs("library.requests", level="INFO") as logs:
+            self.client.get(reverse("members"))
+
+        record = self.request_record(logs)
+        self.assertEqual((record.cache_hits, record.cache_misses), (1, 0))
+
+    async def test_async_view_queries(self):
+        await self.async_client.aforce_login(self.user)
+
+        with self.assertLogs("library.requests", level="INFO") as logs:
+            await self.async_client.get(reverse("home"))
+
+        record = self.request_record(logs)
+        self.assertEqual(record.view, "home")
+        self.assertGreater(record.db_queries, 0)
+
+    def test_streaming_response_is_measured_once_sent(self):
+        self.client.force_login(self.user)
+
+        with self.assertLogs("library.requests", level="INFO") as logs:
+            response = self.client.get(reverse("export", kwargs={"kind": "books"}))
+            self.assertEqual([record for record in logs.records if record.name == "library.requests"], [])
+            content = b"".join(response.streaming_content)
+
+        record = self.request_record(logs)
+        self.assertEqual(record.view, "export")
+        self.assertEqual(record.response_bytes, len(content))
+        self.assertGreater(record.db_queries, 0)  # The export query runs while the content is streamed
+
+    async def test_async_streaming_response(self):
+        await self.async_client.aforce_login(self.user)
+
+        with self.assertLogs("library.requests", level="INFO") as logs:
+            response = await self.async_client.get(reverse("export", kwargs={"kind": "books"}))
+            content = b"".join([chunk async for chunk in response.streaming_content])
+
+        record = self.request_record(logs)
+        self.assertEqual(record.response_bytes, len(content))
+        self.assertGreater(record.db_queries, 0)
+
+    def saved_by_another_process(self, directory, name):
+        # What another worker saved: one "books" request in the first bucket
+        series = {REQUEST_SECONDS.name: {"books": [1] * len(REQUEST_SECONDS.buckets) + [1, 0.001]}}
+        with open(os.path.join(directory, name), "w") as file:
+            json.dump(series, file)
+
+    def test_metrics_of_every_process(self):
+        self.client.force_login(self.user)
+        with tempfile.TemporaryDirectory() as directory, override_settings(LIBRARY_METRICS_DIR=directory):
+            self.client.get(reverse("books"))
+            self.assertEqual(os.listdir(directory), [])  # Saved in the background, not by the request
+            self.saved_by_another_process(directory, "other.json")
+
+            content = metrics_exposition()
+            own_files = [name for name in os.listdir(directory) if name.startswith(f"{os.getpid()}-")]
+
+        self.assertEqual(len(own_files), 1)
+        self.assertIn('library_request_duration_seconds_count{view="books"} 2', content)
+        self.assertIn('library_request_db_queries_count{view="books"} 1', content)
+
+    def test_files_of_exited_processes_are_merged(self):
+        exited = subprocess.Popen(["true"])
+        exited.wait()
+        with tempfile.TemporaryDirectory() as directory, override_settings(LIBRARY_METRICS_DIR=directory):
+            self.saved_by_another_process(directory, f"{exited.pid}-first.json")
+            self.saved_by_another_process(directory, f"{exited.pid}-second.json")
+
+            first = metrics_exposition()
+            own_file = f"{os.getpid()}-"
+            files = [name for name in os.listdir(directory) if name.endswith(".json") and not name.startswith(own_file)]
+            second = metrics_exposition()
+
+        self.assertEqual(files, [EXITED_FILE])
+        self.assertIn('library_request_duration_seconds_count{view="books"} 2', first)
+        self.assertEqual(first, second)
+
+    def test_unmatched_requests_share_a_view(self):
+        with self.assertLogs("library.requests", level="INFO") as logs:
+            self.client.get("/no-such-page/")
+
+        self.assertEqual(self.request_record(logs).view, "unmatched")
+
+    @override_settings(LIBRARY_QUERY_CACHE=True)
+    def test_metrics(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse("books"))
+        self.client.get(reverse("books"))
+        self.client.force_login(self.staff)
+
+        response = self.client.get(reverse("metrics"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        content = response.content.decode()
+        self.assertIn("# TYPE library_request_duration_seconds histogram", content)
+        self.assertIn('library_request_duration_seconds_count{view="books"} 2', content)
+        self.assertIn('library_request_db_queries_bucket{view="books",le="+Inf"} 2', content)
+        self.assertIn('library_request_cache_hits_total{view="books"} 1', content)
+        self.assertIn("library_query_cache_hits_total 1", content)
+
+    def test_metrics_staff_only(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertRedirects(response, f"{reverse('login')}?next={reverse('metrics')}")
+
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
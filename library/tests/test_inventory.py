@@ -0,0 +1,79 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from library.inventory import OutOfStockError, release_copies, reserve_copies
+from library.models import Book, BorrowedBook, Member
+from users.models import Librarian
+
+
+class TestInventory(TestCase):
+    def setUp(self):
+        self.user = Librarian.objects.create_user(email="test@gmail.com", password="password")
+        self.member = Member.objects.create(name="John Doe", email="member@gmail.com", admin=self.user)
+        self.book = Book.objects.create(
+            title="Last Copy", author="Test Author", category="Programming", quantity=1, admin=self.user
+        )
+        self.other_book = Book.objects.create(
+            title="Plenty", author="Test Author", category="Programming", quantity=5, admin=self.user
+        )
+
+    def test_reserving_the_last_copy_twice_fails_cleanly(self):
+        reserve_copies([self.book.pk])
+
+        with self.assertRaisesMessage(OutOfStockError, "Out of stock: Last Copy."):
+            reserve_copies([self.book.pk, self.other_book.pk])
+
+        self.book.refresh_from_db()
+        self.other_book.refresh_from_db()
+        self.assertEqual(self.book.quantity, 0)
+        self.assertEqual(self.book.status, "not-available")
+        self.assertEqual(self.other_book.quantity, 5)
+
+    def test_release_makes_book_available(self):
+        reserve_copies([self.book.pk])
+        release_copies([self.book.pk])
+
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.quantity, 1)
+        self.assertEqual(self.book.status, "available")
+
+    def test_returning_twice_releases_one_copy(self):
+        Book.objects.filter(pk=self.book.pk).update(quantity=0)
+        loan = BorrowedBook.objects.create(member=self.member, book=self.book, return_date="2099-01-01", admin=self.user)
+        self.client.force_login(self.user)
+
+        self.client.get(reverse("return-book", kwargs={"pk": loan.pk}))
+        self.client.get(reverse("return-book", kwargs={"pk": loan.pk}))
+
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.quantity, 1)
+
+    def test_deleting_a_returned_loan_does_not_restock(self):
+        loan = BorrowedBook.objects.create(
+            member=self.member, book=self.book, return_date="2099-01-01", returned=True, admin=self.user
+        )
+        self.client.force_login(self.user)
+
+        self.client.get(reverse("delete-borrowed-book", kwargs={"pk": loan.pk}))
+
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.quantity, 1)
+
+
+class TestInventoryStress(SimpleTestCase):
+    def test_concurrent_lend_and_return_never_drift(self):
+        script = Path(settings.BASE_DIR) / "benchmarks" / "inventory_stress.py"
+        result = subprocess.run(
+            [sys.executable, str(script), "--workers", "3", "--operations", "40", "--books", "2", "--stock", "2"],
+            capture_output=True,
+            text=True,
+            timeout=300,
+        )
+
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertIn("Inventory consistent.", result.stdout)
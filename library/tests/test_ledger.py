@@ -0,0 +1,144 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from library.ledger import ledger_discrepancies
+from library.lending import LendingError, lend_books, return_book
+from library.models import Book, BorrowedBook, LedgerEntry, Member, Transaction
+from library.overdue import sweep_overdue
+from users.models import Librarian
+
+
+class TestLedger(TestCase):
+    def setUp(self):
+        self.user = Librarian.objects.create_user(email="test@gmail.com", password="password")
+        self.member = Member.objects.create(name="John Doe", email="member@gmail.com", admin=self.user)
+        self.book = Book.objects.create(
+            title="Test Title",
+            author="Test Author",
+            category="Programming",
+            quantity=5,
+            borrowing_fee=Decimal("2.00"),
+            admin=self.user,
+        )
+
+    def lend(self, return_date, fine=Decimal("10.00")):
+        borrowed_books, payment = lend_books(
+            admin=self.user,
+            member=self.member,
+            book_ids=[self.book.pk],
+            return_date=return_date,
+            fine=fine,
+            payment_method="Cash",
+        )
+        return borrowed_books[0]
+
+    def assertBalance(self, amount):
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.amount_due, Decimal(amount))
+        self.assertEqual(ledger_discrepancies(), [])
+
+    def test_lending_records_fee_and_payment(self):
+        self.lend(timezone.now().date() + timedelta(days=7))
+
+        self.assertEqual(
+            list(LedgerEntry.objects.filter(member=self.member).order_by("pk").values_list("kind", "amount")),
+            [("fee", Decimal("2.00")), ("payment", Decimal("-2.00"))],
+        )
+        self.assertBalance("0.00")
+
+    def test_fine_is_charged_by_the_sweep_and_settled_on_return(self):
+        loan = self.lend(timezone.now().date() - timedelta(days=1))
+        sweep_overdue()
+        self.assertBalance("10.00")
+
+        return_book(loan, payment_method="Cash")
+
+        self.assertBalance("0.00")
+        self.assertEqual(
+            list(LedgerEntry.objects.filter(borrowed_book=loan).values_list("kind", flat=True)), ["fine", "payment"]
+        )
+
+    def test_fine_paid_before_the_sweep_is_charged_and_settled(self):
+        loan = self.lend(timezone.now().date() - timedelta(days=1))
+
+        return_book(loan, payment_method="Cash")
+
+        self.assertBalance("0.00")
+        self.assertEqual(
+            list(LedgerEntry.objects.filter(borrowed_book=loan).values_list("kind", flat=True)), ["fine", "payment"]
+        )
+
+    def test_waived_fine_is_credited(self):
+        loan = self.lend(timezone.now().date() - timedelta(days=1))
+        sweep_overdue()
+
+        return_book(loan)
+
+        self.assertBalance("0.00")
+
+    def test_deleting_a_payment_puts_the_amount_back(self):
+        self.lend(timezone.now().date() + timedelta(days=7))
+
+        Transaction.objects.get(member=self.member).delete()
+
+        self.assertBalance("2.00")
+
+    def test_deleting_a_book_credits_charged_loans(self):
+        self.lend(timezone.now().date() - timedelta(days=1))
+        sweep_overdue()
+
+        self.book.delete()
+
+        self.assertBalance("0.00")
+
+    def test_deleting_a_member_keeps_the_ledger_consistent(self):
+        self.lend(timezone.now().date() - timedelta(days=1))
+        sweep_overdue()
+
+        self.member.delete()
+
+        self.assertFalse(LedgerEntry.objects.exists())
+
+    def test_borrowing_limit_is_enforced_by_the_lending_service(self):
+        LedgerEntry.objects.create(admin=self.user, member=self.member, kind="opening", amount=Decimal("500.01"))
+        Member.objects.filter(pk=self.member.pk).update(amount_due=Decimal("500.01"))
+
+        with self.assertRaisesMessage(LendingError, "Member has exceeded the borrowing limit."):
+            self.lend(timezone.now().date() + timedelta(days=7))
+
+        self.assertEqual(BorrowedBook.objects.count(), 0)
+
+    def test_lend_member_book_view_reports_the_limit(self):
+        Member.objects.filter(pk=self.member.pk).update(amount_due=Decimal("600.00"))
+        self.client.force_login(self.user)
+
+        response = self.client.post(
+            reverse("lend-member-book", kwargs={"pk": self.member.pk}),
+            {
+                "book": self.book.pk,
+                "return_date": (timezone.now().date() + timedelta(days=7)).isoformat(),
+                "fine": 0,
+                "payment_method": "Cash",
+            },
+        )
+
+        self.assertContains(response, "Member has exceeded the borrowing limit.")
+        self.assertEqual(BorrowedBook.objects.count(), 0)
+
+    def test_audit_command(self):
+        self.lend(timezone.now().date() - timedelta(days=1))
+        sweep_overdue()
+        call_command("audit_ledger", stdout=StringIO())
+
+        Member.objects.filter(pk=self.member.pk).update(amount_due=Decimal("3.00"))
+        with self.assertRaises(CommandError):
+            call_command("audit_ledger", stdout=StringIO())
+
+        call_command("audit_ledger", "--fix", stdout=StringIO())
+        self.assertBalance("10.00")
@@ -0,0 +1,121 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from library.lending import LendingError, lend_books
+from library.models import Book, BorrowedBook, LibraryStats, Member, Transaction
+from library.stats import rebuild_library_stats
+from users.models import Librarian
+
+
+class TestLendBooksService(TestCase):
+    def setUp(self):
+        self.user = Librarian.objects.create_user(email="test@gmail.com", password="password")
+        self.other_user = Librarian.objects.create_user(email="other@gmail.com", password="password")
+        self.member = Member.objects.create(name="John Doe", email="member@gmail.com", admin=self.user)
+        self.books = [
+            Book.objects.create(
+                title=f"Title {index}",
+                author="Test Author",
+                category="Programming",
+                quantity=2,
+                borrowing_fee=Decimal("1.50"),
+                admin=self.user,
+            )
+            for index in range(6)
+        ]
+        self.return_date = timezone.now().date() + timedelta(days=14)
+
+    def lend(self, books):
+        return lend_books(
+            admin=self.user,
+            member=self.member,
+            book_ids=[book.pk for book in books],
+            return_date=self.return_date,
+            fine=Decimal("10.00"),
+            payment_method="Cash",
+        )
+
+    def test_lends_all_books_with_one_payment(self):
+        borrowed_books, payment = self.lend(self.books[:3])
+
+        self.assertEqual(len(borrowed_books), 3)
+        self.assertEqual(BorrowedBook.objects.filter(admin=self.user, member=self.member).count(), 3)
+        self.assertEqual(payment.amount, Decimal("4.50"))
+        for book in self.books[:3]:
+            book.refresh_from_db()
+            self.assertEqual(book.quantity, 1)
+
+    def test_query_count_does_not_grow_with_books(self):
+        with CaptureQueriesContext(connection) as one_book:
+            self.lend(self.books[:1])
+        with CaptureQueriesContext(connection) as five_books:
+            self.lend(self.books[1:6])
+
+        self.assertEqual(len(one_book.captured_queries), len(five_books.captured_queries))
+
+    def test_last_copy_marks_book_not_available(self):
+        self.lend(self.books[:1])
+        self.lend(self.books[:1])
+
+        self.books[0].refresh_from_db()
+        self.assertEqual(self.books[0].quantity, 0)
+        self.assertEqual(self.books[0].status, "not-available")
+
+    def test_out_of_stock_rolls_back_everything(self):
+        Book.objects.filter(pk=self.books[1].pk).update(quantity=0)
+
+        with self.assertRaises(LendingError):
+            self.lend(self.books[:2])
+
+        self.books[0].refresh_from_db()
+        self.assertEqual(self.books[0].quantity, 2)
+        self.assertEqual(BorrowedBook.objects.count(), 0)
+        self.assertEqual(Transaction.objects.count(), 0)
+
+    def test_books_of_another_librarian_are_rejected(self):
+        foreign_book = Book.objects.create(
+            title="Foreign", author="Author", category="Other", quantity=3, admin=self.other_user
+        )
+
+        with self.assertRaises(LendingError):
+            self.lend([self.books[0], foreign_book])
+
+        self.assertEqual(BorrowedBook.objects.count(), 0)
+
+    def test_bulk_created_loans_update_stats(self):
+        rebuild_library_stats(self.user)
+
+        self.lend(self.books[:4])
+
+        stats = LibraryStats.objects.get(admin=self.user)
+        self.assertEqual(stats.total_borrowed_books, 4)
+        self.assertEqual(stats.total_amount, Decimal("6.00"))
+
+
+class TestLendMemberBookViewService(TestCase):
+    def setUp(self):
+        self.user = Librarian.objects.create_user(email="test@gmail.com", password="password")
+        self.member = Member.objects.create(name="John Doe", email="member@gmail.com", admin=self.user)
+        self.book = Book.objects.create(
+            title="Test Title", author="Test Author", category="Programming", quantity=1, admin=self.user
+        )
+        self.data = {
+            "book": self.book.pk,
+            "return_date": (timezone.now().date() + timedelta(days=7)).isoformat(),
+            "fine": 0,
+            "payment_method": "Cash",
+        }
+        self.client.force_login(self.user)
+
+    def test_lend_member_book(self):
+        response = self.client.post(reverse("lend-member-book", kwargs={"pk": self.member.pk}), self.data)
+
+        self.assertRedirects(response, reverse("lent-books"))
+        self.assertEqual(BorrowedBook.objects.filter(admin=self.user).count(), 1)
+        self.assertEqual(Transaction.objects.filter(admin=self.user).count(), 1)
@@ -0,0 +1,106 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from library.models import Book, BorrowedBook, LibraryStats, Member, Transaction
+from library.stats import get_dashboard_stats, rebuild_library_stats
+from users.models import Librarian
+
+
+class TestLibraryStatsSignals(TestCase):
+    def setUp(self):
+        self.user = Librarian.objects.create_user(email="test@gmail.com", password="password")
+        self.member = Member.objects.create(name="John Doe", email="member@gmail.com", admin=self.user)
+        self.book = Book.objects.create(
+            title="Test Title",
+            author="Test Author",
+            category="Programming",
+            quantity=10,
+            borrowing_fee=2.00,
+            admin=self.user,
+        )
+        self.overdue_book = BorrowedBook.objects.create(
+            member=self.member,
+            book=self.book,
+            return_date=timezone.now().date() - timedelta(days=2),
+            fine=15,
+            admin=self.user,
+        )
+        rebuild_library_stats(self.user)
+        self.client.force_login(self.user)
+
+    def assertStatsInSync(self):
+        stats = LibraryStats.objects.get(admin=self.user)
+        for field, value in get_dashboard_stats(self.user).items():
+            self.assertEqual(getattr(stats, field), value, field)
+
+    def test_lending_updates_stats(self):
+        self.client.post(
+            reverse("lend-book"),
+            {
+                "book": self.book.pk,
+                "member": self.member.pk,
+                "return_date": (timezone.now().date() + timedelta(days=7)).isoformat(),
+                "fine": 10,
+                "payment_method": "Cash",
+            },
+        )
+
+        stats = LibraryStats.objects.get(admin=self.user)
+        self.assertEqual(stats.total_borrowed_books, 2)
+        self.assertEqual(stats.total_amount, Decimal("2.00"))
+        self.assertStatsInSync()
+
+    def test_return_with_fine_updates_stats(self):
+        self.client.post(reverse("return-book-fine", kwargs={"pk": self.overdue_book.pk}), {"payment_method": "Cash"})
+
+        stats = LibraryStats.objects.get(admin=self.user)
+        self.assertEqual(stats.total_overdue_books, 0)
+        self.assertEqual(stats.overdue_amount, Decimal("0.00"))
+        self.assertEqual(stats.total_amount, Decimal("15.00"))
+        self.assertStatsInSync()
+
+    def test_deleting_member_cascades_into_stats(self):
+        Transaction.objects.create(member=self.member, amount=5, payment_method="Cash", admin=self.user)
+        self.client.get(reverse("delete-member", kwargs={"pk": self.member.pk}))
+
+        stats = LibraryStats.objects.get(admin=self.user)
+        self.assertEqual(stats.total_members, 0)
+        self.assertEqual(stats.total_borrowed_books, 0)
+        self.assertEqual(stats.total_amount, Decimal("0.00"))
+        self.assertStatsInSync()
+
+    def test_missing_row_is_rebuilt_on_read(self):
+        LibraryStats.objects.all().delete()
+        Member.objects.create(name="Jane Doe", email="jane@gmail.com", admin=self.user)
+
+        response = self.client.get(reverse("home"))
+
+        self.assertEqual(response.context["total_members"], 2)
+        self.assertStatsInSync()
+
+
+class TestRebuildLibraryStatsCommand(TestCase):
+    def setUp(self):
+        self.user = Librarian.objects.create_user(email="test@gmail.com", password="password")
+        Member.objects.create(name="John Doe", email="member@gmail.com", admin=self.user)
+
+    def test_rebuild_repairs_drift(self):
+        LibraryStats.objects.update_or_create(admin=self.user, defaults={"total_members": 42})
+
+        call_command("rebuild_library_stats", stdout=StringIO())
+
+        self.assertEqual(LibraryStats.objects.get(admin=self.user).total_members, 1)
+
+    def test_rebuild_keeps_the_version_growing(self):
+        LibraryStats.objects.update_or_create(admin=self.user, defaults={"version": 5})
+
+        call_command("rebuild_library_stats", stdout=StringIO())
+
+        # Open event streams drop the changes of versions they have already seen
+        self.assertEqual(LibraryStats.objects.get(admin=self.user).version, 6)
@@ -0,0 +1,137 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from library.lending import delete_loan, return_book
+from library.models import Book, BorrowedBook, LibraryStats, Member
+from library.overdue import sweep_overdue
+from library.stats import get_dashboard_stats, rebuild_library_stats
+from users.models import Librarian
+
+
+class TestSweepOverdue(TestCase):
+    def setUp(self):
+        self.user = Librarian.objects.create_user(email="test@gmail.com", password="password")
+        self.member = Member.objects.create(name="John Doe", email="member@gmail.com", admin=self.user)
+        self.other_member = Member.objects.create(name="Jane Doe", email="jane@gmail.com", admin=self.user)
+        self.book = Book.objects.create(
+            title="Test Title", author="Test Author", category="Programming", quantity=5, admin=self.user
+        )
+        today = timezone.now().date()
+        self.late = BorrowedBook.objects.create(
+            member=self.member, book=self.book, return_date=today - timedelta(days=3), fine=10, admin=self.user
+        )
+        self.also_late = BorrowedBook.objects.create(
+            member=self.member, book=self.book, return_date=today - timedelta(days=1), fine=5, admin=self.user
+        )
+        self.on_time = BorrowedBook.objects.create(
+            member=self.other_member, book=self.book, return_date=today + timedelta(days=3), fine=7, admin=self.user
+        )
+        rebuild_library_stats(self.user)
+
+    def assertAmountDue(self, member, amount):
+        member.refresh_from_db()
+        self.assertEqual(member.amount_due, Decimal(amount))
+
+    def test_sweep_flags_overdue_loans_and_charges_fines(self):
+        self.assertEqual(sweep_overdue(), 2)
+
+        self.assertEqual(
+            set(BorrowedBook.objects.filter(is_overdue=True).values_list("pk", flat=True)),
+            {self.late.pk, self.also_late.pk},
+        )
+        self.assertAmountDue(self.member, "15.00")
+        self.assertAmountDue(self.other_member, "0.00")
+
+    def test_sweep_is_incremental(self):
+        sweep_overdue()
+
+        self.assertEqual(sweep_overdue(), 0)
+        self.assertAmountDue(self.member, "15.00")
+
+        self.assertEqual(sweep_overdue(today=timezone.now().date() + timedelta(days=4)), 1)
+        self.assertAmountDue(self.other_member, "7.00")
+
+    def test_sweep_query_count_does_not_grow_with_loans(self):
+        with CaptureQueriesContext(connection) as queries:
+            sweep_overdue(batch_size=10)
+
+        for _ in range(5):
+            BorrowedBook.objects.create(
+                member=self.other_member,
+                book=self.book,
+                return_date=timezone.now().date() - timedelta(days=2),
+                fine=1,
+                admin=self.user,
+            )
+        with CaptureQueriesContext(connection) as more_queries:
+            sweep_overdue(batch_size=10)
+
+        self.assertEqual(len(queries.captured_queries), len(more_queries.captured_queries))
+
+    def test_stats_follow_the_sweep(self):
+        sweep_overdue()
+
+        stats = LibraryStats.objects.get(admin=self.user)
+        self.assertEqual(stats.total_overdue_books, 2)
+        self.assertEqual(stats.overdue_amount, Decimal("15.00"))
+        self.assertEqual(get_dashboard_stats(self.user)["total_overdue_books"], 2)
+
+    def test_return_credits_the_charge(self):
+        sweep_overdue()
+
+        return_book(self.late, payment_method="Cash")
+
+        self.late.refresh_from_db()
+        self.assertFalse(self.late.is_overdue)
+        self.assertAmountDue(self.member, "5.00")
+        self.assertEqual(LibraryStats.objects.get(admin=self.user).total_overdue_books, 1)
+
+    def test_delete_credits_the_charge(self):
+        sweep_overdue()
+
+        delete_loan(self.also_late)
+
+        self.assertAmountDue(self.member, "10.00")
+
+    def test_extending_the_return_date_credits_the_charge(self):
+        sweep_overdue()
+
+        self.late.return_date = timezone.now().date() + timedelta(days=7)
+        self.late.save()
+
+        self.assertFalse(self.late.is_overdue)
+        self.assertAmountDue(self.member, "5.00")
+        self.assertEqual(LibraryStats.objects.get(admin=self.user).overdue_amount, Decimal("5.00"))
+
+    def test_changing_the_fine_of_an_overdue_loan_adjusts_the_charge(self):
+        sweep_overdue()
+        self.late.refresh_from_db()
+
+        self.late.fine = 4
+        self.late.save()
+
+        self.assertAmountDue(self.member, "9.00")
+
+    def test_overdue_view_lists_flagged_loans(self):
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("overdue-books"))
+        self.assertEqual(len(response.context["books"]), 0)
+
+        sweep_overdue()
+        response = self.client.get(reverse("overdue-books"))
+        self.assertEqual({loan.pk for loan in response.context["books"]}, {self.late.pk, self.also_late.pk})
+
+    def test_command(self):
+        out = StringIO()
+        call_command("sweep_overdue", stdout=out)
+
+        self.assertIn("Flagged 2 overdue loan(s).", out.getvalue())
@@ -0,0 +1,81 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from library.models import Book
+from library.pagination import paginate
+from users.models import Librarian
+
+
+class TestKeysetPagination(TestCase):
+    def setUp(self):
+        self.user = Librarian.objects.create_user(email="test@gmail.com", password="password")
+        self.books = [
+            Book.objects.create(
+                title=f"Title {index}",
+                author="Test Author",
+                category="Programming",
+                quantity=1,
+                borrowing_fee=1.00,
+                admin=self.user,
+            )
+            for index in range(7)
+        ]
+        # Identical timestamps must still page deterministically on the id tie-breaker.
+        Book.objects.filter(pk__in=[book.pk for book in self.books[2:5]]).update(created_at=timezone.now())
+        self.queryset = Book.objects.filter(admin=self.user)
+
+    def titles(self, page):
+        return [book.title for book in page]
+
+    def test_walks_forward_and_backward(self):
+        first = paginate(self.queryset, page_size=3)
+        second = paginate(self.queryset, first.next_cursor, page_size=3)
+        third = paginate(self.queryset, second.next_cursor, page_size=3)
+
+        self.assertEqual(self.titles(first), ["Title 4", "Title 3", "Title 2"])
+        self.assertEqual(self.titles(second), ["Title 6", "Title 5", "Title 1"])
+        self.assertEqual(self.titles(third), ["Title 0"])
+        self.assertEqual([first.offset, second.offset, third.offset], [0, 3, 6])
+        self.assertFalse(first.has_previous)
+        self.assertFalse(third.has_next)
+
+        back = paginate(self.queryset, third.previous_cursor, page_size=3)
+        self.assertEqual(self.titles(back), self.titles(second))
+        self.assertEqual(back.offset, 3)
+        back = paginate(self.queryset, back.previous_cursor, page_size=3)
+        self.assertEqual(self.titles(back), self.titles(first))
+        self.assertEqual(back.offset, 0)
+        self.assertFalse(back.has_previous)
+
+    def test_concurrent_inserts_do_not_shift_pages(self):
+        first = paginate(self.queryset, page_size=3)
+        Book.objects.create(title="New", author="Author", category="Other", quantity=1, admin=self.user)
+
+        second = paginate(self.queryset, first.next_cursor, page_size=3)
+
+        self.assertEqual(self.titles(second), ["Title 6", "Title 5", "Title 1"])
+
+    def test_each_page_is_a_single_query(self):
+        page = paginate(self.queryset, page_size=2)
+        while page.has_next:
+            with self.assertNumQueries(1):
+                page = paginate(self.queryset, page.next_cursor, page_size=2)
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        page = paginate(self.queryset, "not-a-cursor", page_size=3)
+
+        self.assertEqual(self.titles(page), ["Title 4", "Title 3", "Title 2"])
+
+    @override_settings(LIBRARY_PAGE_SIZE=5)
+    def test_list_view_renders_page_links(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("books"))
+
+        self.assertEqual(len(response.context["books"]), 5)
+        self.assertContains(response, f"?cursor={response.context['page'].next_cursor}")
+
+        response = self.client.get(reverse("books"), {"cursor": response.context["page"].next_cursor})
+        self.assertEqual(len(response.context["books"]), 2)
+        self.assertContains(response, "<td>6</td>")  # Rows are numbered on from the first page
+        self.assertContains(response, "<td>7</td>")
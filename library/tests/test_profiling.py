@@ -0,0 +1,92 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from library.profiling import captured_profiles
+from users.models import Librarian
+
+
+class TestSlowRequestProfiler(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.user = Librarian.objects.create_user(email="test@gmail.com", password="password", is_staff=True)
+        self.client.force_login(self.user)
+
+    def profiling(self, **settings):
+        return override_settings(
+            **{
+                "REQUEST_PROFILING": True,
+                "REQUEST_PROFILING_RATE": 1.0,
+                "REQUEST_PROFILING_THRESHOLD_MS": 0,
+                "REQUEST_PROFILING_DIR": self.directory,
+                "REQUEST_PROFILING_KEEP": 200,
+                **settings,
+            }
+        )
+
+    def test_slow_requests_are_saved(self):
+        with self.profiling():
+            self.client.get(reverse("books"))
+
+        [profile] = self.profiles()
+        self.assertEqual(profile["view"], "books")
+        self.assertGreater(profile["size"], 0)
+
+    def test_fast_requests_are_discarded(self):
+        with self.profiling(REQUEST_PROFILING_THRESHOLD_MS=60_000):
+            self.client.get(reverse("books"))
+
+        self.assertEqual(self.profiles(), [])
+
+    def test_sampling_rate(self):
+        with self.profiling(REQUEST_PROFILING_RATE=0.0):
+            self.client.get(reverse("books"))
+
+        self.assertEqual(self.profiles(), [])
+
+    def test_off_by_default(self):
+        with override_settings(REQUEST_PROFILING_DIR=self.directory, REQUEST_PROFILING_THRESHOLD_MS=0):
+            self.client.get(reverse("books"))
+
+        self.assertEqual(self.profiles(), [])
+
+    def test_oldest_profiles_are_deleted(self):
+        with self.profiling(REQUEST_PROFILING_KEEP=2):
+            for _ in range(3):
+                self.client.get(reverse("books"))
+
+        self.assertEqual(len(self.profiles()), 2)
+
+    async def test_async_views(self):
+        await self.async_client.aforce_login(self.user)
+
+        with self.profiling():
+            await self.async_client.get(reverse("home"))
+
+        self.assertEqual([profile["view"] for profile in self.profiles()], ["home"])
+
+    def test_profiles_page(self):
+        with self.profiling():
+            self.client.get(reverse("books"))
+            [profile] = self.profiles()
+
+            response = self.client.get(reverse("profiles"))
+            self.assertContains(response, reverse("profile", args=[profile["name"]]))
+
+            download = self.client.get(reverse("profile", args=[profile["name"]]))
+            self.assertEqual(b"".join(download.streaming_content), Path(self.directory, profile["name"]).read_bytes())
+
+            self.assertEqual(self.client.get(reverse("profile", args=["..%2Fdb.sqlite3"])).status_code, 404)
+
+    def test_profiles_pages_staff_only(self):
+        self.client.force_login(Librarian.objects.create_user(email="other@gmail.com", password="password"))
+        self.assertEqual(self.client.get(reverse("profiles")).status_code, 403)
+        self.assertEqual(self.client.get(reverse("profile", args=["any.prof"])).status_code, 403)
+
+    def profiles(self):
+        with override_settings(REQUEST_PROFILING_DIR=self.directory):
+            return captured_profiles()
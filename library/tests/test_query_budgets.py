@@ -0,0 +1,75 @@
+import json
+import math
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.urls import URLPattern
+
+from library.urls import urlpatterns as library_urls
+from users.urls import urlpatterns as users_urls
+
+from .seeded_views import SeededViewsMixin
+
+BUDGETS_FILE = Path(__file__).resolve().parent / "query_budgets.json"
+
+# UPDATE_QUERY_BUDGETS=1 rewrites the budgets file from the measured values instead of checking them,
+# e.g. after adding a view or after a deliberate change in its queries.
+UPDATE_BUDGETS = os.environ.get("UPDATE_QUERY_BUDGETS") == "1"
+
+
+def time_budget(elapsed):
+    """
+    Time budget written for a measured wall time: generous, as it only has to catch a request
+    that became several times slower, not noise between machines.
+    """
+    return max(250, math.ceil(elapsed * 1000 * 5 / 50) * 50)
+
+
+# Results are measured without the query and fragment caches, so a budget bounds the work of a cache miss.
+@override_settings(
+    LIBRARY_QUERY_CACHE=False,
+    CACHES={**settings.CACHES, "template_fragments": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}},
+)
+class TestQueryBudgets(SeededViewsMixin, TestCase):
+    """
+    Requests every view of library/urls.py and users/urls.py over a seeded dataset and fails when one
+    runs more queries, or takes longer, than its budget in query_budgets.json. The message lists the
+    statements of the offending request.
+    """
+
+    def setUp(self):
+        self.seed()
+        self.budgets = json.loads(BUDGETS_FILE.read_text()) if BUDGETS_FILE.exists() else {}
+
+    def test_every_view_is_covered(self):
+        names = {pattern.name for pattern in [*library_urls, *users_urls] if isinstance(pattern, URLPattern)}
+        requests = list(self.view_requests())
+
+        self.assertEqual(names - {name for name, *_ in requests}, set(), "Views without a budgeted request")
+        if not UPDATE_BUDGETS:
+            self.assertEqual({label for _, label, *_ in requests} - set(self.budgets), set(), "Requests without a budget")
+
+    def test_views_stay_within_budget(self):
+        for _, _, method, url, data in self.view_requests():
+            self.run_request(method, url, data)  # Warm-up: template compilation, first-use imports
+
+        measured = {}
+        failures = []
+        for _, label, method, url, data in self.view_requests():
+            statements, elapsed = self.run_request(method, url, data)
+            measured[label] = {"queries": len(statements), "ms": time_budget(elapsed)}
+            budget = self.budgets.get(label)
+            if UPDATE_BUDGETS or budget is None:
+                continue
+
+            if len(statements) > budget["queries"]:
+                queries = "\n".join(f"    {number}. {sql}" for number, (sql, _) in enumerate(statements, start=1))
+                failures.append(f"{label} ({url}): {len(statements)} queries, budget {budget['queries']}\n{queries}")
+            if elapsed * 1000 > budget["ms"]:
+                failures.append(f"{label} ({url}): {elapsed * 1000:.0f} ms, budget {budget['ms']} ms")
+
+        if UPDATE_BUDGETS:
+            BUDGETS_FILE.write_text(json.dumps(measured, indent=2) + "\n")
+        self.assertFalse(failures, "Budgets exceeded:\n" + "\n".join(failures))
@@ -0,0 +1,127 @@
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from library.cache import cache_stats, reset_cache_stats
+from library.lending import lend_books
+from library.models import Book, Member
+from users.models import Librarian
+
+
+@override_settings(LIBRARY_QUERY_CACHE=True)  # Off by default with the local-memory cache of the tests
+class TestQueryCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = Librarian.objects.create_user(email="test@gmail.com", password="password")
+        self.other_user = Librarian.objects.create_user(email="other@gmail.com", password="password")
+        self.member = Member.objects.create(name="John Doe", email="member@gmail.com", admin=self.user)
+        self.book = Book.objects.create(
+            title="Test Title", author="Test Author", category="Programming", quantity=2, admin=self.user
+        )
+        self.client.force_login(self.user)
+
+    def books(self):
+        return [(book.title, book.quantity) for book in self.client.get(reverse("books")).context["books"]]
+
+    def test_repeated_page_skips_the_list_queries(self):
+        self.client.get(reverse("books"))
+        reset_cache_stats()
+
+        # session + user lookup only
+        with self.assertNumQueries(2):
+            self.client.get(reverse("books"))
+        self.assertEqual(cache_stats()["hits"], 1)
+
+    def test_saving_a_row_invalidates_the_page(self):
+        self.assertEqual(self.books(), [("Test Title", 2)])
+
+        self.book.title = "Renamed"
+        self.book.save()
+
+        self.assertEqual(self.books(), [("Renamed", 2)])
+
+    def test_lending_invalidates_quantities_updated_in_bulk(self):
+        self.books()
+
+        lend_books(self.user, self.member, [self.book.pk], timezone.now().date() + timedelta(days=7), 0, "Cash")
+
+        self.assertEqual(self.books(), [("Test Title", 1)])
+
+    def test_other_librarians_keep_their_entries(self):
+        self.client.force_login(self.other_user)
+        self.client.get(reverse("books"))
+        reset_cache_stats()
+
+        Book.objects.create(title="Another", author="Author", category="Other", quantity=1, admin=self.user)
+        self.client.get(reverse("books"))
+
+        self.assertEqual(cache_stats(), {"hits": 1, "misses": 0, "hit_rate": 1.0})
+
+    def test_related_rows_invalidate_joined_lists(self):
+        lend_books(self.user, self.member, [self.book.pk], timezone.now().date() + timedelta(days=7), 0, "Cash")
+        self.client.get(reverse("lent-books"))
+
+        self.member.name = "Jane Doe"
+        self.member.save()
+
+        loans = self.client.get(reverse("lent-books")).context["books"]
+        self.assertEqual([loan.member.name for loan in loans], ["Jane Doe"])
+
+    def test_dashboard_follows_changes(self):
+        self.assertEqual(self.client.get(reverse("home")).context["total_books"], 1)
+
+        Book.objects.create(title="Another", author="Author", category="Other", quantity=1, admin=self.user)
+
+        self.assertEqual(self.client.get(reverse("home")).context["total_books"], 2)
+
+    def test_reused_librarian_id_does_not_see_old_entries(self):
+        self.client.force_login(self.other_user)
+        self.client.get(reverse("members"))
+        other_pk = self.other_user.pk
+        self.other_user.delete()
+
+        newcomer = Librarian.objects.create_user(pk=other_pk, email="new@gmail.com", password="password")
+        Member.objects.filter(admin_id=other_pk).update(name="unchanged")
+        self.client.force_login(newcomer)
+        reset_cache_stats()
+        self.client.get(reverse("members"))
+
+        self.assertEqual(cache_stats()["hits"], 0)
+
+    @override_settings(LIBRARY_QUERY_CACHE=False)
+    def test_cache_can_be_turned_off(self):
+        self.client.get(reverse("books"))
+        with self.assertNumQueries(3):
+            self.client.get(reverse("books"))
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            shared = {**settings.CACHES, "default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                                                     "LOCATION": directory}}
+            with override_settings(CACHES=shared):
+                self.client.get(reverse("books"))
+                self.client.get(reverse("books"))
+                out = StringIO()
+
+                call_command("cache_stats", "--reset", stdout=out)
+
+                self.assertIn("hits: 1", out.getvalue())
+                self.assertEqual(cache_stats()["hits"], 0)
+
+    def test_command_needs_a_shared_cache(self):
+        with self.assertRaisesMessage(CommandError, "local to each process"):
+            call_command("cache_stats", stdout=StringIO())
+
+
+class TestQueryCacheDefault(TestCase):
+    def test_off_with_a_per_process_cache(self):
+        # The tests run with the default local-memory cache, which other workers would not see
+        self.assertFalse(settings.SHARED_CACHE)
+        self.assertFalse(settings.LIBRARY_QUERY_CACHE)
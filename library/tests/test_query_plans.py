@@ -0,0 +1,37 @@
+import re
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+
+from .seeded_views import SeededViewsMixin
+
+# "SCAN <table>" without a usable constraint is a full table (or full index) scan.
+# FTS5 virtual tables report "SCAN ... VIRTUAL TABLE INDEX n:M" for MATCH lookups, which are fine.
+FULL_SCAN = re.compile(r"\bSCAN (?P<table>(library|users)_\w+)\b(?! VIRTUAL TABLE)")
+
+
+@skipUnless(connection.vendor == "sqlite", "Reads SQLite EXPLAIN QUERY PLAN output.")
+class TestQueryPlans(SeededViewsMixin, TestCase):
+    """
+    Runs EXPLAIN QUERY PLAN over every query the library views issue against a seeded dataset
+    and fails if any of them falls back to a full scan of a library or users table.
+    """
+
+    def setUp(self):
+        self.seed()
+
+    def test_view_queries_use_indexes(self):
+        full_scans = []
+        for _, label, method, url, data in self.view_requests():
+            statements, _ = self.run_request(method, url, data)
+            for sql, params in statements:
+                if not sql.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+                    continue
+                with connection.cursor() as cursor:
+                    cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                    plan = "\n".join(row[-1] for row in cursor.fetchall())
+                if FULL_SCAN.search(plan):
+                    full_scans.append(f"{label} ({url})\n  {sql}\n  {plan}")
+
+        self.assertFalse(full_scans, "Full scans found:\n" + "\n".join(full_scans))
@@ -0,0 +1,150 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from library.models import Book, BorrowedBook, Member, Transaction
+from library.search import build_match_query, ranked_ids, search_enabled
+from users.models import Librarian
+
+# The full-text index is an SQLite FTS5 table; other databases use the icontains fallback.
+fts_only = skipUnless(connection.vendor == "sqlite", "The full-text index requires SQLite FTS5.")
+
+
+class TestFullTextSearch(TestCase):
+    def setUp(self):
+        self.user = Librarian.objects.create_user(email="test@gmail.com", password="password")
+        self.other_user = Librarian.objects.create_user(email="other@gmail.com", password="password")
+        self.member = Member.objects.create(name="Ada Lovelace", email="ada@gmail.com", admin=self.user)
+        self.python_book = Book.objects.create(
+            title="Fluent Python", author="Luciano Ramalho", category="Programming", quantity=3, admin=self.user
+        )
+        self.python_history = Book.objects.create(
+            title="A History of Python Python Python", author="Guido", category="History", quantity=1, admin=self.user
+        )
+        self.rust_book = Book.objects.create(
+            title="Programming Rust", author="Jim Blandy", category="Programming", quantity=2, admin=self.user
+        )
+        Book.objects.create(
+            title="Python Crash Course", author="Eric Matthes", category="Programming", quantity=1, admin=self.other_user
+        )
+        self.loan = BorrowedBook.objects.create(
+            member=self.member, book=self.rust_book, return_date="2030-01-01", admin=self.user
+        )
+        self.payment = Transaction.objects.create(member=self.member, amount=5, payment_method="Cash", admin=self.user)
+
+    def test_index_is_available_on_sqlite(self):
+        self.assertEqual(search_enabled(), connection.vendor == "sqlite")
+
+    def test_match_query_quotes_prefix_terms(self):
+        self.assertEqual(build_match_query('pyth "ram'), '"pyth"* "ram"*')
+        self.assertIsNone(build_match_query("  ?! "))
+
+    @fts_only
+    def test_prefix_matching_is_ranked_and_scoped_to_admin(self):
+        ids = ranked_ids(Book, self.user, "pyth")
+
+        self.assertEqual(ids, [self.python_history.pk, self.python_book.pk])
+
+    @fts_only
+    def test_joined_rows_follow_renames(self):
+        self.rust_book.title = "Rust for Rustaceans"
+        self.rust_book.save()
+        self.member.name = "Grace Hopper"
+        self.member.save()
+
+        self.assertEqual(ranked_ids(BorrowedBook, self.user, "rustacean"), [self.loan.pk])
+        self.assertEqual(ranked_ids(BorrowedBook, self.user, "grace"), [self.loan.pk])
+        self.assertEqual(ranked_ids(Transaction, self.user, "hopper"), [self.payment.pk])
+        self.assertEqual(ranked_ids(Transaction, self.user, "lovelace"), [])
+
+    @fts_only
+    def test_deleted_rows_leave_the_index(self):
+        self.member.delete()
+
+        self.assertEqual(ranked_ids(Member, self.user, "ada"), [])
+        self.assertEqual(ranked_ids(BorrowedBook, self.user, "rust"), [])
+
+    @fts_only
+    def test_list_view_uses_ranked_results(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse("books"), {"query": "pyth"})
+
+        self.assertEqual([book.pk for book in response.context["books"]], [self.python_history.pk, self.python_book.pk])
+
+    @fts_only
+    @override_settings(LIBRARY_PAGE_SIZE=2)
+    def test_ranked_results_are_paged(self):
+        for index in range(3):
+            Book.objects.create(
+                title=f"Python {index}", author="Author", category="Programming", quantity=1, admin=self.user
+            )
+        self.client.force_login(self.user)
+        expected = ranked_ids(Book, self.user, "python")
+
+        pages, cursor = [], None
+        while True:
+            response = self.client.get(reverse("books"), {"query": "python", **({"cursor": cursor} if cursor else {})})
+            page = response.context["page"]
+            pages.append([book.pk for book in page])
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+
+        self.assertEqual(pages, [expected[0:2], expected[2:4], expected[4:5]])
+        back = self.client.get(reverse("books"), {"query": "python", "cursor": page.previous_cursor})
+        self.assertEqual([book.pk for book in back.context["page"]], expected[2:4])
+
+    @fts_only
+    @override_settings(LIBRARY_PAGE_SIZE=1)
+    def test_view_filters_apply_before_the_limit(self):
+        BorrowedBook.objects.create(member=self.member, book=self.rust_book, return_date="2030-01-01", admin=self.user)
+        overdue = BorrowedBook.objects.create(
+            member=self.member, book=self.python_book, return_date="2020-01-01", is_overdue=True, admin=self.user
+        )
+        self.client.force_login(self.user)
+
+        response = self.client.post(reverse("overdue-books"), {"query": "lovelace"})
+
+        self.assertEqual([loan.pk for loan in response.context["books"]], [overdue.pk])
+        self.assertFalse(response.context["page"].has_next)
+
+    @fts_only
+    def test_only_narrower_lists_restrict_the_index_query(self):
+        self.client.force_login(self.user)
+
+        for view, restricted in (("books", False), ("lent-books", False), ("overdue-books", True)):
+            with self.subTest(view=view), CaptureQueriesContext(connection) as queries:
+                self.client.post(reverse(view), {"query": "python"})
+            [ranked] = [query["sql"] for query in queries if "MATCH" in query["sql"]]
+            self.assertEqual("+rowid IN" in ranked, restricted)
+
+    def test_both_paths_search_the_same_fields(self):
+        self.client.force_login(self.user)
+        searches = [("members", "members", "ada@gmail"), ("lent-books", "books", "lovelace")]
+
+        for fts in (True, False):
+            with self.subTest(fts=fts), override_settings(LIBRARY_FULL_TEXT_SEARCH=fts):
+                for view, name, query in searches:
+                    response = self.client.post(reverse(view), {"query": query})
+                    self.assertEqual(len(response.context[name]), 1, view)
+
+    @override_settings(LIBRARY_FULL_TEXT_SEARCH=False)
+    def test_falls_back_to_icontains(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse("books"), {"query": "ython"})
+
+        self.assertEqual({book.pk for book in response.context["books"]}, {self.python_history.pk, self.python_book.pk})
+
+    @fts_only
+    def test_rebuild_command_restores_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM library_search_book")
+
+        call_command("rebuild_search_index", stdout=StringIO())
+
+        self.assertEqual(ranked_ids(Book, self.user, "fluent"), [self.python_book.pk])
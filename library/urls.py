@@ -1,20 +1,34 @@
+from django.conf import settings
 from django.urls import path
 
 from .views import (
     AddBookView,
     AddMemberView,
+    AsyncBooksListView,
+    AsyncHomeView,
+    AsyncLentBooksListView,
+    AsyncListPaymentsView,
+    AsyncMembersListView,
+    AsyncOverdueBooksView,
+    AutocompleteView,
     BooksListView,
     DeleteBookView,
     DeleteBorrowedBookView,
     DeleteMemberView,
     DeletePaymentView,
+    EventsView,
+    ExportView,
     HomeView,
+    ImportCatalogueView,
     LendBookView,
     LendMemberBookView,
     LentBooksListView,
     ListPaymentsView,
     MembersListView,
+    MetricsView,
     OverdueBooksView,
+    ProfileDownloadView,
+    ProfilesView,
     ReturnBookFineView,
     ReturnBookView,
     UpdateBookDetailsView,
@@ -22,24 +36,39 @@ from .views import (
     UpdateMemberDetailsView,
 )
 
+
+def page_path(route, view, async_view, name):
+    """
+    Routes a page that has a sync view, for WSGI, and an async view, for ASGI: LIBRARY_ASYNC_VIEWS selects one.
+    """
+    return path(route, (async_view if settings.LIBRARY_ASYNC_VIEWS else view).as_view(), name=name)
+
+
 urlpatterns = [
-    path("", HomeView.as_view(), name="home"),
+    page_path("", HomeView, AsyncHomeView, name="home"),
     path("add-member/", AddMemberView.as_view(), name="add-member"),
-    path("members/", MembersListView.as_view(), name="members"),
+    page_path("members/", MembersListView, AsyncMembersListView, name="members"),
     path("edit-member-details/<str:pk>/", UpdateMemberDetailsView.as_view(), name="update-member"),
     path("delete-member/<str:pk>/", DeleteMemberView.as_view(), name="delete-member"),
     path("add-book/", AddBookView.as_view(), name="add-book"),
-    path("books/", BooksListView.as_view(), name="books"),
+    page_path("books/", BooksListView, AsyncBooksListView, name="books"),
     path("edit-book-details/<str:pk>/", UpdateBookDetailsView.as_view(), name="update-book"),
     path("delete-book/<str:pk>/", DeleteBookView.as_view(), name="delete-book"),
     path("lend-book/", LendBookView.as_view(), name="lend-book"),
     path("lend-book/<str:pk>/", LendMemberBookView.as_view(), name="lend-member-book"),
-    path("lent-books/", LentBooksListView.as_view(), name="lent-books"),
+    page_path("lent-books/", LentBooksListView, AsyncLentBooksListView, name="lent-books"),
     path("edit-borrowed-book/<str:pk>/", UpdateBorrowedBookView.as_view(), name="edit-borrowed-book"),
     path("delete-borrowed-book/<str:pk>/", DeleteBorrowedBookView.as_view(), name="delete-borrowed-book"),
     path("return-book/<str:pk>/", ReturnBookView.as_view(), name="return-book"),
     path("return-book-fine/<str:pk>/", ReturnBookFineView.as_view(), name="return-book-fine"),
-    path("payments/", ListPaymentsView.as_view(), name="payments"),
+    page_path("payments/", ListPaymentsView, AsyncListPaymentsView, name="payments"),
     path("delete-payment/<str:pk>/", DeletePaymentView.as_view(), name="delete-payment"),
-    path("overdue-books/", OverdueBooksView.as_view(), name="overdue-books"),
+    page_path("overdue-books/", OverdueBooksView, AsyncOverdueBooksView, name="overdue-books"),
+    path("export/<str:kind>/", ExportView.as_view(), name="export"),
+    path("import/", ImportCatalogueView.as_view(), name="import-catalogue"),
+    path("autocomplete/<str:kind>/", AutocompleteView.as_view(), name="autocomplete"),
+    path("events/", EventsView.as_view(), name="events"),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
+    path("profiles/", ProfilesView.as_view(), name="profiles"),
+    path("profiles/<str:name>/", ProfileDownloadView.as_view(), name="profile"),
 ]
@@ -1,28 +1,58 @@
 #library/views.py
 import logging
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
+from django.core.exceptions import PermissionDenied
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import redirect, render
 from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views.generic import View
 
+from .cache import acached_result, cache_stats, cached_result
+from .catalogue import detect_format, import_catalogue, is_utf8, read_records, text_stream
+from .context_processors import aprefetch_layout, remember_layout_value, stats_badges
+from .events import event_stream
+from .export import EXPORT_FORMATS, EXPORTS, aexport_lines, export_lines
 from .forms import (
+    AUTOCOMPLETE_KINDS,
     AddBookForm,
     AddMemberForm,
+    ImportCatalogueForm,
     LendBookForm,
     LendMemberBookForm,
     PaymentForm,
     UpdateBorrowedBookForm,
     UpdateMemberForm,
 )
-from .models import Book, BorrowedBook, Member, Transaction
+from .instrumentation import metrics_exposition
+from .lending import LendingError, delete_loan, lend_books, return_book
+from .models import Book, BorrowedBook, LibraryStats, Member, Transaction
+from .profiling import captured_profiles, profile_directory
+from .search import prefix_matches, search_page
+from .stats import abadge_state, aget_library_stats, get_library_stats
 
 logger = logging.getLogger(__name__)
 
 
-@method_decorator(login_required, name="dispatch")
+async def current_user(request):
+    """
+    Loads the user of an async view with the async ORM and stores it on request.user,
+    so that templates and sync helpers do not load it again, synchronously, from the event loop.
+    """
+    request.user = await request.auser()
+    return request.user
+
+
+async def recently_added_books(admin, count=4):
+    return [book async for book in Book.objects.filter(admin=admin).order_by("-created_at")[:count]]
+
+
+@method_decorator(login_required, name="get")
 class HomeView(View):
     """
     Home view for the library management system. Displays the Dashboard.
@@ -37,37 +67,87 @@ class HomeView(View):
     """
 
     def get(self, request, *args, **kwargs):
-        members = Member.objects.filter(admin=request.user)
-        books = Book.objects.filter(admin=request.user)
-        borrowed_books = BorrowedBook.objects.filter(returned=False, admin=request.user)
-        overdue_books = BorrowedBook.objects.filter(return_date__lt=timezone.now().date(), returned=False, admin=request.user)
-
-        total_members = members.count()
-        total_books = books.count()
-        total_borrowed_books = borrowed_books.count()
-        total_overdue_books = overdue_books.count()
-
-        recently_added_books = books.order_by("-created_at")[:4]
-
-        total_amount = sum([payment.amount for payment in Transaction.objects.filter(admin=request.user)])
-        overdue_amount = sum([book.fine for book in overdue_books])
-
-        context = {
-            "total_members": total_members,
-            "total_books": total_books,
-            "total_borrowed_books": total_borrowed_books,
-            "total_overdue_books": total_overdue_books,
-            "recently_added_books": recently_added_books,
-            "total_amount": total_amount,
-            "overdue_amount": overdue_amount,
-        }
+        context = cached_result(
+            request.user,
+            "HomeView",
+            (),
+            (Book, Member, BorrowedBook, Transaction, LibraryStats),
+            lambda: {
+                **get_library_stats(request.user),
+                "recently_added_books": list(Book.objects.filter(admin=request.user).order_by("-created_at")[:4]),
+            },
+        )
+        remember_layout_value(request, "badges", stats_badges(context))  # The same LibraryStats figures
 
         return render(request, "index.html", context)
 
 
+class AsyncHomeView(HomeView):
+    """
+    HomeView for the ASGI profile (see LIBRARY_ASYNC_VIEWS), reading the figures and the recent books
+    with the async ORM. Both run on the request's one database thread, one after the other.
+    """
+
+    @method_decorator(login_required)
+    async def get(self, request, *args, **kwargs):
+        admin = await current_user(request)
+
+        async def dashboard():
+            return {**await aget_library_stats(admin), "recently_added_books": await recently_added_books(admin)}
+
+        context = await acached_result(
+            admin, "HomeView", (), (Book, Member, BorrowedBook, Transaction, LibraryStats), dashboard
+        )
+        remember_layout_value(request, "badges", stats_badges(context))  # The same LibraryStats figures
+
+        return render(request, "index.html", context)
+
+
+def list_page(view, request, query, cursor=None):
+    """
+    Returns a page of a list view: search_page() over view.get_queryset(), cached per librarian
+    and invalidated whenever a row of one of view.cache_models changes (see cache.cached_result).
+    """
+    return cached_result(
+        request.user,
+        view.__class__.__name__,
+        (query, cursor),
+        view.cache_models,
+        lambda: search_page(view.get_queryset(request), query, view.search_fields, request.user, cursor),
+    )
+
+
+async def alist_page(view, request, query, cursor=None):
+    """
+    list_page() for an async list view. The cache lookup and the search (raw full-text SQL and ORM queries)
+    run in one sync_to_async call, which is what the async ORM methods do for each query. The layout values
+    of base.html that need the database are loaded too, since the template cannot load them from the event loop.
+    """
+    await current_user(request)
+    page = await sync_to_async(list_page)(view, request, query, cursor)
+    await aprefetch_layout(request)
+    return page
+
+
+class AsyncListMixin:
+    """
+    Serves a list view with async get() and post() for the ASGI profile (see LIBRARY_ASYNC_VIEWS).
+    The page is loaded by alist_page() and rendered by the view's render_page().
+    """
+
+    @method_decorator(login_required)
+    async def get(self, request, *args, **kwargs):
+        query = request.GET.get("query", "")
+        return self.render_page(request, query, await alist_page(self, request, query, request.GET.get("cursor")))
+
+    @method_decorator(login_required)
+    async def post(self, request, *args, **kwargs):
+        query = request.POST.get("query", "")
+        return self.render_page(request, query, await alist_page(self, request, query))
 
 
 @method_decorator(login_required, name="dispatch")
+@method_decorator(transaction.atomic, name="dispatch")
 class AddMemberView(View):
     """
     Add Member view for the library management system.
@@ -94,22 +174,37 @@ class AddMemberView(View):
         return render(request, "members/add-member.html", {"form": form, "admin": request.user})
 
 
-@method_decorator(login_required, name="dispatch")
+@method_decorator(login_required, name="get")
+@method_decorator(login_required, name="post")
 class MembersListView(View):
     """
     Members List view for the library management system.
-    get(): Returns the list of members associated with the logged-in admin.
-    post(): Returns the filtered list of members based on the search query and admin.
+    get(): Returns a page of members associated with the logged-in admin, filtered by the optional "query" parameter.
+    post(): Returns the first page of members filtered by the search query and admin.
     """
 
+    search_fields = ["name", "email"]
+    cache_models = (Member,)
+
+    def get_queryset(self, request):
+        return Member.objects.filter(admin=request.user)
+
+    def render_page(self, request, query, page):
+        return render(request, "members/list-members.html", {"members": page, "page": page, "query": query})
+
     def get(self, request, *args, **kwargs):
-        members = Member.objects.filter(admin=request.user)
-        return render(request, "members/list-members.html", {"members": members})
+        query = request.GET.get("query", "")
+        return self.render_page(request, query, list_page(self, request, query, request.GET.get("cursor")))
 
     def post(self, request, *args, **kwargs):
-        query = request.POST.get("query")
-        members = Member.objects.filter(name__icontains=query, admin=request.user)
-        return render(request, "members/list-members.html", {"members": members})
+        query = request.POST.get("query", "")
+        return self.render_page(request, query, list_page(self, request, query))
+
+
+class AsyncMembersListView(AsyncListMixin, MembersListView):
+    """
+    MembersListView for the ASGI profile.
+    """
 
 
 
@@ -148,6 +243,7 @@ class UpdateMemberDetailsView(View):
 
 
 @method_decorator(login_required, name="dispatch")
+@method_decorator(transaction.atomic, name="dispatch")
 class DeleteMemberView(View):
     """
     Delete Member view for the library management system.
@@ -163,6 +259,7 @@ class DeleteMemberView(View):
 
 
 @method_decorator(login_required, name="dispatch")
+@method_decorator(transaction.atomic, name="dispatch")
 class AddBookView(View):
     """
     Add Book view for the library management system.
@@ -195,22 +292,37 @@ class AddBookView(View):
 
 
 
-@method_decorator(login_required, name="dispatch")
+@method_decorator(login_required, name="get")
+@method_decorator(login_required, name="post")
 class BooksListView(View):
     """
     Books List view for the library management system.
-    get(): Returns the list of books in the library.
-    post(): Returns the list of books in the library based on the search query.
+    get(): Returns a page of books in the library, filtered by the optional "query" parameter.
+    post(): Returns the first page of books in the library based on the search query.
     """
 
+    search_fields = ["title", "author"]
+    cache_models = (Book,)
+
+    def get_queryset(self, request):
+        return Book.objects.filter(admin=request.user)
+
+    def render_page(self, request, query, page):
+        return render(request, "books/list-books.html", {"books": page, "page": page, "query": query})
+
     def get(self, request, *args, **kwargs):
-        books = Book.objects.filter(admin=request.user)
-        return render(request, "books/list-books.html", {"books": books})
+        query = request.GET.get("query", "")
+        return self.render_page(request, query, list_page(self, request, query, request.GET.get("cursor")))
 
     def post(self, request, *args, **kwargs):
-        query = request.POST.get("query")
-        books = Book.objects.filter(Q(title__icontains=query) | Q(author__icontains=query), admin=request.user)
-        return render(request, "books/list-books.html", {"books": books})
+        query = request.POST.get("query", "")
+        return self.render_page(request, query, list_page(self, request, query))
+
+
+class AsyncBooksListView(AsyncListMixin, BooksListView):
+    """
+    BooksListView for the ASGI profile.
+    """
 
 
 @method_decorator(login_required, name="dispatch")
@@ -249,6 +361,7 @@ class UpdateBookDetailsView(View):
 
 
 @method_decorator(login_required, name="dispatch")
+@method_decorator(transaction.atomic, name="dispatch")
 class DeleteBookView(View):
     """
     Delete Book view for the library management system.
@@ -263,6 +376,7 @@ class DeleteBookView(View):
 
 
 @method_decorator(login_required, name="dispatch")
+@method_decorator(transaction.atomic, name="dispatch")
 class LendBookView(View):
 
     def get(self, request, *args, **kwargs):
@@ -276,60 +390,30 @@ class LendBookView(View):
 
         if form.is_valid() and payment_form.is_valid():
             lent_book = form.save(commit=False)
-            
-            # Member Borrowing Limit Check
-            if lent_book.member.amount_due > 500:
-                form.add_error(None, "Member has exceeded the borrowing limit.")
-                logger.error("Member has exceeded the borrowing limit.")
-                return render(request, "books/lend-book.html", {"form": form, "payment_form": payment_form})
 
-            # Process Books Lending
-            payment_method = payment_form.cleaned_data["payment_method"]
-            books_ids = request.POST.getlist("book")
-            amount = 0
-
-            for book_id in books_ids:
-                try:
-                    # Filter books by admin
-                    book = Book.objects.get(pk=book_id, admin=request.user)
-                    
-                    # Create Borrowed Book Entry
-                    BorrowedBook.objects.create(
-                        member=lent_book.member,
-                        book=book,
-                        return_date=lent_book.return_date,
-                        fine=lent_book.fine,
-                        admin=request.user  # Set admin here
-                    )
-                    logger.info(f"Book '{book.title}' lent successfully.")
-
-                    # Update Book Quantity
-                    book.quantity -= 1
-                    book.save()
-                    logger.info(f"Book '{book.title}' quantity updated successfully.")
-
-                    amount += book.borrowing_fee
-
-                except Book.DoesNotExist:
-                    logger.error(f"Book with ID {book_id} does not exist for this admin.")
-                    form.add_error(None, "Invalid book selected.")
-                    return render(request, "books/lend-book.html", {"form": form, "payment_form": payment_form})
-
-            # Create Transaction with Admin Mapping
-            Transaction.objects.create(
-                member=lent_book.member,
-                amount=amount,
-                payment_method=payment_method,
-                admin=request.user  # Map admin to transaction
-            )
-            logger.info("Payment made successfully.")
+            # Process Books Lending (the member borrowing limit is checked by lend_books)
+            try:
+                lend_books(
+                    admin=request.user,
+                    member=form.cleaned_data["member"],
+                    book_ids=[book.pk for book in form.cleaned_data["book"]],
+                    return_date=lent_book.return_date,
+                    fine=lent_book.fine,
+                    payment_method=payment_form.cleaned_data["payment_method"],
+                )
+            except LendingError as error:
+                logger.error(f"Error occurred while lending books: {error}")
+                form.add_error(None, str(error))
+                return render(request, "books/lend-book.html", {"form": form, "payment_form": payment_form})
 
+            logger.info("Books lent and payment made successfully.")
             return redirect("lent-books")
 
         logger.error(f"Error occurred while issuing book: {form.errors}")
         return render(request, "books/lend-book.html", {"form": form, "payment_form": payment_form})
 
 @method_decorator(login_required, name="dispatch")
+@method_decorator(transaction.atomic, name="dispatch")
 class LendMemberBookView(View):
     """
     Lend Member Book view for the library management system.
@@ -344,7 +428,7 @@ class LendMemberBookView(View):
 
     def get(self, request, *args, **kwargs):
         member = Member.objects.get(pk=kwargs["pk"], admin=request.user)
-        form = LendMemberBookForm()
+        form = LendMemberBookForm(admin=request.user)
         payment_form = PaymentForm()
         return render(
             request, "books/lend-member-book.html", {"form": form, "payment_form": payment_form, "member": member}
@@ -352,34 +436,25 @@ class LendMemberBookView(View):
 
     def post(self, request, *args, **kwargs):
         member = Member.objects.get(pk=kwargs["pk"], admin=request.user)
-        form = LendMemberBookForm(request.POST)
+        form = LendMemberBookForm(request.POST, admin=request.user)
         payment_form = PaymentForm(request.POST)
 
         if form.is_valid() and payment_form.is_valid():
-            if member.amount_due > 500:
-                form.add_error(None, "Member has exceeded the borrowing limit.")
-                logger.error("Member has exceeded the borrowing limit.")
+            lended_book = form.save(commit=False)
+            try:
+                lend_books(
+                    admin=request.user,
+                    member=member,
+                    book_ids=[book.pk for book in form.cleaned_data["book"]],
+                    return_date=lended_book.return_date,
+                    fine=lended_book.fine,
+                    payment_method=payment_form.cleaned_data["payment_method"],
+                )
+            except LendingError as error:
+                logger.error(f"Error occurred while lending books: {error}")
+                form.add_error(None, str(error))
             else:
-                lended_book = form.save(commit=False)
-                payment_method = payment_form.cleaned_data["payment_method"]
-                book_ids = request.POST.getlist("book")
-                amount = 0
-                for book_id in book_ids:
-                    book = Book.objects.get(pk=book_id, admin=request.user)
-                    BorrowedBook.objects.create(
-                        member=member, book=book, return_date=lended_book.return_date, fine=lended_book.fine
-                    )
-                    logger.info("Book lent successfully.")
-
-                    book.quantity -= 1
-                    book.save()
-                    logger.info("Book Quantity updated successfully.")
-
-                    amount += book.borrowing_fee
-
-                Transaction.objects.create(member=member, amount=amount, payment_method=payment_method)
-                logger.info("Payment made successfully.")
-
+                logger.info("Books lent and payment made successfully.")
                 return redirect("lent-books")
 
         logger.error(f"Error occurred while issuing book: {form.errors}")
@@ -390,31 +465,43 @@ class LendMemberBookView(View):
 
 
 
-@method_decorator(login_required, name="dispatch")
+@method_decorator(login_required, name="get")
+@method_decorator(login_required, name="post")
 class LentBooksListView(View):
     """
     Lent Books List view for the library management system.
-    get(): Returns the list of books that have been lent to members.
-    post(): Returns the list of books that have been lent to members based on the search query.
+    get(): Returns a page of books that have been lent to members, filtered by the optional "query" parameter.
+    post(): Returns the first page of books that have been lent to members based on the search query.
     """
 
-    def get(self, request, *args, **kwargs):
-        books = BorrowedBook.objects.filter(admin=request.user).select_related("member", "book")
+    search_fields = ["book__title", "book__author", "member__name"]
+    cache_models = (BorrowedBook, Book, Member)
 
-        return render(request, "books/lent-books.html", {"books": books})
+    def get_queryset(self, request):
+        return BorrowedBook.objects.filter(admin=request.user).select_related("member", "book")
+
+    def render_page(self, request, query, page):
+        return render(request, "books/lent-books.html", {"books": page, "page": page, "query": query})
+
+    def get(self, request, *args, **kwargs):
+        query = request.GET.get("query", "")
+        return self.render_page(request, query, list_page(self, request, query, request.GET.get("cursor")))
 
     def post(self, request, *args, **kwargs):
-        query = request.POST.get("query")
-        books = BorrowedBook.objects.filter(
-            Q(book__title__icontains=query) | Q(book__author__icontains=query), 
-            admin=request.user
-        ).select_related("member", "book")
-        return render(request, "books/lent-books.html", {"books": books})
+        query = request.POST.get("query", "")
+        return self.render_page(request, query, list_page(self, request, query))
+
+
+class AsyncLentBooksListView(AsyncListMixin, LentBooksListView):
+    """
+    LentBooksListView for the ASGI profile.
+    """
 
 
 
 
 @method_decorator(login_required, name="dispatch")
+@method_decorator(transaction.atomic, name="dispatch")
 class UpdateBorrowedBookView(View):
     """
     Update Borrowed Book view for the library management system. Updates Details of a borrowed book.
@@ -446,6 +533,7 @@ class UpdateBorrowedBookView(View):
         return render(request, "books/update-borrowed-book.html", {"form": form, "book": book})
 
 @method_decorator(login_required, name="dispatch")
+@method_decorator(transaction.atomic, name="dispatch")
 class DeleteBorrowedBookView(View):
     """
     Delete Borrowed Book view for the library management system.
@@ -454,19 +542,14 @@ class DeleteBorrowedBookView(View):
 
     def get(self, request, *args, **kwargs):
         borrowed_book = BorrowedBook.objects.get(pk=kwargs["pk"], admin=request.user)
-
-        book = borrowed_book.book
-        book.quantity += 1
-        book.save()
-        logger.info("Book Quantity updated successfully.")
-
-        borrowed_book.delete()
+        delete_loan(borrowed_book)
 
         logger.info("Borrowed book deleted successfully.")
         return redirect("lent-books")
 
 
 @method_decorator(login_required, name="dispatch")
+@method_decorator(transaction.atomic, name="dispatch")
 class ReturnBookView(View):
     """
     Return Book view for the library management system. Works on a button click.
@@ -481,19 +564,17 @@ class ReturnBookView(View):
             return redirect("return-book-fine", pk=borrowed_book.pk)
 
         else:
-            borrowed_book.returned = True
-            borrowed_book.save()
-            logger.info("Book returned successfully.")
-
-            book = borrowed_book.book
-            book.quantity += 1
-            book.save()
-            logger.info("Book Quantity updated successfully.")
+            try:
+                return_book(borrowed_book)
+                logger.info("Book returned successfully.")
+            except LendingError as error:
+                logger.warning(f"Error occurred while returning book: {error}")
 
             return redirect("lent-books")
 
 
 @method_decorator(login_required, name="dispatch")
+@method_decorator(transaction.atomic, name="dispatch")
 class ReturnBookFineView(View):
     """
     Return Book Fine view for the library management system. The page asks for the fine payment for overdue books.
@@ -512,18 +593,11 @@ class ReturnBookFineView(View):
         book = BorrowedBook.objects.get(pk=kwargs["pk"], admin=request.user)
 
         if form.is_valid():
-            payment_method = form.cleaned_data["payment_method"]
-            fine = book.fine
-
-            book.returned = True
-            book.save()
-            logger.info("Book returned successfully.")
-
-            book.book.quantity += 1
-            book.book.save()
-            logger.info("Book Quantity updated successfully.")
-
-            Transaction.objects.create(member=book.member, amount=fine, payment_method=payment_method)
+            try:
+                return_book(book, payment_method=form.cleaned_data["payment_method"])
+                logger.info("Book returned and fine paid successfully.")
+            except LendingError as error:
+                logger.warning(f"Error occurred while returning book: {error}")
 
             return redirect("lent-books")
         logger.error(f"Error occurred while returning book: {form.errors}")
@@ -531,26 +605,40 @@ class ReturnBookFineView(View):
         return render(request, "books/return-book-fine.html", {"book": book, "form": form})
 
 
-@method_decorator(login_required, name="dispatch")
+@method_decorator(login_required, name="get")
+@method_decorator(login_required, name="post")
 class ListPaymentsView(View):
     """
     List Payment View for the library management system.
-    get(): Returns a list of payments made.
-    post(): Returns a list of payments made by a member based on the search query.
+    get(): Returns a page of payments made, filtered by the optional "query" parameter.
+    post(): Returns the first page of payments made by a member based on the search query.
     """
 
+    search_fields = ["member__name"]
+    cache_models = (Transaction, Member)
+
+    def get_queryset(self, request):
+        return Transaction.objects.filter(admin=request.user).select_related("member")
+
+    def render_page(self, request, query, page):
+        return render(request, "payments/list-payments.html", {"payments": page, "page": page, "query": query})
+
     def get(self, request, *args, **kwargs):
-        payments = Transaction.objects.filter(admin=request.user).select_related("member")
-        return render(request, "payments/list-payments.html", {"payments": payments})
+        query = request.GET.get("query", "")
+        return self.render_page(request, query, list_page(self, request, query, request.GET.get("cursor")))
 
     def post(self, request, *args, **kwargs):
-        query = request.POST.get("query")
-        payments = Transaction.objects.filter(
-            Q(member__name__icontains=query) & Q(admin=request.user)
-        ).select_related("member")
-        return render(request, "payments/list-payments.html", {"payments": payments})
+        query = request.POST.get("query", "")
+        return self.render_page(request, query, list_page(self, request, query))
+
+
+class AsyncListPaymentsView(AsyncListMixin, ListPaymentsView):
+    """
+    ListPaymentsView for the ASGI profile.
+    """
 
 @method_decorator(login_required, name="dispatch")
+@method_decorator(transaction.atomic, name="dispatch")
 class DeletePaymentView(View):
     """
     Delete Payment view for the library management system.
@@ -568,28 +656,198 @@ class DeletePaymentView(View):
 
 
 
-@method_decorator(login_required, name="dispatch")
+@method_decorator(login_required, name="get")
+@method_decorator(login_required, name="post")
 class OverdueBooksView(View):
     """
     Overdue Books view for the library management system.
-    get(): Returns a list of overdue books.
-    post(): Returns a list of overdue books based on the search query.
+    get(): Returns a page of overdue books, filtered by the optional "query" parameter.
+    post(): Returns the first page of overdue books based on the search query.
+    """
+
+    search_fields = ["book__title", "book__author", "member__name"]
+    cache_models = (BorrowedBook, Book, Member)
+
+    def get_queryset(self, request):
+        return BorrowedBook.objects.filter(is_overdue=True, returned=False, admin=request.user).select_related(
+            "member", "book"
+        )
+
+    def render_page(self, request, query, page):
+        return render(request, "books/overdue-books.html", {"books": page, "page": page, "query": query})
+
+    def get(self, request, *args, **kwargs):
+        query = request.GET.get("query", "")
+        return self.render_page(request, query, list_page(self, request, query, request.GET.get("cursor")))
+
+    def post(self, request, *args, **kwargs):
+        query = request.POST.get("query", "")
+        return self.render_page(request, query, list_page(self, request, query))
+
+
+class AsyncOverdueBooksView(AsyncListMixin, OverdueBooksView):
+    """
+    OverdueBooksView for the ASGI profile.
+    """
+
+
+@method_decorator(login_required, name="dispatch")
+class ExportView(View):
+    """
+    Export view for the library management system.
+    get(): Streams every member, book, loan or payment of the librarian as CSV or NDJSON
+           ("format" parameter, CSV by default). Rows are written as they are read from the
+           database, so memory use does not grow with the size of the library. Under ASGI they are
+           read in chunks from the event loop (see export.aexport_lines).
+    """
+
+    def get(self, request, *args, **kwargs):
+        kind = kwargs["kind"]
+        export_format = request.GET.get("format", "csv")
+        if kind not in EXPORTS or export_format not in EXPORT_FORMATS:
+            raise Http404("Unknown export.")
+
+        content_type, extension = EXPORT_FORMATS[export_format]
+        lines = export_lines(kind, request.user, export_format)
+        if isinstance(request, ASGIRequest):
+            lines = aexport_lines(lines)
+        response = StreamingHttpResponse(lines, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{kind}.{extension}"'
+        return response
+
+
+@method_decorator(login_required, name="dispatch")
+class ImportCatalogueView(View):
+    """
+    Import Catalogue view for the library management system. Adds books or members from a CSV/NDJSON file.
+    get(): Returns the import page with the ImportCatalogueForm.
+    post(): Reads the uploaded file line by line, validates every row like the Add Book / Add Member pages
+            and writes the valid rows in batches. Invalid rows are listed on the page; the rest are imported.
+            A file that is not UTF-8 is rejected before any row is written.
     """
 
     def get(self, request, *args, **kwargs):
-        overdue_books = BorrowedBook.objects.filter(
-            return_date__lt=timezone.now().date(),
-            returned=False,
-            admin=request.user
-        ).select_related("member", "book")
-        return render(request, "books/overdue-books.html", {"books": overdue_books})
+        form = ImportCatalogueForm(initial={"kind": request.GET.get("kind", "books")})
+        return render(request, "import-catalogue.html", {"form": form})
 
     def post(self, request, *args, **kwargs):
-        query = request.POST.get("query")
-        overdue_books = BorrowedBook.objects.filter(
-            Q(book__title__icontains=query) | Q(book__author__icontains=query),
-            return_date__lt=timezone.now().date(),
-            returned=False,
-            admin=request.user
-        ).select_related("member", "book")
-        return render(request, "books/overdue-books.html", {"books": overdue_books})
+        form = ImportCatalogueForm(request.POST, request.FILES)
+
+        if form.is_valid():
+            uploaded_file = form.cleaned_data["file"]
+            if is_utf8(uploaded_file.chunks()):
+                uploaded_file.seek(0)
+                records = read_records(text_stream(uploaded_file), detect_format(uploaded_file.name))
+                result = import_catalogue(form.cleaned_data["kind"], request.user, records)
+                logger.info(f"Catalogue imported: {result.created} created, {result.rejected} rejected.")
+                return render(request, "import-catalogue.html", {"form": form, "result": result})
+            form.add_error("file", "The file must be UTF-8 encoded.")
+
+        logger.error(f"Error occurred while importing catalogue: {form.errors}")
+        return render(request, "import-catalogue.html", {"form": form})
+
+
+@method_decorator(login_required, name="get")
+class EventsView(View):
+    """
+    Events view for the library management system, read by the EventSource of base.html.
+    get(): Streams the sidebar badge counts of the librarian and their changes as server-sent events
+           (see events.event_stream). An open stream holds a connection, which only the ASGI server
+           can afford: under WSGI it returns 204 No Content, which tells browsers not to reconnect.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        if not isinstance(request, ASGIRequest):
+            return HttpResponse(status=204)
+
+        admin = await current_user(request)
+        response = StreamingHttpResponse(
+            event_stream(admin.pk, lambda: abadge_state(admin)), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"  # Sent as they come through nginx
+        return response
+
+
+@method_decorator(login_required, name="dispatch")
+class AutocompleteView(View):
+    """
+    Autocomplete view for the library management system, used by the Select2 widgets of the lend forms.
+    get(): Returns the librarian's books in stock or members matching the `q` prefix (see search.prefix_matches)
+           as {"results": [{"id": ..., "text": ...}]}, loading only the fields of the labels.
+    """
+
+    def get(self, request, *args, **kwargs):
+        if kwargs["kind"] not in AUTOCOMPLETE_KINDS:
+            raise Http404
+        rows, prefix_fields, label_fields = AUTOCOMPLETE_KINDS[kwargs["kind"]]
+
+        matches = prefix_matches(
+            rows(request.user).only(*label_fields), request.GET.get("q", ""), prefix_fields, request.user
+        )
+        return JsonResponse({"results": [{"id": row.pk, "text": str(row)} for row in matches]})
+
+
+@method_decorator(login_required, name="dispatch")
+class MetricsView(View):
+    """
+    Metrics view for the library management system, for staff only.
+    get(): Returns the per-view request metrics of all worker processes (see instrumentation.metrics_exposition)
+           and the query cache totals, in the Prometheus text format.
+    """
+
+    def get(self, request, *args, **kwargs):
+        if not request.user.is_staff:
+            raise PermissionDenied
+
+        stats = cache_stats()
+        lines = [
+            "# HELP library_query_cache_hits_total Query cache hits of all workers.",
+            "# TYPE library_query_cache_hits_total counter",
+            f"library_query_cache_hits_total {stats['hits']}",
+            "# HELP library_query_cache_misses_total Query cache misses of all workers.",
+            "# TYPE library_query_cache_misses_total counter",
+            f"library_query_cache_misses_total {stats['misses']}",
+        ]
+        return HttpResponse(
+            metrics_exposition() + "\n".join(lines) + "\n", content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
+
+@method_decorator(login_required, name="dispatch")
+class ProfilesView(View):
+    """
+    Profiles view for the library management system, for staff only.
+    get(): Lists the profiles of slow requests captured by profiling.SlowRequestProfilerMiddleware, newest first.
+    """
+
+    def get(self, request, *args, **kwargs):
+        if not request.user.is_staff:
+            raise PermissionDenied
+
+        return render(
+            request,
+            "profiles.html",
+            {
+                "profiles": captured_profiles(),
+                "enabled": settings.REQUEST_PROFILING,
+                "rate": settings.REQUEST_PROFILING_RATE,
+                "threshold": settings.REQUEST_PROFILING_THRESHOLD_MS,
+            },
+        )
+
+
+@method_decorator(login_required, name="dispatch")
+class ProfileDownloadView(View):
+    """
+    Profile Download view for the library management system, for staff only.
+    get(): Returns a captured profile as a .prof file. Only names listed on the profiles page are served.
+    """
+
+    def get(self, request, *args, **kwargs):
+        if not request.user.is_staff:
+            raise PermissionDenied
+        if kwargs["name"] not in {profile["name"] for profile in captured_profiles()}:
+            raise Http404("Unknown profile.")
+
+        return FileResponse(open(profile_directory() / kwargs["name"], "rb"), as_attachment=True)
@@ -1,10 +1,29 @@
 (function($) {
   'use strict';
 
-  if ($(".js-example-basic-single").length) {
-    $(".js-example-basic-single").select2();
-  }
-  if ($(".js-example-basic-multiple").length) {
-    $(".js-example-basic-multiple").select2();
+  // Selects with a data-autocomplete-url (the lend forms) fetch their options as the user types
+  function options(select) {
+    var url = $(select).data("autocomplete-url");
+    if (!url) {
+      return {};
+    }
+    return {
+      minimumInputLength: 1,
+      ajax: {
+        url: url,
+        dataType: "json",
+        delay: 250,
+        data: function (params) {
+          return { q: params.term };
+        }
+      }
+    };
   }
+
+  $(".js-example-basic-single").each(function () {
+    $(this).select2(options(this));
+  });
+  $(".js-example-basic-multiple").each(function () {
+    $(this).select2(options(this));
+  });
 })(jQuery);